@@ -95,7 +95,9 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_average_rating(self, obj):
-        """Calculate average rating"""
+        """Calculate average rating (annotated by ProductViewSet when available)"""
+        if hasattr(obj, 'avg_rating'):
+            return round(obj.avg_rating, 2) if obj.avg_rating is not None else 0
         reviews = obj.reviews.filter(is_approved=True)
         if reviews.exists():
             return round(sum([r.rating for r in reviews]) / reviews.count(), 2)
@@ -103,13 +105,17 @@ class ProductSerializer(serializers.ModelSerializer):
     
     def get_review_count(self, obj):
         """Get review count"""
+        if hasattr(obj, 'review_count'):
+            return obj.review_count
         return obj.reviews.filter(is_approved=True).count()
     
     def get_is_in_stock(self, obj):
         """Check if product is in stock"""
-        if obj.track_inventory:
-            return obj.inventory_items.filter(quantity_available__gt=0).exists()
-        return True
+        if not obj.track_inventory:
+            return True
+        if hasattr(obj, 'in_stock'):
+            return obj.in_stock
+        return obj.inventory_items.filter(quantity_available__gt=0).exists()
 
 class CartItemSerializer(serializers.ModelSerializer):
     """Shopping cart item serializer"""
@@ -125,7 +131,10 @@ class CartItemSerializer(serializers.ModelSerializer):
     
     def get_product_image(self, obj):
         """Get product main image"""
-        image = obj.product.images.filter(is_primary=True).first()
+        if hasattr(obj.product, 'primary_images'):
+            image = obj.product.primary_images[0] if obj.product.primary_images else None
+        else:
+            image = obj.product.images.filter(is_primary=True).first()
         if image:
             return self.context['request'].build_absolute_uri(image.image.url)
         return None
@@ -214,8 +223,8 @@ class CouponSerializer(serializers.ModelSerializer):
         from django.utils import timezone
         now = timezone.now()
         
-        # Check if active and not expired
-        if not obj.is_active or (obj.expires_at and obj.expires_at < now):
+        # Check if active and within the validity window
+        if not obj.is_active or obj.valid_from > now or obj.valid_to < now:
             return False
         
         # Check usage limits
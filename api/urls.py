@@ -17,6 +17,7 @@ router.register(r'coupons', views.CouponViewSet, basename='coupon')
 # API URLs
 urlpatterns = [
     path('', include(router.urls)),
+    path('exports/<str:dataset>/', views.DataExportView.as_view(), name='data_export'),
 ]
 
 # URL patterns for reference:
@@ -45,4 +46,7 @@ urlpatterns = [
 # POST   /api/v1/orders/{id}/cancel/      - Cancel order
 # 
 # GET    /api/v1/coupons/                 - List coupons
-# POST   /api/v1/coupons/validate_coupon/ - Validate coupon
\ No newline at end of file
+# POST   /api/v1/coupons/validate_coupon/ - Validate coupon
+# 
+# GET    /api/v1/exports/{dataset}/       - Staff streaming export (products, orders, movements)
+#                                           ?output=csv|jsonl&gzip=1&since=YYYY-MM-DD
\ No newline at end of file
@@ -1,8 +1,10 @@
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, Avg, Count, Exists, OuterRef, Prefetch, prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from decimal import Decimal
 
@@ -18,6 +20,10 @@ from suppliers.models import *
 from theme.models import *
 from users.models import *
 
+from core.services.export_service import ExportService
+from marketing.services.coupon_service import CouponService
+from orders.services.order_service import OrderError, OrderService
+
 from .serializers import *
 from .filters import ProductFilter
 from .permissions import IsOwnerOrReadOnly
@@ -61,7 +67,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     
     queryset = Product.objects.filter(is_active=True).select_related(
         'category', 'brand'
-    ).prefetch_related('images', 'variants', 'attribute_values', 'reviews')
+    ).prefetch_related('images', 'variants__images', 'attribute_values', 'reviews__user')
     
     serializer_class = ProductSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -74,10 +80,12 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         """Custom queryset with annotations"""
         queryset = super().get_queryset()
         
-        # Add annotations for sorting
+        # Add annotations for sorting (also read by ProductSerializer, one query per page)
+        approved = Q(reviews__is_approved=True)
         queryset = queryset.annotate(
-            avg_rating=Avg('reviews__rating'),
-            review_count=Count('reviews')
+            avg_rating=Avg('reviews__rating', filter=approved),
+            review_count=Count('reviews', filter=approved, distinct=True),
+            in_stock=Exists(InventoryItem.objects.filter(product=OuterRef('pk'), quantity_available__gt=0)),
         )
         
         return queryset
@@ -173,6 +181,12 @@ class CartViewSet(viewsets.ModelViewSet):
     def current(self, request):
         """Get current user cart"""
         cart = self.get_or_create_cart()
+        # Items, their products and primary images in three queries (read by CartItemSerializer)
+        prefetch_related_objects(
+            [cart],
+            Prefetch('items', queryset=CartItem.objects.select_related('product')),
+            Prefetch('items__product__images', queryset=ProductImage.objects.filter(is_primary=True), to_attr='primary_images'),
+        )
         serializer = self.get_serializer(cart)
         return Response(serializer.data)
     
@@ -273,18 +287,16 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
-        """Cancel order"""
+        """Cancel order (releases the coupon use)"""
         order = self.get_object()
         
-        if order.status not in ['pending', 'confirmed']:
+        try:
+            OrderService.cancel(order, user=request.user)
+        except OrderError as e:
             return Response({
-                'error': 'Pedido não pode ser cancelado.'
+                'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        order.status = 'cancelled'
-        order.cancelled_at = timezone.now()
-        order.save()
-        
         return Response({
             'message': 'Pedido cancelado com sucesso.'
         }, status=status.HTTP_200_OK)
@@ -298,34 +310,74 @@ class CouponViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['post'])
     def validate_coupon(self, request):
-        """Validate coupon code"""
-        code = request.data.get('code', '').upper()
-        
+        """
+        Validate coupon code and the discount for the sent subtotal.
+
+        Served from the compiled rules only; send "cart": true (on checkout,
+        not per keystroke) to evaluate against the current cart instead.
+        """
+        subtotal = request.data.get('subtotal')
         try:
-            coupon = Coupon.objects.get(code=code, is_active=True)
-            
-            # Check if coupon is valid
-            now = timezone.now()
-            if coupon.expires_at and coupon.expires_at < now:
-                return Response({
-                    'valid': False,
-                    'message': 'Cupom expirado.'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            if coupon.usage_limit and coupon.used_count >= coupon.usage_limit:
-                return Response({
-                    'valid': False,
-                    'message': 'Cupom esgotado.'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            serializer = self.get_serializer(coupon)
+            subtotal = Decimal(str(subtotal)) if subtotal not in (None, '') else None
+        except (ArithmeticError, ValueError):
+            subtotal = Decimal('NaN')
+        if subtotal is not None and (not subtotal.is_finite() or subtotal < 0):
             return Response({
-                'valid': True,
-                'coupon': serializer.data
-            })
+                'valid': False,
+                'message': 'Subtotal inválido.'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        except Coupon.DoesNotExist:
+        code = request.data.get('code', '')
+        cart = None
+        if subtotal is None and request.data.get('cart') in (True, 'true', '1'):
+            cart = Cart.objects.filter(user=request.user).filter(
+                Exists(CartItem.objects.filter(cart=OuterRef('pk')))
+            ).order_by('-updated_at').first()
+        if cart is not None:
+            result = CouponService.evaluate_cart(code, cart)
+        else:
+            result = CouponService.evaluate(code, subtotal)
+        if not result:
             return Response({
                 'valid': False,
-                'message': 'Cupom inválido.'
-            }, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+                'reason': result.reason,
+                'message': result.message
+            }, status=status.HTTP_404_NOT_FOUND if result.reason == 'invalid' else status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'valid': True,
+            'coupon': {
+                'code': result.coupon.code,
+                'discount_type': result.coupon.discount_type,
+                'discount_value': result.coupon.discount_value,
+                'minimum_order_value': result.coupon.minimum_order_value,
+                'valid_to': result.coupon.valid_to,
+            },
+            'discount': result.discount if subtotal is not None or cart is not None else None,
+            'message': result.message
+        })
+
+class DataExportView(APIView):
+    """Streaming exports (CSV/JSONL, optionally gzip) for staff"""
+    
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request, dataset):
+        fmt = request.query_params.get('output', 'csv')
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        
+        try:
+            stream = ExportService.stream(
+                dataset,
+                fmt=fmt,
+                compress=compress,
+                since=request.query_params.get('since'),
+            )
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = StreamingHttpResponse(stream, content_type=ExportService.content_type(fmt, compress))
+        response['Content-Disposition'] = f'attachment; filename="{ExportService.filename(dataset, fmt, compress)}"'
+        return response
@@ -1,4 +1,5 @@
 from datetime import timezone
+from asgiref.sync import sync_to_async
 from django.core.mail import send_mail
 from django.template import TemplateDoesNotExist
 from ecommerce_template import settings
@@ -89,50 +90,53 @@ class EmailService:
             logger.error(f"Erro ao enviar notificação de senha alterada: {str(e)}")
             return False
             
+    @classmethod
+    def verification_code_message(self, email, code, user_name='', verification_type='registration'):
+        """Argumentos do send_mail do código de verificação (assunto, corpos e remetente)"""
+        site_name = settings.config_service('site_name', '')
+        site_url = settings.config_service('site_url', '')
+        site_contact_email = settings.config_service('contact_email')
+        site_corp_email = settings.config_service('corp_email')
+        
+        # Definir assunto e template baseado no tipo
+        subjects = {
+            'registration': 'Confirme seu cadastro',
+            'login_verification': 'Verificação de login',
+            'password_reset': 'Redefinição de senha',
+            'email_change': 'Alteração de email'
+        }
+        
+        subject = f"{subjects.get(verification_type, 'Verificação')} - {site_name}"
+        
+        # Contexto para o template
+        context = {
+            'code': code,
+            'user_name': user_name,
+            'verification_type': verification_type,
+            'site_name': site_name,
+            'site_url': site_url,
+            'support_email': site_contact_email,
+            'expires_minutes': 10
+        }
+        
+        return {
+            'subject': subject,
+            # Renderizar template de texto
+            'message': self.get_email_template('verification_code','txt',context),
+            # Renderizar template HTML
+            'html_message': self.get_email_template('verification_code','html',context),
+            'from_email': site_corp_email,
+            'recipient_list': [email],
+        }
+
     @classmethod
     def send_verification_code(self, email, code, user_name='', verification_type='registration'):
         """Envia código de verificação por email"""
         
         try:
-            site_name = settings.config_service('site_name', '')
-            site_url = settings.config_service('site_url', '')
-            site_contact_email = settings.config_service('contact_email')
-            site_corp_email = settings.config_service('corp_email')
-            
-            # Definir assunto e template baseado no tipo
-            subjects = {
-                'registration': 'Confirme seu cadastro',
-                'login_verification': 'Verificação de login',
-                'password_reset': 'Redefinição de senha',
-                'email_change': 'Alteração de email'
-            }
-            
-            subject = f"{subjects.get(verification_type, 'Verificação')} - {site_name}"
-            
-            # Contexto para o template
-            context = {
-                'code': code,
-                'user_name': user_name,
-                'verification_type': verification_type,
-                'site_name': site_name,
-                'site_url': site_url,
-                'support_email': site_contact_email,
-                'expires_minutes': 10
-            }
-            
-            # Renderizar template HTML
-            html_message = self.get_email_template('verification_code','html',context)
-            
-            # Renderizar template de texto
-            text_message = self.get_email_template('verification_code','txt',context)
-            
             # Enviar email
             result = send_mail(
-                subject=subject,
-                message=text_message,
-                html_message=html_message,
-                from_email=site_corp_email,
-                recipient_list=[email],
+                **self.verification_code_message(email, code, user_name, verification_type),
                 fail_silently=False,
             )
             
@@ -142,6 +146,24 @@ class EmailService:
         except Exception as e:
             logger.error(f"Erro ao enviar email para {email}: {str(e)}")
             return False
+
+    @classmethod
+    async def asend_verification_code(self, email, code, user_name='', verification_type='registration'):
+        """
+        send_verification_code para views assíncronas: a mensagem (configurações
+        e templates, com consultas) é montada no thread do ORM e a conversa SMTP
+        roda em um thread próprio, sem segurar o thread compartilhado de consultas.
+        """
+        try:
+            message = await sync_to_async(self.verification_code_message)(email, code, user_name, verification_type)
+            result = await sync_to_async(send_mail, thread_sensitive=False)(**message, fail_silently=False)
+            
+            logger.info(f"Email de verificação enviado para {email} - Tipo: {verification_type}")
+            return result or True
+            
+        except Exception as e:
+            logger.error(f"Erro ao enviar email para {email}: {str(e)}")
+            return False
     
     @classmethod
     def send_welcome_email(self, user):
@@ -13,6 +13,8 @@ from django.contrib.auth.models import Group
 from users.models import Address, User, EmailVerification, UserLoginAttempt, UserPasswordChange
 from users.forms import *
 from .utils import EmailService
+from asgiref.sync import sync_to_async
+from core.asynchronous import asession_get
 
 # region Auth
 class LoginView(View):
@@ -301,9 +303,9 @@ class LogoutView(View):
 
 # region Email
 class CheckEmailView(View):
-    """View para verificar se email já existe (AJAX)"""
+    """View para verificar se email já existe (AJAX, assíncrona)"""
     
-    def get(self, request):
+    async def get(self, request):
         email = request.GET.get('email', '').strip().lower()
         
         if not email:
@@ -311,7 +313,7 @@ class CheckEmailView(View):
         
         # Verificar se email já existe
         from users.models import User as usuario
-        exists = usuario.objects.filter(email__iexact=email).exists()
+        exists = await usuario.objects.filter(email__iexact=email).aexists()
         
         return JsonResponse({
             'available': not exists,
@@ -725,11 +727,11 @@ class PasswordResetRequestView(View):
             return render(request, self.template_name)
         
 class ResendVerificationView(View):
-    """View para reenviar código de verificação"""
+    """View para reenviar código de verificação (assíncrona: o envio SMTP não bloqueia o worker)"""
     
-    def post(self, request):
-        email = request.session.get('verification_email')
-        verification_type = request.session.get('verification_type', 'registration')
+    async def post(self, request):
+        email = await asession_get(request, 'verification_email')
+        verification_type = await asession_get(request, 'verification_type', 'registration')
         
         if not email:
             return JsonResponse({
@@ -739,11 +741,11 @@ class ResendVerificationView(View):
         
         try:
             # Verificar se pode reenviar (não mais que 3 por hora)
-            recent_verifications = EmailVerification.objects.filter(
+            recent_verifications = await EmailVerification.objects.filter(
                 email__iexact=email,
                 verification_type=verification_type,
                 created_at__gte=timezone.now() - timezone.timedelta(hours=1)
-            ).count()
+            ).acount()
             
             if recent_verifications >= 3:
                 return JsonResponse({
@@ -752,22 +754,22 @@ class ResendVerificationView(View):
                 })
             
             # Buscar verificação mais recente para obter dados temporários
-            last_verification = EmailVerification.objects.filter(
+            last_verification = await EmailVerification.objects.filter(
                 email__iexact=email,
                 verification_type=verification_type
-            ).order_by('-created_at').first()
+            ).order_by('-created_at').afirst()
             
             temp_data = last_verification.temp_user_data if last_verification else {}
             
             # Criar nova verificação
-            verification = EmailVerification.create_verification(
+            verification = await sync_to_async(EmailVerification.create_verification)(
                 email=email,
                 verification_type=verification_type,
                 temp_data=temp_data
             )
             
             # Enviar novo código
-            email_sent = EmailService.send_verification_code(
+            email_sent = await EmailService.asend_verification_code(
                 email=email,
                 code=verification.verification_code,
                 user_name=temp_data.get('first_name', ''),
@@ -1089,10 +1091,10 @@ class PasswordResetFormView(View):
         return ip
 
 class ResendResetCodeView(View):
-    """Reenviar código para reset de senha"""
+    """Reenviar código para reset de senha (assíncrona: o envio SMTP não bloqueia o worker)"""
     
-    def post(self, request):
-        email = request.session.get('reset_email')
+    async def post(self, request):
+        email = await asession_get(request, 'reset_email')
         
         if not email:
             return JsonResponse({
@@ -1102,11 +1104,11 @@ class ResendResetCodeView(View):
         
         try:
             # Verificar rate limiting
-            recent_codes = EmailVerification.objects.filter(
+            recent_codes = await EmailVerification.objects.filter(
                 email__iexact=email,
                 verification_type='password_reset',
-                created_at__gte=timezone.now() - timedelta(hours=1)
-            ).count()
+                created_at__gte=timezone.now() - timezone.timedelta(hours=1)
+            ).acount()
             
             if recent_codes >= 3:
                 return JsonResponse({
@@ -1115,16 +1117,16 @@ class ResendResetCodeView(View):
                 })
             
             # Verificar se usuário existe
-            user = User.objects.get(email__iexact=email, is_active=True)
+            user = await User.objects.aget(email__iexact=email, is_active=True)
             
             # Criar nova verificação
-            verification = EmailVerification.create_verification(
+            verification = await sync_to_async(EmailVerification.create_verification)(
                 email=email,
                 verification_type='password_reset'
             )
             
             # Enviar novo código
-            email_sent = EmailService.send_verification_code(
+            email_sent = await EmailService.asend_verification_code(
                 email=email,
                 code=verification.verification_code,
                 user_name=user.first_name,
@@ -9,6 +9,49 @@ admin.site.site_header = "BRV Logistics Admin"
 admin.site.site_title = "BRV Logistics Admin"
 admin.site.index_title = "Painel Administrativo"
 
+# Changelists de tabelas grandes
+class RelatedIdFilter(admin.RelatedFieldListFilter):
+    """
+    Filtro por relação sem a lista de opções (que carrega a tabela relacionada
+    inteira a cada página): um campo de ID, mostrando só o registro selecionado.
+    Uso: `list_filter = [('category', RelatedIdFilter)]`
+    """
+    template = 'admin/filters/related_id.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        from django.contrib.admin.views.main import ERROR_FLAG, PAGE_VAR
+        ignored = {self.lookup_kwarg, self.lookup_kwarg_isnull, PAGE_VAR, ERROR_FLAG}
+        self.other_params = [(key, value) for key, value in request.GET.items() if key not in ignored]
+
+    def has_output(self):
+        return True
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        from django.core.exceptions import ValidationError
+        try:
+            related = field.remote_field.model._default_manager.filter(
+                **{field.target_field.name: self.lookup_val}
+            ).first()
+        except (ValueError, ValidationError):
+            return []
+        return [(self.lookup_val, str(related))] if related is not None else []
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist para tabelas com milhões de linhas: total estimado pelo
+    Postgres (core.pagination.EstimatedCountPaginator) e sem o segundo
+    COUNT(*) da tabela inteira ao filtrar.
+    """
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        from core.pagination import EstimatedCountPaginator
+        return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+
 @admin.register(SiteSettings)
 class SiteSettingsAdmin(admin.ModelAdmin):
     list_display = ['site_name', 'contact_email', 'is_active']
@@ -0,0 +1,34 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+async def aget_user(request):
+    """
+    request.user resolvido fora do event loop (o Django 4.2 ainda não tem
+    request.auser()). A sessão e o usuário são carregados uma vez; depois o
+    objeto pode ser usado na view assíncrona sem consultas.
+    """
+    def load():
+        request.user.is_authenticated
+        return request.user
+
+    return await sync_to_async(load)()
+
+
+async def asession_get(request, key, default=None):
+    """request.session.get para views assíncronas (a sessão carrega sob demanda)"""
+    return await sync_to_async(request.session.get)(key, default)
+
+
+def async_login_required(view):
+    """login_required para views assíncronas (o do Django 4.2 só aceita views síncronas)"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
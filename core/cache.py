@@ -0,0 +1,305 @@
+import logging
+import math
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.instrumentation import current_metrics
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Conta hits/misses de leitura nas métricas da requisição em andamento"""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        metrics = current_metrics()
+        if value is _MISSING:
+            if metrics is not None:
+                metrics.record_cache(misses=1)
+            return default
+        if metrics is not None:
+            metrics.record_cache(hits=1)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version)
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.record_cache(hits=len(values), misses=len(keys) - len(values))
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:  # django-redis só é necessário em produção
+    RedisCache = None
+
+if RedisCache is not None:
+    class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+        pass
+
+
+class LocalLRUCache:
+    """L1 por processo: LRU limitado, TTL curto, seguro entre threads"""
+
+    def __init__(self, max_entries=1024, timeout=5):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache:
+    """
+    Cache em duas camadas para chaves quentes lidas em toda requisição:
+
+    - L1: LRU por processo (LocalLRUCache), TTL de poucos segundos;
+    - L2: cache compartilhado entre workers (`CACHES[ALIAS]`, Redis em produção).
+
+    As chaves ficam em namespaces versionados (`navbar:<versão>:<chave>`):
+    `invalidate(namespace)` incrementa a versão no L2 e as chaves antigas
+    deixam de ser lidas (expiram sozinhas). Os outros processos enxergam a
+    nova versão em até L1_TIMEOUT segundos.
+
+    `get_or_set` protege contra stampede:
+    - recomputação antecipada probabilística (XFetch): perto do vencimento,
+      uma requisição ocasional recalcula antes de a chave expirar;
+    - single-flight: na falta, só uma thread do processo e só um processo
+      (lock via `add` no L2) calculam; os demais usam o valor anterior, se
+      houver, ou esperam o resultado por até LOCK_WAIT segundos.
+
+    `get_many`/`set_many` leem e gravam em lote (uma ida ao L2), para páginas
+    que montam muitos fragmentos de uma vez.
+
+    Configuração em `TIERED_CACHE` (ALIAS, L1_MAX_ENTRIES, L1_TIMEOUT,
+    LOCK_TIMEOUT, LOCK_WAIT, STALE_GRACE).
+    """
+    DEFAULTS = {
+        'ALIAS': 'default',
+        'L1_MAX_ENTRIES': 1024,
+        'L1_TIMEOUT': 5,
+        'LOCK_TIMEOUT': 30,
+        'LOCK_WAIT': 2.0,
+        'STALE_GRACE': 60,
+    }
+    POLL_INTERVAL = 0.05
+    BETA = 1.0
+    LOCK_STRIPES = 64
+
+    def __init__(self, **options):
+        config = {**self.DEFAULTS, **getattr(settings, 'TIERED_CACHE', {}), **options}
+        self.alias = config['ALIAS']
+        self.l1_timeout = config['L1_TIMEOUT']
+        self.lock_timeout = config['LOCK_TIMEOUT']
+        self.lock_wait = config['LOCK_WAIT']
+        self.stale_grace = config['STALE_GRACE']
+        self.l1 = LocalLRUCache(config['L1_MAX_ENTRIES'], self.l1_timeout)
+        # Locks por faixa de chave: limitados, sem um lock por chave vivo para sempre.
+        # Reentrantes: um compute() que chama get_or_set de outra chave da mesma
+        # faixa (fragmento que lê ConfigService, tema...) não trava a própria thread
+        self._locks = [threading.RLock() for _ in range(self.LOCK_STRIPES)]
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    # region Namespaces
+    def version(self, namespace):
+        key = f'ns:{namespace}'
+        version = self.l1.get(key)
+        if version is _MISSING:
+            version = self.l2.get(key)
+            if version is None:
+                self.l2.add(key, time.time_ns(), timeout=None)
+                version = self.l2.get(key, 0)
+            self.l1.set(key, version)
+        return version
+
+    def invalidate(self, namespace):
+        """Descarta todas as chaves do namespace em todos os processos"""
+        key = f'ns:{namespace}'
+        try:
+            self.l2.incr(key)
+        except ValueError:
+            self.l2.set(key, time.time_ns(), timeout=None)
+        self.l1.delete(key)
+
+    def make_key(self, namespace, key):
+        return f'{namespace}:{self.version(namespace)}:{key}'
+    # endregion
+
+    # region Leitura e escrita
+    def get(self, namespace, key, default=None):
+        full_key = self.make_key(namespace, key)
+        value = self.l1.get(full_key)
+        if value is not _MISSING:
+            return value
+        envelope = self.l2.get(full_key)
+        if envelope is None or envelope[1] <= time.time():
+            return default
+        self.l1.set(full_key, envelope[0])
+        return envelope[0]
+
+    def set(self, namespace, key, value, timeout, compute_time=0.0):
+        full_key = self.make_key(namespace, key)
+        self._store(full_key, value, timeout, compute_time)
+
+    def get_many(self, namespace, keys):
+        """{chave: valor} das chaves encontradas (uma ida ao L2 para as que faltam no L1)"""
+        prefix = f'{namespace}:{self.version(namespace)}:'
+        full_keys = {f'{prefix}{key}': key for key in keys}
+        found = {}
+        missing = []
+        for full_key, key in full_keys.items():
+            value = self.l1.get(full_key)
+            if value is _MISSING:
+                missing.append(full_key)
+            else:
+                found[key] = value
+
+        if missing:
+            now = time.time()
+            for full_key, envelope in self.l2.get_many(missing).items():
+                if envelope is not None and envelope[1] > now:
+                    self.l1.set(full_key, envelope[0], min(self.l1_timeout, envelope[1] - now))
+                    found[full_keys[full_key]] = envelope[0]
+        return found
+
+    def set_many(self, namespace, mapping, timeout):
+        if not mapping:
+            return
+        prefix = f'{namespace}:{self.version(namespace)}:'
+        expires_at = time.time() + timeout
+        envelopes = {}
+        for key, value in mapping.items():
+            full_key = f'{prefix}{key}'
+            envelopes[full_key] = (value, expires_at, 0.0)
+            self.l1.set(full_key, value, min(self.l1_timeout, timeout))
+        self.l2.set_many(envelopes, timeout + self.stale_grace)
+
+    def delete(self, namespace, key):
+        """Remove a chave (outros processos podem servir a cópia L1 por até L1_TIMEOUT)"""
+        full_key = self.make_key(namespace, key)
+        self.l1.delete(full_key)
+        self.l2.delete(full_key)
+
+    def _store(self, full_key, value, timeout, compute_time):
+        # Envelope: (valor, vencimento lógico, custo do cálculo). O L2 guarda um
+        # pouco além do vencimento para ainda servir o valor velho durante o recálculo
+        self.l2.set(full_key, (value, time.time() + timeout, compute_time), timeout + self.stale_grace)
+        self.l1.set(full_key, value, min(self.l1_timeout, timeout))
+
+    def should_recompute(self, envelope, now):
+        _, expires_at, compute_time = envelope
+        if expires_at <= now:
+            return True
+        # XFetch: a probabilidade cresce perto do vencimento e com o custo do cálculo
+        return now - compute_time * self.BETA * math.log(1.0 - random.random()) >= expires_at
+
+    def get_or_set(self, namespace, key, compute, timeout):
+        """Valor da chave; na falta (ou perto do vencimento), `compute()` com single-flight"""
+        full_key = self.make_key(namespace, key)
+        value = self.l1.get(full_key)
+        if value is not _MISSING:
+            return value
+
+        envelope = self.l2.get(full_key)
+        if envelope is not None and not self.should_recompute(envelope, time.time()):
+            self.l1.set(full_key, envelope[0], min(self.l1_timeout, envelope[1] - time.time()))
+            return envelope[0]
+
+        stale = envelope[0] if envelope is not None else _MISSING
+        return self._recompute(full_key, compute, timeout, stale)
+
+    def _recompute(self, full_key, compute, timeout, stale):
+        lock = self._locks[zlib.crc32(full_key.encode()) % self.LOCK_STRIPES]
+        if stale is not _MISSING:
+            # Com valor velho à mão, quem não pega o lock não espera
+            if not lock.acquire(blocking=False):
+                return stale
+        elif not lock.acquire(timeout=self.lock_wait):
+            # Faixa ocupada por um cálculo lento (talvez de outra chave): não espera sem limite
+            logger.warning('Cache: lock de %s ocupado por mais de %ss; calculando sem single-flight', full_key, self.lock_wait)
+            value = self.l1.get(full_key)
+            return value if value is not _MISSING else self._compute(full_key, compute, timeout)
+        try:
+            value = self.l1.get(full_key)
+            if value is not _MISSING:
+                return value
+
+            lock_key = f'{full_key}:lock'
+            if self.l2.add(lock_key, 1, self.lock_timeout):
+                try:
+                    return self._compute(full_key, compute, timeout)
+                finally:
+                    self.l2.delete(lock_key)
+
+            # Outro processo está calculando
+            if stale is not _MISSING:
+                return stale
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(self.POLL_INTERVAL)
+                envelope = self.l2.get(full_key)
+                if envelope is not None and envelope[1] > time.time():
+                    self.l1.set(full_key, envelope[0])
+                    return envelope[0]
+            logger.warning('Cache: espera pelo cálculo de %s esgotada; calculando localmente', full_key)
+            return self._compute(full_key, compute, timeout)
+        finally:
+            lock.release()
+
+    def _compute(self, full_key, compute, timeout):
+        started = time.monotonic()
+        value = compute()
+        self._store(full_key, value, timeout, time.monotonic() - started)
+        return value
+    # endregion
+
+
+tiered_cache = TieredCache()
@@ -45,61 +45,39 @@ def system_context(request):
         'nav_settings': navbar_context(request)
     }
     
+def static_manifests(request):
+    """URL do manifesto dos modais (arquivo estático com hash quando há collectstatic)"""
+    from core.services.modal_service import ModalManifestService
+    return {'modals_manifest_url': ModalManifestService.url()}
+
 def navbar_context(request):
     """Context processor para dados da navbar disponíveis em todos os templates"""
-    from django.db.models import Count, Sum, Q
-    from django.core.cache import cache
-    cache_key = 'navbar_main_categories'
-    main_categories = cache.get(cache_key)
-    
-    if not main_categories:
-        from products.models import ProductCategory
-        main_categories = ProductCategory.objects.filter(
-            is_active=True,
-            parent__isnull=True  # Apenas categorias pai
-        ).prefetch_related(
-            'children'  # Subcategorias
-        ).annotate(
-            product_count=Count('products', filter=Q(products__is_active=True))
-        ).order_by('sort_order', 'name')[:5]  # Limitar a 5 categorias principais
-        
-        # Cache por 1 hora
-        cache.set(cache_key, main_categories, 3600)
+    from core.cache import tiered_cache
+
+    # Cache por 1 hora (invalidado quando uma categoria muda)
+    main_categories = tiered_cache.get_or_set('navbar', 'main_categories', main_categories_for_navbar, 3600)
     
     context = { 'main_categories': main_categories }
         
-    # Dados específicos para usuários autenticados
-    if request.user.is_authenticated:
-        # Contador do carrinho
-        from orders.models import CartItem
-        cart_count = CartItem.objects.filter(
-            cart__user=request.user
-        ).aggregate(
-            total_items=Sum('quantity')
-        )['total_items'] or 0
-        
-        # Contador da wishlist
-        from marketing.models import WishlistItem
-        wishlist_count = WishlistItem.objects.filter(
-            wishlist__user=request.user,
-            wishlist__is_default=True
-        ).count()
-        
-        context.update({
-            'cart_count': cart_count,
-            'wishlist_count': wishlist_count,
-        })
-    else:
-        # Para usuários não logados, usar sessão
-        session_cart_count = 0
-        if 'cart_items' in request.session:
-            session_cart_count = sum(
-                item['quantity'] for item in request.session['cart_items'].values()
-            )
-        
-        context.update({
-            'cart_count': session_cart_count,
-            'wishlist_count': 0,
-        })
+    # Contador do carrinho: cookie assinado para visitantes, cache para usuários
+    from orders.services.cart_service import CartService
+    context['cart_count'] = CartService.count(request)
+
+    # Contador da wishlist (cache, atualizado a cada escrita)
+    from marketing.services.wishlist_service import WishlistService
+    context['wishlist_count'] = WishlistService.count(request.user)
     
-    return context
\ No newline at end of file
+    return context
+
+def main_categories_for_navbar():
+    from django.db.models import Count, Q
+    from products.models import ProductCategory
+
+    return list(ProductCategory.objects.filter(
+        is_active=True,
+        parent__isnull=True  # Apenas categorias pai
+    ).prefetch_related(
+        'children'  # Subcategorias
+    ).annotate(
+        product_count=Count('products', filter=Q(products__is_active=True))
+    ).order_by('sort_order', 'name')[:5])  # Limitar a 5 categorias principais
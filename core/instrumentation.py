@@ -0,0 +1,205 @@
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar('request_metrics', default=None)
+
+# Frames destes caminhos não contam como "origem" de uma consulta
+_IGNORED_PATHS = (
+    'site-packages',
+    'dist-packages',
+    'core/instrumentation.py',
+    'middleware.py',
+    'core/cache.py',
+    'manage.py',
+)
+
+
+def current_metrics():
+    """Métricas da requisição em andamento (ou None fora de uma requisição)"""
+    return _current.get()
+
+
+def caller_location():
+    """Primeiro frame do código do projeto na pilha atual ("arquivo:linha em função")"""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and not any(path in filename for path in _IGNORED_PATHS):
+            return f'{filename[len(base_dir) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return '?'
+
+
+def dispatch_query(execute, sql, params, many, context):
+    """Wrapper fixo das conexões: repassa a consulta às métricas do contexto atual"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(connection):
+    """
+    Instala `dispatch_query` na conexão (uma vez, no início da lista para não
+    atrapalhar o push/pop de `execute_wrapper`). As métricas ficam num
+    ContextVar, que acompanha o sync_to_async: consultas de views assíncronas,
+    executadas no thread do ORM, também são contadas.
+    """
+    if dispatch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, dispatch_query)
+
+
+class RequestMetrics:
+    """
+    Contadores de uma requisição: consultas SQL (quantidade, tempo, repetidas
+    com a origem no código), cache (hits/misses) e tempos de render/total.
+    Recebe as consultas de `dispatch_query` enquanto estiver ativa.
+
+    Ativações se aninham: as métricas ativas antes desta (`parent`, ex.: um
+    `capture_metrics()` de teste em volta do client, cuja requisição ativa as
+    do PerformanceMiddleware) continuam recebendo consultas e leituras de cache.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.statements = defaultdict(int)
+        self.locations = {}
+        self._render_started = None
+        self._token = None
+        self.parent = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements[sql] += 1
+        if self.statements[sql] == 2:
+            # Só a partir da repetição: capturar a pilha em toda consulta custa caro
+            self.locations[sql] = caller_location()
+        started = time.perf_counter()
+        try:
+            if self.parent is not None:
+                return self.parent(execute, sql, params, many, context)
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+    def record_cache(self, hits=0, misses=0):
+        metrics = self
+        while metrics is not None:
+            metrics.cache_hits += hits
+            metrics.cache_misses += misses
+            metrics = metrics.parent
+
+    def activate(self):
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        return self
+
+    def deactivate(self):
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        self.parent = None
+
+    def render_started(self):
+        self._render_started = time.perf_counter()
+
+    def render_finished(self, response=None):
+        if self._render_started is not None:
+            self.render_time += time.perf_counter() - self._render_started
+            self._render_started = None
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+        return self
+
+    def duplicates(self, threshold=2):
+        """[(sql, vezes, origem)] das consultas repetidas, mais repetidas primeiro"""
+        return sorted(
+            ((sql, count, self.locations.get(sql, '?')) for sql, count in self.statements.items() if count >= threshold),
+            key=lambda item: item[1], reverse=True,
+        )
+
+    def server_timing(self):
+        """Valor do header Server-Timing (durações em ms)"""
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'render;dur={self.render_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+class MetricsRegistry:
+    """
+    Agregado por view deste processo, exposto no formato texto do Prometheus.
+    Cada worker tem o seu registro; o Prometheus soma os alvos.
+    """
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.views = defaultdict(lambda: {
+            'requests': 0, 'errors': 0, 'seconds': 0.0, 'queries': 0, 'sql_seconds': 0.0,
+            'cache_hits': 0, 'cache_misses': 0, 'duplicates': 0, 'buckets': [0] * len(self.BUCKETS),
+        })
+
+    def observe(self, view, metrics, status_code, duplicates=0):
+        with self._lock:
+            data = self.views[view]
+            data['requests'] += 1
+            data['errors'] += status_code >= 500
+            data['seconds'] += metrics.total_time
+            data['queries'] += metrics.queries
+            data['sql_seconds'] += metrics.sql_time
+            data['cache_hits'] += metrics.cache_hits
+            data['cache_misses'] += metrics.cache_misses
+            data['duplicates'] += duplicates
+            for index, bound in enumerate(self.BUCKETS):
+                if metrics.total_time <= bound:
+                    data['buckets'][index] += 1
+
+    def render(self):
+        with self._lock:
+            views = {view: dict(data, buckets=list(data['buckets'])) for view, data in self.views.items()}
+
+        counters = [
+            ('http_requests_total', 'requests', 'Requisições atendidas'),
+            ('http_server_errors_total', 'errors', 'Respostas 5xx'),
+            ('db_queries_total', 'queries', 'Consultas SQL executadas'),
+            ('db_query_seconds_total', 'sql_seconds', 'Tempo total em SQL'),
+            ('db_duplicate_queries_total', 'duplicates', 'Consultas repetidas na mesma requisição'),
+            ('cache_hits_total', 'cache_hits', 'Leituras de cache com acerto'),
+            ('cache_misses_total', 'cache_misses', 'Leituras de cache sem acerto'),
+        ]
+        lines = []
+        for name, key, description in counters:
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+            lines += [f'{name}{{view="{view}"}} {data[key]}' for view, data in sorted(views.items())]
+
+        name = 'http_request_duration_seconds'
+        lines += [f'# HELP {name} Duração das requisições', f'# TYPE {name} histogram']
+        for view, data in sorted(views.items()):
+            for bound, count in zip(self.BUCKETS, data['buckets']):
+                lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{view="{view}",le="+Inf"}} {data["requests"]}')
+            lines.append(f'{name}_sum{{view="{view}"}} {data["seconds"]:.6f}')
+            lines.append(f'{name}_count{{view="{view}"}} {data["requests"]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
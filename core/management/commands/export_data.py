@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.export_service import ExportService
+
+
+class Command(BaseCommand):
+    help = 'Exporta produtos, pedidos ou movimentações de estoque em streaming (CSV/JSONL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(ExportService.DATASETS))
+        parser.add_argument('--format', dest='fmt', choices=list(ExportService.CONTENT_TYPES), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Comprimir a saída com gzip')
+        parser.add_argument('--output', type=str, help='Arquivo de destino (padrão: saída padrão)')
+        parser.add_argument('--chunk-size', type=int, default=ExportService.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--since', type=str, help='Exportar apenas registros a partir desta data (ISO)')
+
+    def handle(self, *args, **options):
+        try:
+            stream = ExportService.stream(
+                options['dataset'],
+                fmt=options['fmt'],
+                compress=options['gzip'],
+                chunk_size=options['chunk_size'],
+                since=options['since'],
+            )
+            output = options['output']
+            if output:
+                with open(output, 'wb') as handle:
+                    written = self.write_stream(stream, handle)
+                self.stderr.write(self.style.SUCCESS(f'{written} bytes exportados para {output}'))
+            else:
+                self.write_stream(stream, sys.stdout.buffer)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def write_stream(self, stream, handle):
+        written = 0
+        for data in stream:
+            handle.write(data)
+            written += len(data)
+        handle.flush()
+        return written
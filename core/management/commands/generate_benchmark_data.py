@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.services.benchmark_service import BenchmarkDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Gera (ou remove) a massa de dados sintética BENCH usada pelos benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(BenchmarkDataGenerator.SCALES), default='small')
+        parser.add_argument('--products', type=int, help='Sobrescreve a quantidade de produtos da escala')
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--orders', type=int)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--clear', action='store_true', help='Remove a massa BENCH existente antes (ou apenas, com --clear-only)')
+        parser.add_argument('--clear-only', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['clear'] or options['clear_only']:
+            deleted = BenchmarkDataGenerator.clear()
+            self.stdout.write(', '.join(f'{key}={value}' for key, value in deleted.items()))
+            if options['clear_only']:
+                return
+
+        scale = dict(BenchmarkDataGenerator.SCALES[options['scale']])
+        for key in scale:
+            if options[key] is not None:
+                scale[key] = options[key]
+
+        generator = BenchmarkDataGenerator(seed=options['seed'], batch_size=options['batch_size'], stdout=self.stdout, **scale)
+        counts = generator.generate()
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{key}={value}' for key, value in counts.items())))
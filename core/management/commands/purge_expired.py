@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.retention_service import RetentionService
+
+
+class Command(BaseCommand):
+    help = 'Apaga em lotes os dados expirados (carrinhos, verificações, tentativas de login, eventos, vistos recentemente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('policies', nargs='*', help=f"Políticas a aplicar (padrão: todas). Opções: {', '.join(RetentionService.POLICIES)}")
+        parser.add_argument('--batch-size', type=int, default=RetentionService.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=RetentionService.DEFAULT_SLEEP, help='Pausa em segundos entre lotes')
+        parser.add_argument('--max-batches', type=int, help='Limite de lotes por política nesta execução')
+        parser.add_argument('--archive-dir', type=str, help='Diretório dos arquivos JSONL gzip')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta o que seria apagado')
+
+    def handle(self, *args, **options):
+        service = RetentionService(
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            archive_dir=options['archive_dir'],
+            dry_run=options['dry_run'],
+            max_batches=options['max_batches'],
+        )
+        try:
+            results = service.run(options['policies'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for stats in results:
+            if options['dry_run']:
+                self.stdout.write(f"{stats['policy']}: {stats['deleted']} a apagar, corte {stats['cutoff']:%Y-%m-%d %H:%M}")
+                continue
+            line = f"{stats['policy']}: {stats['deleted']} apagados em {stats['batches']} lotes ({stats['seconds']}s), corte {stats['cutoff']:%Y-%m-%d %H:%M}"
+            if stats['archive']:
+                line += f", {stats['archived']} arquivados em {stats['archive']}"
+            self.stdout.write(self.style.SUCCESS(line))
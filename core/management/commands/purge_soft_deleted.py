@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.retention_service import RetentionService, SoftDeletedRetention
+
+
+class Command(BaseCommand):
+    help = 'Apaga de fato os registros com soft delete antigo (deleted_at anterior ao corte)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models', nargs='+', required=True,
+            help='Modelos no formato app.Modelo (registros com dependentes CASCADE vivos são mantidos)',
+        )
+        parser.add_argument('--days', type=int, default=SoftDeletedRetention.days, help='Idade mínima do soft delete em dias')
+        parser.add_argument('--archive', action='store_true', help='Arquiva em JSONL gzip antes de apagar')
+        parser.add_argument('--archive-dir', type=str, help='Diretório dos arquivos JSONL gzip')
+        parser.add_argument('--batch-size', type=int, default=RetentionService.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=RetentionService.DEFAULT_SLEEP, help='Pausa em segundos entre lotes')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta o que seria apagado')
+
+    def handle(self, *args, **options):
+        service = RetentionService(
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            archive_dir=options['archive_dir'],
+            dry_run=options['dry_run'],
+        )
+        try:
+            results = service.run_soft_deleted(options['models'], days=options['days'], archive=options['archive'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for stats in results:
+            if not stats['deleted'] and not stats['skipped']:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"{stats['policy']}: {stats['deleted']} a apagar")
+                continue
+            line = f"{stats['policy']}: {stats['deleted']} apagados em {stats['batches']} lotes ({stats['seconds']}s)"
+            if stats['skipped']:
+                line += f", {stats['skipped']} ainda referenciados ou com dependentes vivos"
+            if stats['archive']:
+                line += f", {stats['archived']} arquivados em {stats['archive']}"
+            self.stdout.write(self.style.SUCCESS(line))
+        self.stdout.write(f"Corte: {options['days']} dias")
@@ -0,0 +1,76 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.benchmark_service import SCENARIOS, BenchmarkRunner, compare_results, load_results
+
+
+class Command(BaseCommand):
+    help = 'Mede os caminhos críticos (vitrine, busca, carrinho, login) e compara com uma execução base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help=f"Cenários (padrão: todos). Opções: {', '.join(s.name for s in SCENARIOS)}")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--base-url', type=str, help='Mede um servidor em execução (ex.: http://127.0.0.1:8000) em vez do test client')
+        parser.add_argument('--concurrency', type=int, default=1, help='Threads simultâneas no modo --base-url')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', type=str, help='Grava o resultado em JSON')
+        parser.add_argument('--baseline', type=str, help='JSON de uma execução anterior para comparação')
+        parser.add_argument('--tolerance', type=float, default=0.10, help='Variação relativa aceita no p95/throughput (padrão: 10%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Sai com código 1 se houver regressão')
+
+    def handle(self, *args, **options):
+        unknown = set(options['scenarios']) - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            raise CommandError(f"Cenário desconhecido: {', '.join(sorted(unknown))}")
+
+        runner = BenchmarkRunner(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            base_url=options['base_url'],
+            concurrency=options['concurrency'],
+            seed=options['seed'],
+            scenarios=options['scenarios'],
+        )
+        results = runner.run()
+        self.print_results(results)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultado gravado em {options['output']}")
+
+        if options['baseline']:
+            rows = compare_results(load_results(options['baseline']), results, options['tolerance'])
+            regressions = self.print_comparison(rows)
+            if regressions and options['fail_on_regression']:
+                sys.exit(1)
+
+    def print_results(self, results):
+        meta = results['meta']
+        self.stdout.write(f"{meta['mode']} @ {meta['revision'] or '?'} — {meta['products']} produtos, {meta['iterations']} iterações")
+        self.stdout.write(f"{'cenário':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'queries':>9}{'erros':>7}")
+        for name, stats in results['scenarios'].items():
+            if stats.get('skipped'):
+                self.stdout.write(f'{name:<24}{"(pulado: URL inexistente)":>40}')
+                continue
+            queries = '-' if stats['queries_mean'] is None else stats['queries_mean']
+            self.stdout.write(
+                f"{name:<24}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                f"{stats['throughput_rps']:>9}{queries:>9}{stats['errors']:>7}"
+            )
+
+    def print_comparison(self, rows):
+        regressions = 0
+        self.stdout.write('\nComparação com a base:')
+        for name, metric, old, new, change, regressed in rows:
+            line = f'{name:<24}{metric:<16}{old:>10} -> {new:<10}{change:+.1f}%'
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line + '  REGRESSÃO'))
+            else:
+                self.stdout.write(line)
+        self.stdout.write(f'{regressions} regressões')
+        return regressions
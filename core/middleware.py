@@ -0,0 +1,151 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core.instrumentation import RequestMetrics, current_metrics, registry
+from models.routers import is_pinned, replica_aliases, reset_pinning, restore_pinning
+
+logger = logging.getLogger(__name__)
+
+
+class HybridMiddleware:
+    """
+    Base dos middlewares do projeto: funcionam nos dois modos sem adaptação.
+    No ASGI a cadeia até as views assíncronas continua no event loop (o
+    Django não precisa pular para um thread em cada middleware); no WSGI,
+    tudo síncrono. Subclasses implementam `process(request)` e
+    `aprocess(request)` chamando `get_response` de cada modo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.aprocess(request)
+        return self.process(request)
+
+    def process(self, request):
+        raise NotImplementedError
+
+    async def aprocess(self, request):
+        raise NotImplementedError
+
+
+class PerformanceMiddleware(HybridMiddleware):
+    """
+    Instrumenta cada requisição: consultas SQL (quantidade, tempo e repetidas),
+    cache e tempo de render/total. Os números vão para o registro do processo
+    (endpoint de métricas), para o header Server-Timing quando habilitado e
+    para o log quando a view estoura o orçamento de consultas ou repete a
+    mesma consulta (N+1).
+
+    Configuração:
+        PERFORMANCE_SERVER_TIMING: envia o header (padrão: DEBUG)
+        PERFORMANCE_DUPLICATE_THRESHOLD: repetições para alertar (padrão: 3)
+        QUERY_BUDGETS: {'app:view': máximo de consultas}
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.server_timing = getattr(settings, 'PERFORMANCE_SERVER_TIMING', settings.DEBUG)
+        self.duplicate_threshold = getattr(settings, 'PERFORMANCE_DUPLICATE_THRESHOLD', 3)
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+
+    def process(self, request):
+        # As consultas chegam pelo wrapper fixo das conexões (core.instrumentation.dispatch_query)
+        metrics = RequestMetrics().activate()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate()
+
+        metrics.finish()
+        self.report(request, response, metrics)
+        return response
+
+    async def aprocess(self, request):
+        metrics = RequestMetrics().activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate()
+
+        metrics.finish()
+        self.report(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.render_started()
+            response.add_post_render_callback(metrics.render_finished)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match._func_path
+
+    def report(self, request, response, metrics):
+        view = self.view_name(request)
+        duplicates = metrics.duplicates(self.duplicate_threshold)
+        registry.observe(view, metrics, response.status_code, len(duplicates))
+
+        for sql, count, location in duplicates:
+            logger.warning('Consulta repetida %dx em %s (%s): %s', count, view, location, sql[:300])
+
+        budget = self.budgets.get(view)
+        if budget is not None and metrics.queries > budget:
+            logger.warning('%s fez %d consultas (orçamento: %d)', view, metrics.queries, budget)
+
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing()
+
+
+class ReplicaPinningMiddleware(HybridMiddleware):
+    """
+    Read-your-writes entre requisições: se a requisição gravou algo, um cookie
+    curto (REPLICA_PIN_SECONDS) mantém as próximas leituras desse cliente no
+    primário enquanto as réplicas alcançam. Sem réplicas, não faz nada.
+    """
+    COOKIE_NAME = 'db_pin'
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = bool(replica_aliases())
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+    def process(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        token = reset_pinning(self.COOKIE_NAME in request.COOKIES)
+        try:
+            return self.pin_response(self.get_response(request))
+        finally:
+            restore_pinning(token)
+
+    async def aprocess(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        # O sync_to_async devolve ao contexto as alterações feitas no thread do ORM
+        token = reset_pinning(self.COOKIE_NAME in request.COOKIES)
+        try:
+            return self.pin_response(await self.get_response(request))
+        finally:
+            restore_pinning(token)
+
+    def pin_response(self, response):
+        if is_pinned():
+            response.set_cookie(self.COOKIE_NAME, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,56 @@
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador para tabelas grandes (pedidos, movimentações de estoque):
+    o total vem da estimativa do planejador do Postgres (`EXPLAIN`) em vez de
+    um `COUNT(*)`, que percorre a tabela inteira a cada página do admin.
+
+    Abaixo de ADMIN_EXACT_COUNT_THRESHOLD linhas estimadas o COUNT é barato e
+    a contagem exata é usada; em outros bancos (ou se o EXPLAIN falhar), também.
+    """
+
+    @staticmethod
+    def threshold():
+        return getattr(settings, 'ADMIN_EXACT_COUNT_THRESHOLD', 10000)
+
+    def estimate(self):
+        """Linhas estimadas pelo planejador, ou None quando não há como estimar"""
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        try:
+            sql, params = query.get_compiler(using=self.object_list.db).as_sql()
+        except EmptyResultSet:
+            return 0
+        try:
+            # savepoint: um EXPLAIN com erro não aborta a transação da requisição
+            with transaction.atomic(using=self.object_list.db), connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+        except DatabaseError:
+            logger.warning('Estimativa de contagem indisponível para %s', self.object_list.model, exc_info=True)
+            return None
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is None or estimate < self.threshold():
+            return super().count
+        return estimate
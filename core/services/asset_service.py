@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+try:
+    import rcssmin
+except ImportError:  # minificação simplificada abaixo
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+_CSS_IMPORT = re.compile(r'''@import\s+(?:url\()?\s*['"]?([^'")\s;]+)['"]?\s*\)?\s*;''')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_JS_LINE_COMMENT = re.compile(r'^\s*//.*$', re.M)
+
+
+class AssetBundleService:
+    """
+    Bundles de CSS/JS por grupo de página (`ASSET_BUNDLES`), gerados no
+    collectstatic (core.storage.StaticFilesStorage) e depois versionados e
+    comprimidos (gzip/Brotli) pelo WhiteNoise como qualquer estático.
+
+    - CSS: os @import locais são embutidos (uma requisição por grupo);
+    - JS: arquivos concatenados na ordem do grupo; com `i18n`, um bundle por
+      idioma de static/i18n, com o dicionário embutido
+      (window.I18N_PRELOADED), sem o fetch do JSON no carregamento.
+
+    Usa rcssmin/rjsmin quando instalados; senão, uma minificação conservadora.
+    """
+
+    # region Configuração
+    @staticmethod
+    def groups():
+        return getattr(settings, 'ASSET_BUNDLES', {})
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, 'ASSET_BUNDLES_ENABLED', not settings.DEBUG)
+
+    @staticmethod
+    def i18n_path():
+        return os.path.join(settings.BASE_DIR, 'static', 'i18n')
+
+    @classmethod
+    def languages(cls):
+        path = cls.i18n_path()
+        if not os.path.isdir(path):
+            return []
+        return sorted(name[:-5] for name in os.listdir(path) if name.endswith('.json'))
+
+    @classmethod
+    def output_name(cls, group, lang=None):
+        """Nome do bundle no STATIC_ROOT (`js/core.bundle.pt-BR.js`)"""
+        output = cls.groups()[group]['output']
+        if lang and cls.groups()[group].get('i18n'):
+            base, extension = os.path.splitext(output)
+            return f'{base}.{lang}{extension}'
+        return output
+    # endregion
+
+    # region Montagem
+    @staticmethod
+    def read(name):
+        path = finders.find(name)
+        if path is None:
+            raise FileNotFoundError(f'Arquivo estático não encontrado para o bundle: {name}')
+        with open(path, encoding='utf-8') as file:
+            return file.read()
+
+    @classmethod
+    def inline_css(cls, name, seen=None):
+        """Conteúdo do CSS com os @import locais embutidos (recursivo, cada arquivo uma vez)"""
+        seen = set() if seen is None else seen
+        if name in seen:
+            return ''
+        seen.add(name)
+
+        def replace(match):
+            target = match.group(1)
+            if '://' in target or target.startswith('//'):
+                return match.group(0)
+            imported = os.path.normpath(os.path.join(os.path.dirname(name), target)).replace(os.sep, '/')
+            return cls.inline_css(imported, seen)
+
+        return _CSS_IMPORT.sub(replace, cls.read(name))
+
+    @staticmethod
+    def minify_css(content):
+        if rcssmin is not None:
+            return rcssmin.cssmin(content)
+        content = _CSS_COMMENT.sub('', content)
+        content = re.sub(r'\s+', ' ', content)
+        return re.sub(r'\s*([{};])\s*', r'\1', content).strip()
+
+    @staticmethod
+    def minify_js(content):
+        if rjsmin is not None:
+            return rjsmin.jsmin(content)
+        # Só o que é seguro sem um parser: comentários de linha inteira,
+        # indentação e linhas vazias
+        content = _JS_LINE_COMMENT.sub('', content)
+        return '\n'.join(line.strip() for line in content.splitlines() if line.strip())
+
+    @classmethod
+    def build_css(cls, files):
+        return cls.minify_css('\n'.join(cls.inline_css(name) for name in files))
+
+    @classmethod
+    def build_js(cls, files, lang=None):
+        prelude = ['window.ASSET_BUNDLE = true;']
+        if lang:
+            with open(os.path.join(cls.i18n_path(), f'{lang}.json'), encoding='utf-8') as file:
+                dictionary = json.load(file)
+            prelude.append(f'window.I18N_PRELOADED = {json.dumps({lang: dictionary}, ensure_ascii=False)};')
+        # `;` entre arquivos: um arquivo terminado em `})()` não pode colar no próximo
+        return '\n'.join(prelude) + '\n' + ';\n'.join(cls.minify_js(cls.read(name)) for name in files) + ';\n'
+
+    @classmethod
+    def build(cls):
+        """[(nome, conteúdo)] de todos os bundles"""
+        bundles = []
+        for group, config in cls.groups().items():
+            if config['output'].endswith('.css'):
+                bundles.append((cls.output_name(group), cls.build_css(config['files'])))
+            elif config.get('i18n'):
+                bundles += [(cls.output_name(group, lang), cls.build_js(config['files'], lang)) for lang in cls.languages()]
+            else:
+                bundles.append((cls.output_name(group), cls.build_js(config['files'])))
+        return bundles
+    # endregion
@@ -0,0 +1,507 @@
+import itertools
+import json
+import logging
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from http.cookiejar import Cookie, CookieJar
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'BENCH'
+PASSWORD = 'bench-password'
+WORDS = [
+    'camiseta', 'tenis', 'mochila', 'relogio', 'fone', 'jaqueta', 'bermuda', 'bone', 'meia', 'garrafa',
+    'notebook', 'mouse', 'teclado', 'monitor', 'cadeira', 'mesa', 'luminaria', 'caneca', 'livro', 'bolsa',
+]
+COLORS = ['preto', 'branco', 'azul', 'verde', 'vermelho', 'cinza']
+SIZES = ['P', 'M', 'G', 'GG']
+
+
+def percentile(values, pct):
+    """Percentil por posição mais próxima (valores já ordenados)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class BenchmarkDataGenerator:
+    """
+    Massa de dados sintética e reprodutível (mesma semente, mesmos dados):
+    árvore de categorias, marcas, produtos com variantes, imagens, avaliações,
+    estoque em vários depósitos, usuários e pedidos. Tudo com o prefixo BENCH
+    para poder ser removido com `clear()`. Inserções com bulk_create em lotes.
+    """
+    SCALES = {
+        'small': {'products': 1000, 'users': 200, 'orders': 500},
+        'medium': {'products': 10000, 'users': 2000, 'orders': 5000},
+        'large': {'products': 100000, 'users': 20000, 'orders': 50000},
+    }
+    ROOT_CATEGORIES = 10
+    CHILD_CATEGORIES = 5
+    BRANDS = 50
+    WAREHOUSES = 3
+
+    def __init__(self, products=1000, users=200, orders=500, seed=42, batch_size=2000, stdout=None):
+        self.products = products
+        self.users = users
+        self.orders = orders
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.counts = {}
+
+    def log(self, message):
+        logger.info(message)
+        if self.stdout:
+            self.stdout.write(message)
+
+    # region Limpeza
+    @classmethod
+    def clear(cls):
+        """Remove a massa BENCH (pedidos antes dos produtos, por causa do PROTECT)"""
+        from inventory.models import InventoryItem, Warehouse
+        from orders.models import Order
+        from products.models import Product, ProductBrand, ProductCategory
+        from suppliers.models import Supplier
+        from users.models import User
+
+        deleted = {}
+        with transaction.atomic():
+            deleted['orders'] = Order._base_manager.filter(order_number__startswith=PREFIX).delete()[0]
+            deleted['inventory'] = InventoryItem._base_manager.filter(warehouse__code__startswith=PREFIX).delete()[0]
+            deleted['products'] = Product._base_manager.filter(sku__startswith=PREFIX).delete()[0]
+            deleted['categories'] = ProductCategory._base_manager.filter(slug__startswith=PREFIX.lower()).delete()[0]
+            deleted['brands'] = ProductBrand._base_manager.filter(slug__startswith=PREFIX.lower()).delete()[0]
+            deleted['warehouses'] = Warehouse._base_manager.filter(code__startswith=PREFIX).delete()[0]
+            deleted['suppliers'] = Supplier._base_manager.filter(company_name__startswith=PREFIX).delete()[0]
+            deleted['users'] = User.objects.filter(username__startswith=PREFIX.lower()).delete()[0]
+        return deleted
+    # endregion
+
+    # region Geração
+    def bulk(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model._meta.model_name] = self.counts.get(model._meta.model_name, 0) + len(objects)
+
+    def generate(self):
+        started = time.monotonic()
+        self.create_catalog()
+        self.create_products()
+        self.create_users()
+        self.create_reviews_and_orders()
+        self.counts['seconds'] = round(time.monotonic() - started, 1)
+        return self.counts
+
+    def create_catalog(self):
+        from inventory.models import Warehouse
+        from products.models import ProductBrand, ProductCategory
+        from suppliers.models import Supplier
+
+        slug = PREFIX.lower()
+        self.bulk(ProductCategory, [
+            ProductCategory(name=f'{PREFIX} {WORDS[i].title()}', slug=f'{slug}-cat-{i}', sort_order=i)
+            for i in range(self.ROOT_CATEGORIES)
+        ])
+        roots = list(ProductCategory.objects.filter(slug__startswith=f'{slug}-cat-').order_by('id'))
+        self.bulk(ProductCategory, [
+            ProductCategory(parent=root, name=f'{root.name} {j}', slug=f'{root.slug}-{j}', sort_order=j)
+            for root in roots for j in range(self.CHILD_CATEGORIES)
+        ])
+        self.category_ids = list(ProductCategory.objects.filter(
+            slug__startswith=f'{slug}-cat-', parent__isnull=False,
+        ).values_list('id', flat=True))
+
+        self.bulk(ProductBrand, [ProductBrand(name=f'{PREFIX} Marca {i}', slug=f'{slug}-brand-{i}') for i in range(self.BRANDS)])
+        self.brand_ids = list(ProductBrand.objects.filter(slug__startswith=f'{slug}-brand-').values_list('id', flat=True))
+
+        supplier = Supplier.objects.create(company_name=f'{PREFIX} Fornecedor')
+        self.supplier_id = supplier.id
+
+        self.bulk(Warehouse, [
+            Warehouse(code=f'{PREFIX}-W{i}', name=f'{PREFIX} Depósito {i}', postal_code=f'0{i}000-000')
+            for i in range(self.WAREHOUSES)
+        ])
+        self.warehouse_ids = list(Warehouse.objects.filter(code__startswith=PREFIX).values_list('id', flat=True))
+        self.log(f'Catálogo: {len(self.category_ids)} subcategorias, {len(self.brand_ids)} marcas, {len(self.warehouse_ids)} depósitos')
+
+    def create_products(self):
+        from inventory.models import InventoryItem
+        from products.models import Product, ProductImage, ProductVariant
+
+        rnd = self.random
+        for start in range(0, self.products, self.batch_size):
+            end = min(start + self.batch_size, self.products)
+            products = []
+            for i in range(start, end):
+                word = rnd.choice(WORDS)
+                price = Decimal(rnd.randint(1000, 50000)) / 100
+                products.append(Product(
+                    sku=f'{PREFIX}-{i:07d}',
+                    slug=f'{PREFIX.lower()}-{word}-{i}',
+                    name=f'{word.title()} {rnd.choice(COLORS)} {i}',
+                    short_description=f'{word} {rnd.choice(COLORS)} para o dia a dia',
+                    price=price,
+                    compare_at_price=price * Decimal('1.2') if rnd.random() < 0.2 else None,
+                    category_id=rnd.choice(self.category_ids),
+                    brand_id=rnd.choice(self.brand_ids),
+                    supplier_id=self.supplier_id,
+                    is_featured=rnd.random() < 0.02,
+                    weight=Decimal(rnd.randint(100, 5000)) / 1000,
+                ))
+            self.bulk(Product, products)
+
+            created = list(Product.objects.filter(sku__gte=f'{PREFIX}-{start:07d}', sku__lt=f'{PREFIX}-{end:07d}').order_by('id').values_list('id', 'sku'))
+            variants, images, inventory = [], [], []
+            for product_id, sku in created:
+                if rnd.random() < 0.3:
+                    for size in SIZES[:3]:
+                        variants.append(ProductVariant(product_id=product_id, sku=f'{sku}-{size}', attributes={'size': size}))
+                for order in range(rnd.randint(1, 3)):
+                    images.append(ProductImage(product_id=product_id, image='products/bench.jpg', sort_order=order, is_primary=order == 0))
+                for warehouse_id in self.warehouse_ids:
+                    inventory.append(InventoryItem(
+                        warehouse_id=warehouse_id, product_id=product_id,
+                        quantity_available=rnd.randint(0, 100), reorder_point=10, reorder_quantity=50,
+                    ))
+            self.bulk(ProductVariant, variants)
+            self.bulk(ProductImage, images)
+            self.bulk(InventoryItem, inventory)
+            self.log(f'Produtos: {end}/{self.products}')
+
+    def create_users(self):
+        from django.contrib.auth.hashers import make_password
+        from users.models import User
+
+        password = make_password(PASSWORD)
+        slug = PREFIX.lower()
+        # Como no cadastro: username = e-mail (o login autentica pelo e-mail)
+        self.bulk(User, [
+            User(username=f'{slug}{i}@example.com', email=f'{slug}{i}@example.com', password=password, first_name=f'Cliente {i}')
+            for i in range(self.users)
+        ])
+        self.user_ids = list(User.objects.filter(username__startswith=slug).values_list('id', flat=True))
+        self.log(f'Usuários: {len(self.user_ids)}')
+
+    def create_reviews_and_orders(self):
+        from orders.models import Order, OrderItem
+        from products.models import Product, ProductReview
+
+        rnd = self.random
+        products = list(Product.objects.filter(sku__startswith=PREFIX).values_list('id', 'sku', 'name', 'price'))
+        reviewed = rnd.sample(products, min(len(products), len(products) // 3))
+        self.bulk(ProductReview, [
+            ProductReview(product_id=product[0], user_id=rnd.choice(self.user_ids), rating=rnd.randint(1, 5), title='Avaliação', is_approved=True)
+            for product in reviewed
+        ])
+
+        address = {'postal_code': '01310-100', 'city': 'São Paulo', 'state': 'SP'}
+        statuses = ['pending', 'confirmed', 'processing', 'shipped', 'delivered']
+        for start in range(0, self.orders, self.batch_size):
+            end = min(start + self.batch_size, self.orders)
+            orders, lines = [], {}
+            for i in range(start, end):
+                number = f'{PREFIX}-{i:08d}'
+                lines[number] = rnd.sample(products, rnd.randint(1, 4))
+                subtotal = sum(product[3] for product in lines[number])
+                orders.append(Order(
+                    order_number=number, user_id=rnd.choice(self.user_ids), status=rnd.choice(statuses),
+                    billing_address=address, shipping_address=address, subtotal=subtotal, total_amount=subtotal,
+                ))
+            self.bulk(Order, orders)
+
+            order_ids = dict(Order.objects.filter(order_number__in=lines).values_list('order_number', 'id'))
+            self.bulk(OrderItem, [
+                OrderItem(
+                    order_id=order_ids[number], product_id=product_id, product_sku=sku, product_name=name,
+                    quantity=1, unit_price=price, total_price=price,
+                )
+                for number, items in lines.items() for product_id, sku, name, price in items
+            ])
+            self.log(f'Pedidos: {end}/{self.orders}')
+    # endregion
+
+
+class Scenario:
+    """
+    Um caminho medido: URL (nome do urlpattern) e, opcionalmente, dados de
+    POST/consulta gerados a cada iteração. Cenários cuja URL não existe
+    nesta árvore (ex.: checkout ainda comentado) são marcados como pulados.
+    """
+
+    def __init__(self, name, url_name, method='get', kwargs=None, params=None, login=False, ajax=False):
+        self.name = name
+        self.url_name = url_name
+        self.method = method
+        self.kwargs = kwargs
+        self.params = params
+        self.login = login
+        self.ajax = ajax
+
+    def url(self, context):
+        kwargs = self.kwargs(context) if callable(self.kwargs) else self.kwargs
+        return reverse(self.url_name, kwargs=kwargs)
+
+    def data(self, context):
+        return self.params(context) if callable(self.params) else (self.params or {})
+
+
+def _category_slug(context):
+    return {'slug': context['random'].choice(context['category_slugs'])}
+
+
+def _product_slug(context):
+    return {'slug': context['random'].choice(context['product_slugs'])}
+
+
+def _search(context):
+    return {'q': context['random'].choice(WORDS)}
+
+
+def _suggestion(context):
+    return {'q': context['random'].choice(WORDS)[:3]}
+
+
+def _filters(context):
+    rnd = context['random']
+    return {'category': rnd.choice(context['category_ids']), 'price_max': rnd.choice([100, 200, 300]), 'ordering': 'price'}
+
+
+def _add_to_cart(context):
+    return {'product_id': context['random'].choice(context['product_ids']), 'quantity': 1}
+
+
+def _login(context):
+    return {'username': context['user_email'], 'password': PASSWORD}
+
+
+SCENARIOS = [
+    Scenario('home', 'core:home'),
+    Scenario('category', 'products:category', kwargs=_category_slug),
+    Scenario('category_filtered_api', 'product-list', params=_filters),
+    Scenario('product_detail', 'products:detail', kwargs=_product_slug),
+    Scenario('search', 'products:search', params=_search),
+    Scenario('suggestions', 'core:search_suggestions', params=_suggestion),
+    Scenario('add_to_cart', 'orders:add_to_cart', method='post', params=_add_to_cart),
+    Scenario('cart_count', 'orders:cart_count', login=True),
+    Scenario('checkout', 'orders:checkout', login=True),
+    Scenario('login', 'auth:login', method='post', params=_login, ajax=True),
+]
+
+
+class BenchmarkRunner:
+    """
+    Executa os cenários e mede latência (p50/p95/p99), throughput, erros e
+    consultas por requisição. Modo `client` usa o test client do Django
+    (consultas contadas diretamente); com `base_url`, mede um servidor local
+    via HTTP com `concurrency` threads (consultas lidas do Server-Timing).
+    """
+    SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+    def __init__(self, iterations=50, warmup=5, base_url=None, concurrency=1, seed=42, scenarios=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.concurrency = max(1, concurrency)
+        self.seed = seed
+        self.scenarios = [scenario for scenario in SCENARIOS if not scenarios or scenario.name in scenarios]
+
+    def build_context(self):
+        from products.models import Product, ProductCategory
+        from users.models import User
+
+        products = Product.objects.filter(is_active=True).order_by('id')
+        user = User.objects.filter(username__startswith=PREFIX.lower()).order_by('id').first() or User.objects.filter(is_active=True).order_by('id').first()
+        return {
+            'random': random.Random(self.seed),
+            'product_ids': list(products.values_list('id', flat=True)[:5000]),
+            'product_slugs': list(products.values_list('slug', flat=True)[:5000]),
+            'category_ids': list(ProductCategory.objects.filter(is_active=True).values_list('id', flat=True)),
+            'category_slugs': list(ProductCategory.objects.filter(is_active=True).values_list('slug', flat=True)),
+            'user': user,
+            'user_email': user.email if user else '',
+        }
+
+    # region Clientes
+    def client_request(self, scenario, context, state):
+        from django.test import Client
+        from core.testing import capture_metrics
+
+        key = 'client_login' if scenario.login else 'client'
+        if key not in state:
+            state[key] = Client(raise_request_exception=False)
+            if scenario.login and context['user']:
+                state[key].force_login(context['user'])
+        client = state[key]
+
+        url = scenario.url(context)
+        headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'} if scenario.ajax else {}
+        with capture_metrics() as metrics:
+            started = time.perf_counter()
+            response = getattr(client, scenario.method)(url, scenario.data(context), **headers)
+            elapsed = time.perf_counter() - started
+        if scenario.name == 'login':
+            client.logout()
+        return elapsed, response.status_code, metrics.queries
+
+    def http_request(self, scenario, context, state):
+        opener = state.get('opener')
+        if opener is None:
+            state['jar'] = CookieJar()
+            opener = state['opener'] = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(state['jar']))
+            # Segredo de CSRF gerado aqui (o Django só compara cookie e header)
+            state['csrf'] = get_random_string(32)
+            host = urllib.parse.urlsplit(self.base_url).hostname
+            state['jar'].set_cookie(Cookie(
+                0, settings.CSRF_COOKIE_NAME, state['csrf'], None, False, host, False, False, '/', True,
+                False, None, False, None, None, {},
+            ))
+
+        url = self.base_url + scenario.url(context)
+        data = scenario.data(context)
+        headers = {'X-Requested-With': 'XMLHttpRequest'} if scenario.ajax else {}
+        body = None
+        if scenario.method == 'post':
+            # O login gira o token: vale sempre o cookie atual
+            csrf = next((cookie.value for cookie in state['jar'] if cookie.name == settings.CSRF_COOKIE_NAME), state['csrf'])
+            headers.update({'X-CSRFToken': csrf, 'Referer': self.base_url + '/'})
+            body = urllib.parse.urlencode(data).encode()
+        elif data:
+            url += '?' + urllib.parse.urlencode(data)
+
+        request = urllib.request.Request(url, data=body, headers=headers, method=scenario.method.upper())
+        started = time.perf_counter()
+        try:
+            with opener.open(request, timeout=60) as response:
+                response.read()
+                status, timing = response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as e:
+            status, timing = e.code, e.headers.get('Server-Timing', '')
+        elapsed = time.perf_counter() - started
+        match = self.SERVER_TIMING_QUERIES.search(timing or '')
+        return elapsed, status, int(match.group(1)) if match else None
+    # endregion
+
+    def run_scenario(self, scenario, context):
+        try:
+            scenario.url(context)
+        except (NoReverseMatch, IndexError):
+            return {'skipped': True}
+
+        request = self.http_request if self.base_url else self.client_request
+        concurrency = self.concurrency if self.base_url else 1
+        local = threading.local()
+        threads = itertools.count()
+
+        def call(_):
+            state = local.__dict__
+            if 'context' not in state:
+                # Cada thread com sua própria semente: sequência reprodutível
+                state['context'] = dict(context, random=random.Random(self.seed + next(threads)))
+            return request(scenario, state['context'], state)
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(call, range(self.warmup)))
+            started = time.perf_counter()
+            samples = list(executor.map(call, range(self.iterations)))
+            wall = time.perf_counter() - started
+
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        queries = [count for _, _, count in samples if count is not None]
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, status, _ in samples if status >= 400),
+            'statuses': sorted({status for _, status, _ in samples}),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0,
+            'throughput_rps': round(len(samples) / wall, 1) if wall else 0,
+            'queries_mean': round(sum(queries) / len(queries), 1) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+
+    @staticmethod
+    def git_revision():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def run(self):
+        from django.test.utils import override_settings
+        from products.models import Product
+
+        context = self.build_context()
+        results = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'revision': self.git_revision(),
+                'mode': 'http' if self.base_url else 'client',
+                'base_url': self.base_url,
+                'iterations': self.iterations,
+                'concurrency': self.concurrency if self.base_url else 1,
+                'products': Product.objects.count(),
+            },
+            'scenarios': {},
+        }
+        # No modo client nada sai da máquina: e-mails (alertas de login) ficam em
+        # memória; os 500 já entram como erro, sem o traceback a cada iteração
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', ALLOWED_HOSTS=['*']):
+                for scenario in self.scenarios:
+                    results['scenarios'][scenario.name] = self.run_scenario(scenario, context)
+                    logger.info('Benchmark %s: %s', scenario.name, results['scenarios'][scenario.name])
+        finally:
+            request_logger.setLevel(level)
+        return results
+
+
+def compare_results(baseline, current, tolerance=0.10):
+    """
+    Compara duas execuções cenário a cenário. Regressão: p95 acima da
+    tolerância relativa ou mais consultas por requisição que a base.
+    Retorna [(cenário, métrica, base, atual, variação, regrediu)].
+    """
+    rows = []
+    for name, stats in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base or stats.get('skipped') or base.get('skipped'):
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_mean'):
+            old, new = base.get(metric), stats.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            if metric == 'throughput_rps':
+                regressed = change < -tolerance
+            elif metric == 'queries_mean':
+                regressed = new > old
+            else:
+                regressed = metric == 'p95_ms' and change > tolerance
+            rows.append((name, metric, old, new, round(change * 100, 1), regressed))
+    return rows
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
@@ -1,51 +1,29 @@
 from ..models import SiteSettings
-from django.core.cache import cache
+from core.cache import tiered_cache
 
 class ConfigService:
-    _local_cache = {}
+    # L1 por processo + L2 compartilhado (core.cache.TieredCache): uma alteração
+    # chega a todos os workers em até TIERED_CACHE['L1_TIMEOUT'] segundos
+    _namespace = 'config'
     _cache_timeout = 3600  # 1 hora
 
     @classmethod
     def get(cls, chave, default=None):
-        cache_key = f'config:{chave}'
+        valor = tiered_cache.get_or_set(cls._namespace, chave, lambda: cls._load(chave), cls._cache_timeout)
+        if not valor or valor == '': valor = default
+        return valor
 
-        # Primeiro tenta no cache de memória
-        if chave in cls._local_cache:
-            return cls._local_cache[chave]
-
-        # Depois tenta no cache distribuído (ex: Redis ou Memcached)
-        valor = cache.get(cache_key)
-        if valor is not None:
-            cls._local_cache[chave] = valor
-            return valor
-
-        # Se não tiver, consulta o banco
-        try:
-            valor = SiteSettings.objects.filter(is_active=True).values_list(chave, flat=True).first()
-            if not valor or valor == '': valor = default
-            # Salva no cache de memória e no cache distribuído
-            cls._local_cache[chave] = valor
-            cache.set(cache_key, valor, timeout=cls._cache_timeout)
-            return valor
-        except SiteSettings.DoesNotExist:
-            return default
+    @classmethod
+    def _load(cls, chave):
+        """Consulta o banco (None quando não há configuração ativa)"""
+        return SiteSettings.objects.filter(is_active=True).values_list(chave, flat=True).first()
 
     @classmethod
     def reload(cls, chaves):
-        """Força recarregar uma configuração específica"""
-        for chave in chaves:
-            try:
-                valor = SiteSettings.objects.filter(is_active=True).values_list(chave, flat=True).first()
-                cls._local_cache[chave] = valor
-                cache.set(f'config:{chave}', valor, timeout=cls._cache_timeout)
-            except SiteSettings.DoesNotExist:
-                cls._local_cache.pop(chave, None)
-                cache.delete(f'config:{chave}')
+        """Força recarregar configurações (as chaves são relidas sob demanda)"""
+        cls.clear_all_cache()
 
     @classmethod
     def clear_all_cache(cls):
-        """Limpa todo cache interno e externo de configs"""
-        cls._local_cache.clear()
-        # Opcional: Limpar tudo no cache externo com prefixo
-        for chave in cache.keys('config:*'):
-            cache.delete(chave)
+        """Limpa todo cache interno e externo de configs (nova versão do namespace)"""
+        tiered_cache.invalidate(cls._namespace)
@@ -0,0 +1,272 @@
+import csv
+import json
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from models.batching import keyset_chunks
+
+
+class _Echo:
+    """Pseudo-buffer para o csv.writer devolver a linha em vez de gravá-la"""
+    def write(self, value):
+        return value
+
+
+class BaseExport:
+    """Exportação de um conjunto de dados em blocos de tamanho fixo"""
+    name = ''
+    date_field = 'created_at'
+    columns = []
+
+    def __init__(self, chunk_size=2000, since=None):
+        self.chunk_size = chunk_size
+        self.since = since
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def filtered_queryset(self):
+        queryset = self.get_queryset()
+        if self.since:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': self.since})
+        return queryset
+
+    def chunks(self):
+        """Gera listas de registros (dicts, possivelmente aninhados)"""
+        for rows in keyset_chunks(self.filtered_queryset(), self.chunk_size):
+            yield self.expand(rows)
+
+    def expand(self, rows):
+        return rows
+
+    def flatten(self, record):
+        """Converte um registro em uma ou mais linhas do CSV"""
+        yield [record.get(column) for column in self.columns]
+
+
+class ProductExport(BaseExport):
+    """Produtos com variantes e estoque consolidado"""
+    name = 'products'
+    date_field = 'updated_at'
+    product_fields = [
+        'id', 'uuid', 'sku', 'ean', 'name', 'slug', 'category__name', 'brand__name',
+        'price', 'compare_at_price', 'cost_price', 'weight', 'is_active', 'is_featured',
+        'track_inventory', 'created_at', 'updated_at',
+    ]
+    variant_fields = ['id', 'product_id', 'sku', 'ean', 'attributes', 'price', 'compare_at_price', 'is_active']
+    stock_fields = ['quantity_available', 'quantity_reserved', 'quantity_on_order']
+    columns = product_fields + ['variant_sku', 'variant_ean', 'variant_attributes', 'variant_price'] + stock_fields
+
+    def get_queryset(self):
+        from products.models import Product
+        return Product.objects.values(*self.product_fields)
+
+    def expand(self, rows):
+        from products.models import ProductVariant
+        from inventory.models import InventoryItem
+
+        ids = [row['id'] for row in rows]
+
+        variants = defaultdict(list)
+        for variant in ProductVariant.objects.filter(product_id__in=ids).values(
+            *self.variant_fields
+        ).order_by('product_id', 'id').iterator(chunk_size=self.chunk_size):
+            variants[variant['product_id']].append(variant)
+
+        stock = {}
+        totals = defaultdict(lambda: dict.fromkeys(self.stock_fields, 0))
+        for item in InventoryItem.objects.filter(product_id__in=ids).values(
+            'product_id', 'variant_id'
+        ).annotate(
+            quantity_available=Sum('quantity_available'),
+            quantity_reserved=Sum('quantity_reserved'),
+            quantity_on_order=Sum('quantity_on_order'),
+        ).order_by():
+            quantities = {field: item[field] or 0 for field in self.stock_fields}
+            stock[(item['product_id'], item['variant_id'])] = quantities
+            for field, value in quantities.items():
+                totals[item['product_id']][field] += value
+
+        for row in rows:
+            row['stock'] = totals[row['id']]
+            row['variants'] = [
+                dict(variant, stock=stock.get((row['id'], variant['id']), {}))
+                for variant in variants.get(row['id'], [])
+            ]
+            # Estoque fora das variantes listadas (linhas sem variante ou de variantes apagadas)
+            row['product_stock'] = {
+                field: row['stock'][field] - sum(variant['stock'].get(field, 0) for variant in row['variants'])
+                for field in self.stock_fields
+            }
+        return rows
+
+    def flatten(self, record):
+        base = [record.get(field) for field in self.product_fields]
+        product_row = base + ['', '', '', ''] + [record['product_stock'][field] for field in self.stock_fields]
+        if not record['variants']:
+            yield product_row
+            return
+
+        # Com variantes, a linha do produto só sai se houver estoque fora delas: a soma do CSV bate com o total
+        if any(record['product_stock'].values()):
+            yield product_row
+        for variant in record['variants']:
+            yield base + [
+                variant['sku'], variant['ean'], json.dumps(variant['attributes'], ensure_ascii=False), variant['price'],
+            ] + [variant['stock'].get(field, 0) for field in self.stock_fields]
+
+
+class OrderExport(BaseExport):
+    """Pedidos com seus itens"""
+    name = 'orders'
+    order_fields = [
+        'id', 'order_number', 'uuid', 'user__email', 'status', 'currency', 'subtotal',
+        'tax_amount', 'shipping_amount', 'discount_amount', 'total_amount',
+        'created_at', 'confirmed_at', 'shipped_at', 'delivered_at', 'cancelled_at',
+    ]
+    item_fields = ['id', 'order_id', 'product_sku', 'product_name', 'variant_attributes', 'quantity', 'unit_price', 'total_price', 'status']
+    columns = order_fields + [
+        'item_sku', 'item_name', 'item_attributes', 'item_quantity',
+        'item_unit_price', 'item_total_price', 'item_status',
+    ]
+
+    def get_queryset(self):
+        from orders.models import Order
+        return Order.objects.values(*self.order_fields)
+
+    def expand(self, rows):
+        from orders.models import OrderItem
+
+        items = defaultdict(list)
+        for item in OrderItem.objects.filter(order_id__in=[row['id'] for row in rows]).values(
+            *self.item_fields
+        ).order_by('order_id', 'id').iterator(chunk_size=self.chunk_size):
+            items[item['order_id']].append(item)
+
+        for row in rows:
+            row['items'] = items.get(row['id'], [])
+        return rows
+
+    def flatten(self, record):
+        base = [record.get(field) for field in self.order_fields]
+        if not record['items']:
+            yield base + [''] * 7
+            return
+
+        for item in record['items']:
+            yield base + [
+                item['product_sku'], item['product_name'],
+                json.dumps(item['variant_attributes'], ensure_ascii=False),
+                item['quantity'], item['unit_price'], item['total_price'], item['status'],
+            ]
+
+
+class InventoryMovementExport(BaseExport):
+    """Movimentações de estoque"""
+    name = 'movements'
+    columns = [
+        'id', 'created_at', 'movement_type', 'reference_type', 'reference_id',
+        'inventory_item__warehouse__code', 'inventory_item__product__sku', 'inventory_item__variant__sku',
+        'quantity_before', 'quantity_change', 'quantity_after', 'unit_cost', 'user__email', 'notes',
+    ]
+
+    def get_queryset(self):
+        from inventory.models import InventoryMovement
+        return InventoryMovement.objects.values(*self.columns)
+
+
+class ExportService:
+    """Exportações em streaming (CSV/JSONL, opcionalmente gzip) com memória constante"""
+    DATASETS = {
+        ProductExport.name: ProductExport,
+        OrderExport.name: OrderExport,
+        InventoryMovementExport.name: InventoryMovementExport,
+    }
+    CONTENT_TYPES = {
+        'csv': 'text/csv; charset=utf-8',
+        'jsonl': 'application/x-ndjson',
+    }
+    DEFAULT_CHUNK_SIZE = 2000
+
+    @classmethod
+    def get_export(cls, dataset, chunk_size=None, since=None):
+        if dataset not in cls.DATASETS:
+            raise ValueError(f"Exportação desconhecida: '{dataset}'. Opções: {', '.join(cls.DATASETS)}")
+        return cls.DATASETS[dataset](chunk_size or cls.DEFAULT_CHUNK_SIZE, cls.parse_since(since))
+
+    @staticmethod
+    def parse_since(value):
+        """Aceita datetime, date ou string ISO e devolve um datetime consciente do fuso"""
+        if not value:
+            return None
+        if isinstance(value, str):
+            parsed = parse_datetime(value) or parse_date(value)
+            if parsed is None:
+                raise ValueError(f"Data inválida: '{value}'")
+            value = parsed
+        if not isinstance(value, datetime) and isinstance(value, date):
+            value = datetime.combine(value, time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    @classmethod
+    def filename(cls, dataset, fmt='csv', compress=False):
+        stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+        return f"{dataset}-{stamp}.{fmt}{'.gz' if compress else ''}"
+
+    @classmethod
+    def content_type(cls, fmt='csv', compress=False):
+        return 'application/gzip' if compress else cls.CONTENT_TYPES[fmt]
+
+    @classmethod
+    def stream(cls, dataset, fmt='csv', compress=False, chunk_size=None, since=None):
+        """
+        Retorna um gerador de bytes, um bloco por chunk do banco. Dataset e
+        formato são validados antes do primeiro byte (ValueError).
+        """
+        if fmt not in cls.CONTENT_TYPES:
+            raise ValueError(f"Formato desconhecido: '{fmt}'. Opções: {', '.join(cls.CONTENT_TYPES)}")
+
+        export = cls.get_export(dataset, chunk_size, since)
+        pieces = cls._csv(export) if fmt == 'csv' else cls._jsonl(export)
+        return cls._encode(pieces, compress)
+
+    @staticmethod
+    def _encode(pieces, compress):
+        if not compress:
+            for piece in pieces:
+                yield piece.encode('utf-8')
+            return
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        for piece in pieces:
+            data = compressor.compress(piece.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    def _csv(export):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(export.columns)
+        for records in export.chunks():
+            yield ''.join(
+                writer.writerow(row)
+                for record in records
+                for row in export.flatten(record)
+            )
+
+    @staticmethod
+    def _jsonl(export):
+        for records in export.chunks():
+            yield ''.join(
+                json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+                for record in records
+            )
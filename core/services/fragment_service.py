@@ -0,0 +1,113 @@
+import logging
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from core.cache import tiered_cache
+from core.services.translation_service import TranslationService
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentCacheService:
+    """
+    HTML de fragmentos repetidos (cards de produto, menu de categorias) no
+    cache em camadas, com a chave variando pela versão do objeto e pelo que
+    muda o HTML: tema e idioma da página.
+
+    - Cards: `product-card:<id>:<updated_at>:<tema>:<idioma>:<wishlist>`.
+      Salvar o produto muda o `updated_at`, e com ele a chave; mudanças em
+      imagens, categorias e marcas chegam pelos signals de products. Uma
+      grade inteira é lida com um `get_many`; só os cards que faltam são
+      renderizados, com as imagens principais buscadas numa consulta só.
+    - Blocos de template ({% cached_fragment %}): chave por nome, tema e
+      idioma, num namespace invalidado pelos signals do conteúdo (ex.: `navbar`).
+    """
+    CARDS_NAMESPACE = 'product-cards'
+    CARD_TEMPLATE = 'components/product_card.html'
+
+    # region Configuração
+    @staticmethod
+    def timeout():
+        return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 6)
+
+    @staticmethod
+    def vary(context):
+        """(tema, idioma) da página: o que muda o HTML de um mesmo objeto"""
+        theme = context.get('active_theme') or {}
+        return str(theme.get('id', '') if isinstance(theme, dict) else ''), TranslationService.context_language(context)
+    # endregion
+
+    # region Cards de produto
+    @classmethod
+    def card_key(cls, product, vary):
+        version = product.updated_at.timestamp() if product.updated_at else ''
+        wishlisted = int(bool(getattr(product, 'is_wishlisted', False)))
+        return f'{product.pk}:{version}:{":".join(vary)}:{wishlisted}'
+
+    @staticmethod
+    def primary_images(product_ids):
+        """{id do produto: URL da imagem} numa consulta (principal, senão a primeira)"""
+        from products.models import ProductImage
+
+        images = {}
+        rows = ProductImage.objects.filter(product_id__in=product_ids).order_by(
+            'product_id', '-is_primary', 'sort_order',
+        ).only('product_id', 'image')
+        for image in rows:
+            if image.product_id not in images and image.image:
+                images[image.product_id] = image.image.url
+        return images
+
+    @classmethod
+    def card_context(cls, product, image_url):
+        discount = product.get_discount_percentage()
+        return {
+            'product': product,
+            'image_url': image_url,
+            'price': product.get_formatted_price(),
+            'compare_at_price': f'R$ {product.compare_at_price:.2f}'.replace('.', ',') if discount else '',
+            'discount': discount,
+            'wishlisted': bool(getattr(product, 'is_wishlisted', False)),
+        }
+
+    @classmethod
+    def render_cards(cls, products, context):
+        """HTML dos cards na ordem da listagem, do cache sempre que possível"""
+        products = list(products)
+        if not products:
+            return []
+
+        vary = cls.vary(context)
+        keys = [cls.card_key(product, vary) for product in products]
+        cached = tiered_cache.get_many(cls.CARDS_NAMESPACE, keys)
+
+        missing = [product for product, key in zip(products, keys) if key not in cached]
+        if missing:
+            images = cls.primary_images([product.pk for product in missing])
+            rendered = {}
+            for product in missing:
+                html = render_to_string(cls.CARD_TEMPLATE, cls.card_context(product, images.get(product.pk)))
+                rendered[cls.card_key(product, vary)] = html
+            tiered_cache.set_many(cls.CARDS_NAMESPACE, rendered, cls.timeout())
+            cached.update(rendered)
+            logger.debug('Cards de produto: %s do cache, %s renderizados', len(products) - len(missing), len(missing))
+
+        return [cached[key] for key in keys]
+
+    @classmethod
+    def reload_cards(cls):
+        """Descarta todos os cards (ex.: categoria ou marca renomeada)"""
+        tiered_cache.invalidate(cls.CARDS_NAMESPACE)
+    # endregion
+
+    # region Blocos de template
+    @classmethod
+    def block_key(cls, name, context):
+        return f'fragment:{name}:{":".join(cls.vary(context))}'
+
+    @classmethod
+    def render_block(cls, namespace, name, context, render):
+        """HTML do bloco `name` do cache, ou `render()` com single-flight"""
+        return tiered_cache.get_or_set(namespace, cls.block_key(name, context), render, cls.timeout())
+    # endregion
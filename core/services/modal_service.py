@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+
+class ModalManifestService:
+    """
+    Manifesto dos modais de static/modals:
+    [{name, views, scripts, views_url, scripts_url, hash}].
+
+    O collectstatic grava o manifesto como arquivo estático com hash
+    (core.storage.StaticFilesStorage), servido direto pelo servidor de
+    estáticos com cache longo. Sem ele (desenvolvimento), o manifesto é montado
+    uma vez por processo a partir de static/modals. Em nenhum caso as
+    requisições percorrem o disco: só leem o conteúdo em memória.
+    """
+    MANIFEST_NAME = 'modals/manifest.json'
+    _content = None
+    _version = None
+    _static_url = None
+    _lock = threading.Lock()
+
+    # region Montagem
+    @staticmethod
+    def source_path():
+        return os.path.join(settings.BASE_DIR, 'static', 'modals')
+
+    @staticmethod
+    def file_hash(*paths):
+        digest = hashlib.sha256()
+        for path in paths:
+            if path:
+                with open(path, 'rb') as file:
+                    digest.update(file.read())
+        return digest.hexdigest()[:12]
+
+    @staticmethod
+    def static_url(storage, name):
+        """URL com hash quando o collectstatic já rodou; senão, a URL simples"""
+        if not name:
+            return None
+        try:
+            return storage.url(name)
+        except ValueError:
+            return settings.STATIC_URL + name
+
+    @classmethod
+    def main_file(cls, folder_path, subfolder, base_name, extension):
+        """Arquivo principal do modal (`<nome>.<ext>`) em views/ ou scripts/"""
+        path = os.path.join(folder_path, subfolder)
+        if not os.path.isdir(path):
+            return None
+        for file_name in os.listdir(path):
+            if file_name.lower() == f'{base_name}.{extension}' and os.path.isfile(os.path.join(path, file_name)):
+                return file_name
+        return None
+
+    @classmethod
+    def scan(cls, storage=None, base_path=None):
+        storage = storage or staticfiles_storage
+        base_path = base_path or cls.source_path()
+        modals = []
+        if not os.path.isdir(base_path):
+            return modals
+
+        for folder_name in sorted(os.listdir(base_path)):
+            folder_path = os.path.join(base_path, folder_name)
+            if not os.path.isdir(folder_path):
+                continue
+
+            base_name = folder_name.lower().replace(' ', '.')
+            view_file = cls.main_file(folder_path, 'views', base_name, 'html')
+            script_file = cls.main_file(folder_path, 'scripts', base_name, 'js')
+            views = f'modals/{folder_name}/views/{view_file}' if view_file else None
+            scripts = f'modals/{folder_name}/scripts/{script_file}' if script_file else None
+
+            modals.append({
+                'name': folder_name,
+                'views': views,
+                'scripts': scripts,
+                'views_url': cls.static_url(storage, views),
+                'scripts_url': cls.static_url(storage, scripts),
+                'hash': cls.file_hash(
+                    view_file and os.path.join(folder_path, 'views', view_file),
+                    script_file and os.path.join(folder_path, 'scripts', script_file),
+                ),
+            })
+        return modals
+
+    @classmethod
+    def build(cls, storage=None):
+        """Conteúdo JSON do manifesto (estável: mesma entrada, mesmo hash)"""
+        return json.dumps(cls.scan(storage), sort_keys=True, separators=(',', ':'))
+    # endregion
+
+    # region Leitura
+    @classmethod
+    def load(cls):
+        """(conteúdo, URL estática) do arquivo gerado no collectstatic, ou montado agora"""
+        if not settings.DEBUG:
+            try:
+                name = staticfiles_storage.stored_name(cls.MANIFEST_NAME)
+                with staticfiles_storage.open(name) as file:
+                    return file.read().decode(), staticfiles_storage.url(cls.MANIFEST_NAME)
+            except (AttributeError, ValueError, OSError):
+                logger.info('Manifesto dos modais ausente no STATIC_ROOT; montando a partir de %s', cls.source_path())
+        return cls.build(), None
+
+    @classmethod
+    def get(cls):
+        """(conteúdo JSON, versão) em memória"""
+        if cls._content is None:
+            with cls._lock:
+                if cls._content is None:
+                    content, static_url = cls.load()
+                    cls._version = hashlib.sha256(content.encode()).hexdigest()[:16]
+                    cls._static_url = static_url
+                    cls._content = content
+        return cls._content, cls._version
+
+    @classmethod
+    def url(cls):
+        """Onde o front busca o manifesto: o arquivo estático com hash, se existir"""
+        cls.get()
+        return cls._static_url or reverse('core:modals')
+
+    @classmethod
+    def reload(cls):
+        with cls._lock:
+            cls._content = None
+    # endregion
@@ -0,0 +1,283 @@
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import CASCADE, Exists, OuterRef, ProtectedError, Q, RestrictedError
+from django.utils import timezone
+
+from models.batching import keyset_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy:
+    """
+    Regra de retenção de um modelo: registros com `date_field` anterior ao
+    corte (agora - `days`) são apagados. Com `archive`, cada lote é gravado
+    em JSONL gzip antes de ser removido.
+    """
+    name = ''
+    model = ''
+    date_field = 'created_at'
+    days = 0
+    archive = False
+    filters = {}
+
+    def __init__(self, days=None, archive=None):
+        if days is not None:
+            self.days = days
+        if archive is not None:
+            self.archive = archive
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def cutoff(self, now=None):
+        return (now or timezone.now()) - timedelta(days=self.days)
+
+    def get_queryset(self, now=None):
+        # _base_manager: inclui registros com soft delete
+        return self.get_model()._base_manager.filter(
+            **{f'{self.date_field}__lt': self.cutoff(now)}, **self.filters
+        )
+
+    def held(self, now=None):
+        """Registros vencidos que a política deixa de fora de propósito"""
+        return 0
+
+    def delete_dependents(self, ids):
+        """Apaga, no lote, dependentes que a cascata do ORM carregaria linha a linha"""
+
+
+class CartRetention(RetentionPolicy):
+    """
+    Carrinhos de visitantes expirados. Os itens saem antes, num DELETE só:
+    o receiver de post_delete do CartItem (contador do carrinho, que
+    visitantes não têm em cache) impediria o fast delete da cascata.
+    """
+    name = 'carts'
+    model = 'orders.Cart'
+    date_field = 'expires_at'
+    filters = {'user__isnull': True}
+
+    def delete_dependents(self, ids):
+        from orders.models import CartItem
+
+        queryset = CartItem._base_manager.filter(cart_id__in=ids)
+        queryset._raw_delete(queryset.db)
+
+
+class EmailVerificationRetention(RetentionPolicy):
+    """Códigos de verificação expirados há mais de um dia"""
+    name = 'email_verifications'
+    model = 'users.EmailVerification'
+    date_field = 'expires_at'
+    days = 1
+
+
+class LoginAttemptRetention(RetentionPolicy):
+    """Tentativas de login (o bloqueio só olha os últimos 7 dias)"""
+    name = 'login_attempts'
+    model = 'users.UserLoginAttempt'
+    date_field = 'attempted_at'
+    days = 90
+    archive = True
+
+
+class AnalyticsEventRetention(RetentionPolicy):
+    """Eventos brutos de analytics (os relatórios ficam nas tabelas agregadas)"""
+    name = 'analytics_events'
+    model = 'analytics.AnalyticsEvent'
+    days = 180
+    archive = True
+
+
+class RecentlyViewedRetention(RetentionPolicy):
+    """Histórico de produtos vistos sem acesso recente"""
+    name = 'recently_viewed'
+    model = 'marketing.RecentlyViewedProduct'
+    date_field = 'viewed_at'
+    days = 90
+
+
+class SoftDeletedRetention(RetentionPolicy):
+    """
+    Registros com soft delete há mais de `days` dias (apagados de fato).
+
+    O soft delete não se propaga: um pedido deletado continua com transações
+    e envios vivos, que o DELETE levaria junto em cascata. Registros com
+    algum dependente CASCADE vivo (sem soft delete, ou ele mesmo com
+    dependentes vivos) ficam de fora e são contados em `skipped`.
+    """
+    date_field = 'deleted_at'
+    days = 90
+    DEPENDENT_DEPTH = 3
+
+    def __init__(self, model, days=None, archive=None):
+        self.model = model
+        self.name = f'soft_deleted.{model}'
+        super().__init__(days, archive)
+
+    @classmethod
+    def models(cls):
+        """Modelos concretos com soft delete (herdam SoftDeleteMixin)"""
+        from models.base import SoftDeleteMixin
+
+        return [model for model in apps.get_models() if issubclass(model, SoftDeleteMixin)]
+
+    @classmethod
+    def live_dependents(cls, model, depth=DEPENDENT_DEPTH):
+        """Condição "tem dependente CASCADE vivo" para linhas de `model` (None se não há CASCADE)"""
+        from models.base import SoftDeleteMixin
+
+        condition = None
+        for relation in model._meta.related_objects:
+            if relation.many_to_many or relation.on_delete is not CASCADE:
+                continue
+            child = relation.related_model
+            rows = child._base_manager.filter(**{relation.field.name: OuterRef(relation.field.target_field.attname)})
+            if issubclass(child, SoftDeleteMixin):
+                live = Q(deleted_at__isnull=True)
+                nested = cls.live_dependents(child, depth - 1) if depth > 1 else None
+                rows = rows.filter(live | nested if nested is not None else live)
+            exists = Exists(rows)
+            condition = exists if condition is None else condition | exists
+        return condition
+
+    def get_queryset(self, now=None):
+        queryset = super().get_queryset(now)
+        dependents = self.live_dependents(self.get_model())
+        return queryset if dependents is None else queryset.exclude(dependents)
+
+    def held(self, now=None):
+        return RetentionPolicy.get_queryset(self, now).count() - self.get_queryset(now).count()
+
+
+class RetentionService:
+    """
+    Limpeza periódica de dados expirados.
+
+    Cada política apaga em lotes keyset (`id > último ORDER BY id LIMIT n`),
+    uma transação curta por lote e uma pausa entre lotes, para não segurar
+    locks nem gerar picos de WAL/replicação. Os padrões podem ser alterados
+    por `RETENTION_POLICIES = {'nome': {'days': .., 'archive': ..}}`.
+    """
+    POLICIES = {
+        policy.name: policy
+        for policy in (
+            CartRetention, EmailVerificationRetention, LoginAttemptRetention,
+            AnalyticsEventRetention, RecentlyViewedRetention,
+        )
+    }
+    DEFAULT_BATCH_SIZE = 1000
+    DEFAULT_SLEEP = 0.1
+
+    def __init__(self, batch_size=None, sleep=None, archive_dir=None, dry_run=False, max_batches=None):
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.sleep = self.DEFAULT_SLEEP if sleep is None else sleep
+        self.archive_dir = archive_dir or getattr(settings, 'RETENTION_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive'))
+        self.dry_run = dry_run
+        self.max_batches = max_batches
+
+    @classmethod
+    def get_policies(cls, names=None):
+        overrides = getattr(settings, 'RETENTION_POLICIES', {})
+        names = names or list(cls.POLICIES)
+        unknown = set(names) - set(cls.POLICIES)
+        if unknown:
+            raise ValueError(f"Política desconhecida: {', '.join(sorted(unknown))}. Opções: {', '.join(cls.POLICIES)}")
+        return [cls.POLICIES[name](**overrides.get(name, {})) for name in names]
+
+    def archive_path(self, policy, now):
+        return os.path.join(self.archive_dir, f"{policy.name}-{now:%Y%m%d%H%M%S}.jsonl.gz")
+
+    def delete_batch(self, policy, queryset, ids, stats):
+        """
+        Apaga um lote em uma transação curta, refiltrando pela política (um
+        registro que ganhou dependente vivo desde a leitura fica). Se algum
+        registro ainda é referenciado por FK PROTECT/RESTRICT (ex.: produto em
+        pedidos), o lote é refeito um a um e os protegidos ficam para trás.
+        """
+        label = queryset.model._meta.label
+        try:
+            with transaction.atomic():
+                policy.delete_dependents(ids)
+                return queryset.filter(id__in=ids).delete()[1].get(label, 0)
+        except (ProtectedError, RestrictedError):
+            pass
+
+        deleted = 0
+        for pk in ids:
+            try:
+                with transaction.atomic():
+                    policy.delete_dependents([pk])
+                    deleted += queryset.filter(id=pk).delete()[1].get(label, 0)
+            except (ProtectedError, RestrictedError):
+                stats['skipped'] += 1
+        return deleted
+
+    def purge(self, policy, now=None):
+        """Aplica uma política; retorna as métricas"""
+        now = now or timezone.now()
+        queryset = policy.get_queryset(now)
+        stats = {
+            'policy': policy.name, 'cutoff': policy.cutoff(now), 'deleted': 0, 'archived': 0,
+            'batches': 0, 'skipped': policy.held(now), 'archive': None,
+        }
+        started = time.monotonic()
+
+        if self.dry_run:
+            stats['deleted'] = queryset.count()
+            stats['seconds'] = round(time.monotonic() - started, 3)
+            return stats
+
+        archive = None
+        rows = queryset.values() if policy.archive else queryset.values('id')
+        try:
+            for chunk in keyset_chunks(rows, self.batch_size):
+                if policy.archive:
+                    if archive is None:
+                        os.makedirs(self.archive_dir, exist_ok=True)
+                        stats['archive'] = self.archive_path(policy, now)
+                        archive = gzip.open(stats['archive'], 'at', encoding='utf-8')
+                    archive.writelines(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in chunk)
+                    # Garante o arquivo em disco antes de apagar o lote
+                    archive.flush()
+                    stats['archived'] += len(chunk)
+
+                stats['deleted'] += self.delete_batch(policy, queryset, [row['id'] for row in chunk], stats)
+                stats['batches'] += 1
+
+                if self.max_batches and stats['batches'] >= self.max_batches:
+                    break
+                if self.sleep:
+                    time.sleep(self.sleep)
+        finally:
+            if archive is not None:
+                archive.close()
+
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        logger.info('Retenção %s: %s', policy.name, stats)
+        return stats
+
+    def run(self, names=None):
+        now = timezone.now()
+        return [self.purge(policy, now) for policy in self.get_policies(names)]
+
+    def run_soft_deleted(self, labels, days=None, archive=False):
+        """Apaga de fato o que está com soft delete há mais de `days` dias nos modelos indicados"""
+        available = {model._meta.label for model in SoftDeletedRetention.models()}
+        if not labels:
+            raise ValueError(f"Informe os modelos. Opções: {', '.join(sorted(available))}")
+        unknown = set(labels) - available
+        if unknown:
+            raise ValueError(f"Modelo sem soft delete: {', '.join(sorted(unknown))}")
+        now = timezone.now()
+        return [self.purge(SoftDeletedRetention(label, days, archive), now) for label in labels]
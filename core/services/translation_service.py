@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_PARAM = re.compile(r'\{(\d+)\}')
+
+
+class TranslationService:
+    """
+    Dicionários de static/i18n/<idioma>.json para o render no servidor
+    ({% t %} em core.templatetags.translations), com as mesmas regras do
+    translate._translate do front: chave com pontos, `{0}` para parâmetros e a
+    própria chave quando não há tradução.
+
+    Cada arquivo é lido uma vez por processo; o mtime é conferido no máximo a
+    cada `I18N_RELOAD_INTERVAL` segundos e o arquivo relido quando muda.
+    """
+    _catalogs = {}  # idioma -> (mtime, dicionário)
+    _checked = {}   # idioma -> momento da última conferência do mtime
+    _lock = threading.Lock()
+
+    # region Configuração
+    @staticmethod
+    def path():
+        return os.path.join(settings.BASE_DIR, 'static', 'i18n')
+
+    @staticmethod
+    def default_language():
+        return getattr(settings, 'I18N_DEFAULT_LANG', 'pt-BR')
+
+    @classmethod
+    def context_language(cls, context):
+        """
+        Idioma ativo do `lang_context`: Languages (`display`) ou a preferência
+        do usuário (`value`); sem nenhum, o padrão do site
+        """
+        active_lang = context.get('active_lang')
+        lang = getattr(active_lang, 'display', None) or getattr(active_lang, 'value', None)
+        return lang or cls.default_language()
+    # endregion
+
+    # region Dicionários
+    @classmethod
+    def load(cls, lang):
+        file_path = os.path.join(cls.path(), f'{lang}.json')
+        try:
+            mtime = os.stat(file_path).st_mtime
+        except OSError:
+            return None, {}
+        with open(file_path, encoding='utf-8') as file:
+            return mtime, json.load(file)
+
+    @classmethod
+    def catalog(cls, lang):
+        """Dicionário do idioma (vazio se não existir o arquivo)"""
+        now = time.monotonic()
+        cached = cls._catalogs.get(lang)
+        if cached is not None and now - cls._checked.get(lang, 0) < getattr(settings, 'I18N_RELOAD_INTERVAL', 2):
+            return cached[1]
+
+        with cls._lock:
+            cached = cls._catalogs.get(lang)
+            try:
+                mtime = os.stat(os.path.join(cls.path(), f'{lang}.json')).st_mtime
+            except OSError:
+                mtime = None
+            if cached is None or cached[0] != mtime:
+                try:
+                    cached = cls.load(lang)
+                except ValueError:
+                    # JSON inválido no meio de uma edição: segue com a versão
+                    # anterior até o arquivo mudar de novo
+                    logger.exception('Falha ao carregar static/i18n/%s.json', lang)
+                    cached = (mtime, cached[1] if cached else {})
+                cls._catalogs[lang] = cached
+            cls._checked[lang] = now
+        return cached[1]
+
+    @classmethod
+    def reload(cls):
+        with cls._lock:
+            cls._catalogs.clear()
+            cls._checked.clear()
+    # endregion
+
+    # region Tradução
+    @classmethod
+    def translate(cls, key, lang=None, params=()):
+        key = str(key or '')
+        text = cls.catalog(lang or cls.default_language())
+        for part in key.split('.'):
+            text = text.get(part) if isinstance(text, dict) else None
+            if text is None:
+                break
+        result = text if isinstance(text, str) and text != '' else key
+
+        def replace(match):
+            index = int(match.group(1))
+            return str(params[index]) if index < len(params) else match.group(0)
+
+        return _PARAM.sub(replace, result) if params else result
+    # endregion
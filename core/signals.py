@@ -1,3 +1,4 @@
+from django.db.backends.signals import connection_created
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import SiteSettings
@@ -11,3 +12,14 @@ def config_updated(sender, instance, **kwargs):
 @receiver(post_delete, sender=SiteSettings)
 def config_deleted(sender, instance, **kwargs):
     ConfigService.reload(SITE_SETTINGS_KEYS)
+
+@receiver(post_save, sender='products.ProductCategory')
+@receiver(post_delete, sender='products.ProductCategory')
+def navbar_categories_changed(sender, instance, **kwargs):
+    from core.cache import tiered_cache
+    tiered_cache.invalidate('navbar')
+
+@receiver(connection_created)
+def instrument_new_connection(sender, connection, **kwargs):
+    from core.instrumentation import instrument_connection
+    instrument_connection(connection)
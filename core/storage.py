@@ -0,0 +1,50 @@
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Storage do collectstatic: hash e compressão do WhiteNoise e os arquivos
+    gerados pelo projeto, que entram no manifesto de estáticos como qualquer
+    outro arquivo:
+    - antes do hash: os bundles de CSS/JS (core.services.asset_service);
+    - ao final: o manifesto dos modais, que referencia URLs já com hash.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            from core.services.asset_service import AssetBundleService
+
+            for name, content in AssetBundleService.build():
+                self.save_source(name, content)
+                paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        from core.services.modal_service import ModalManifestService
+
+        yield from self.save_generated(ModalManifestService.MANIFEST_NAME, ModalManifestService.build(self))
+        self.save_manifest()
+
+    def save_source(self, name, content):
+        """Grava um arquivo gerado no STATIC_ROOT, para o post_process versionar"""
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content.encode()))
+
+    def save_generated(self, name, content):
+        """Grava um arquivo gerado (com e sem hash, comprimido) e o registra no manifesto"""
+        content = ContentFile(content.encode())
+        hashed_name = self.hashed_name(name, content)
+        names = [hashed_name] if self.keep_only_hashed_files else [name, hashed_name]
+        for target in names:
+            if self.exists(target):
+                self.delete(target)
+            self._save(target, content)
+        self.hashed_files[self.hash_key(self.clean_name(name))] = hashed_name
+        yield name, hashed_name, True
+
+        for original, compressed_name in self.compress_files(names):
+            yield original, compressed_name, True
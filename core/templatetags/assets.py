@@ -0,0 +1,63 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core.services.asset_service import AssetBundleService
+from core.services.translation_service import TranslationService
+
+register = template.Library()
+
+
+def bundle_url(group, lang=None):
+    """URL com hash do bundle, ou None se ele não foi gerado (sem collectstatic ou desabilitado)"""
+    if not AssetBundleService.enabled():
+        return None
+    name = AssetBundleService.output_name(group, lang)
+    if name not in getattr(staticfiles_storage, 'hashed_files', {}):
+        return None
+    return staticfiles_storage.url(name)
+
+
+def context_lang(context):
+    """Idioma ativo do site (dicionário embutido no bundle JS)"""
+    return TranslationService.context_language(context)
+
+
+def js_url(group, lang):
+    return bundle_url(group, lang) or bundle_url(group, getattr(settings, 'ASSET_BUNDLES_DEFAULT_LANG', 'pt-BR'))
+
+
+@register.simple_tag
+def asset_css(group):
+    """<link> do bundle CSS do grupo; sem bundle, os arquivos originais"""
+    url = bundle_url(group)
+    urls = [url] if url else [static(name) for name in AssetBundleService.groups()[group]['files']]
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+
+
+@register.simple_tag(takes_context=True)
+def asset_js(context, group):
+    """<script> do bundle JS do grupo (no idioma ativo); sem bundle, o carregador original"""
+    url = js_url(group, context_lang(context))
+    if url:
+        urls = [url]
+    else:
+        config = AssetBundleService.groups()[group]
+        urls = [static(name) for name in config.get('fallback', config['files'])]
+    return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in urls))
+
+
+@register.simple_tag(takes_context=True)
+def asset_preload(context, *groups):
+    """Preload dos bundles (no <head>): o JS do fim da página baixa junto com o CSS"""
+    links = []
+    for group in groups:
+        if AssetBundleService.groups()[group]['output'].endswith('.css'):
+            url, kind = bundle_url(group), 'style'
+        else:
+            url, kind = js_url(group, context_lang(context)), 'script'
+        if url:
+            links.append(format_html('<link rel="preload" href="{}" as="{}">', url, kind))
+    return format_html_join('\n', '{}', ((link,) for link in links))
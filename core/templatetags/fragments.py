@@ -0,0 +1,44 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.services.fragment_service import FragmentCacheService
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def product_cards(context, products):
+    """Grade de cards: `{% product_cards products %}` (um get_many para a página toda)"""
+    return mark_safe('\n'.join(FragmentCacheService.render_cards(products, context)))
+
+
+@register.simple_tag(takes_context=True)
+def product_card(context, product):
+    """Um card avulso: `{% product_card product %}`"""
+    return mark_safe(FragmentCacheService.render_cards([product], context)[0])
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, namespace, name):
+        self.nodelist = nodelist
+        self.namespace = namespace
+        self.name = name
+
+    def render(self, context):
+        namespace = self.namespace.resolve(context)
+        name = self.name.resolve(context)
+        return FragmentCacheService.render_block(namespace, name, context, lambda: self.nodelist.render(context))
+
+
+@register.tag
+def cached_fragment(parser, token):
+    """
+    Bloco de template em cache por tema e idioma, invalidado com o namespace:
+    `{% cached_fragment 'navbar' 'categories-menu' %}...{% endcached_fragment %}`
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' recebe dois argumentos: namespace e nome")
+    nodelist = parser.parse(('endcached_fragment',))
+    parser.delete_first_token()
+    return CachedFragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
@@ -0,0 +1,20 @@
+from django import template
+
+from core.services.translation_service import TranslationService
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def t(context, key, *params):
+    """
+    Texto traduzido no idioma ativo: `{% t 'navbar.welcome' %}`,
+    `{% t 'login.in-development-state' provider %}`. Sem tradução, a chave
+    """
+    return TranslationService.translate(key, TranslationService.context_language(context), params)
+
+
+@register.filter
+def translate(key, lang=None):
+    """Filtro para chaves em variáveis: `{{ hr.title|translate:active_lang.display }}`"""
+    return TranslationService.translate(key, lang or None)
@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.urls import resolve
+
+from core.instrumentation import RequestMetrics
+
+
+@contextmanager
+def capture_metrics():
+    """Métricas (consultas, tempo, repetidas) de um bloco de código"""
+    metrics = RequestMetrics().activate()
+    try:
+        yield metrics
+    finally:
+        metrics.deactivate()
+        metrics.finish()
+
+
+def format_budget_failure(label, metrics, budget):
+    lines = [f'{label}: {metrics.queries} consultas (orçamento: {budget})']
+    for sql, count, location in metrics.duplicates():
+        lines.append(f'  {count}x {location}: {sql[:200]}')
+    return '\n'.join(lines)
+
+
+class QueryBudgetMixin:
+    """
+    Para TestCase: falha quando uma view passa do orçamento de consultas.
+
+        class HomeTests(QueryBudgetMixin, TestCase):
+            def test_home(self):
+                self.assertQueryBudget('/')             # usa QUERY_BUDGETS['core:home']
+                self.assertQueryBudget('/', max_queries=10)
+
+        with self.assertMaxQueries(3):
+            CartService.count(request)
+
+    A mensagem de erro lista as consultas repetidas e a origem no código.
+    """
+
+    def assertQueryBudget(self, url, max_queries=None, method='get', data=None, **extra):
+        view_name = resolve(url.split('?', 1)[0]).view_name
+        if max_queries is None:
+            budgets = getattr(settings, 'QUERY_BUDGETS', {})
+            if view_name not in budgets:
+                self.fail(f'Sem orçamento de consultas para {view_name} (QUERY_BUDGETS)')
+            max_queries = budgets[view_name]
+
+        with capture_metrics() as metrics:
+            response = getattr(self.client, method)(url, data, **extra)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        if metrics.queries > max_queries:
+            self.fail(format_budget_failure(view_name, metrics, max_queries))
+        return response
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries, label='bloco'):
+        with capture_metrics() as metrics:
+            yield metrics
+        if metrics.queries > max_queries:
+            self.fail(format_budget_failure(label, metrics, max_queries))
@@ -1,3 +1,677 @@
-from django.test import TestCase
+import asyncio
+import contextvars
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.contrib import admin
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.admin import RelatedIdFilter
+from core.cache import TieredCache, tiered_cache
+from core.middleware import ReplicaPinningMiddleware
+from core.models import SiteSettings
+from core.templatetags.assets import asset_css, asset_js
+from core.pagination import EstimatedCountPaginator
+from core.services.asset_service import AssetBundleService
+from core.services.export_service import ExportService
+from core.services.fragment_service import FragmentCacheService
+from core.services.modal_service import ModalManifestService
+from core.services.retention_service import RetentionService
+from core.testing import QueryBudgetMixin, capture_metrics
+from inventory.models import InventoryItem, Warehouse
+from models.routers import PrimaryReplicaRouter, is_pinned, pin_to_primary, reset_pinning
+from orders.models import Cart, CartItem, Order
+from payments.models import PaymentMethod, PaymentTransaction
+from products.models import Product, ProductCategory, ProductImage, ProductReview, ProductVariant
+from users.models import User
+
+
+class SoftDeletedRetentionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        cls.method = PaymentMethod.objects.create(name='PIX', code='pix', type='pix', provider='pix')
+
+    def create_order(self, deleted_days_ago=None):
+        address = {'postal_code': '01310-100', 'city': 'São Paulo', 'state': 'SP'}
+        order = Order.objects.create(
+            user=self.user, billing_address=address, shipping_address=address,
+            subtotal=Decimal('50.00'), total_amount=Decimal('50.00'),
+        )
+        if deleted_days_ago is not None:
+            order.delete()
+            Order.objects.with_deleted().filter(pk=order.pk).update(
+                deleted_at=timezone.now() - timedelta(days=deleted_days_ago),
+            )
+        return order
+
+    def create_transaction(self, order):
+        return PaymentTransaction.objects.create(
+            order=order, payment_method=self.method, amount=Decimal('50.00'), net_amount=Decimal('50.00'),
+        )
+
+    def purge(self):
+        return RetentionService(sleep=0).run_soft_deleted(['orders.Order'], days=90)[0]
+
+    def test_purges_old_soft_deleted_rows_without_dependents(self):
+        old = self.create_order(deleted_days_ago=120)
+        recent = self.create_order(deleted_days_ago=10)
+        live = self.create_order()
+
+        stats = self.purge()
+
+        self.assertEqual(stats['deleted'], 1)
+        self.assertFalse(Order.objects.with_deleted().filter(pk=old.pk).exists())
+        self.assertTrue(Order.objects.with_deleted().filter(pk=recent.pk).exists())
+        self.assertTrue(Order.objects.filter(pk=live.pk).exists())
+
+    def test_keeps_rows_with_live_cascade_dependents(self):
+        order = self.create_order(deleted_days_ago=120)
+        transaction = self.create_transaction(order)
+
+        stats = self.purge()
+
+        self.assertEqual((stats['deleted'], stats['skipped']), (0, 1))
+        self.assertTrue(Order.objects.with_deleted().filter(pk=order.pk).exists())
+        self.assertTrue(PaymentTransaction.objects.filter(pk=transaction.pk).exists())
+
+    def test_soft_deleted_dependents_go_with_the_parent(self):
+        order = self.create_order(deleted_days_ago=120)
+        transaction = self.create_transaction(order)
+        transaction.delete()
+
+        stats = self.purge()
+
+        self.assertEqual(stats['deleted'], 1)
+        self.assertFalse(PaymentTransaction.objects.with_deleted().filter(pk=transaction.pk).exists())
+
+    def test_models_are_required(self):
+        with self.assertRaises(ValueError):
+            RetentionService().run_soft_deleted([])
+        with self.assertRaises(CommandError):
+            call_command('purge_soft_deleted')
+
+
+class CartRetentionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        cls.products = [
+            Product.objects.create(name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'))
+            for i in range(5)
+        ]
+
+    def create_cart(self, items, expired=True, **kwargs):
+        if 'user' not in kwargs:
+            kwargs['session_key'] = f'token-{Cart._base_manager.count()}'
+        expires_at = timezone.now() + timedelta(days=-1 if expired else 1)
+        cart = Cart.objects.create(expires_at=expires_at, **kwargs)
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=1, unit_price=product.price)
+            for product in self.products[:items]
+        ])
+        return cart
+
+    def purge(self):
+        return RetentionService(sleep=0).run(['carts'])[0]
+
+    def test_items_of_expired_guest_carts_are_deleted_in_one_statement(self):
+        self.create_cart(1)
+        with CaptureQueriesContext(connection) as few:
+            self.purge()
+        self.create_cart(5)
+        self.create_cart(5)
+        with CaptureQueriesContext(connection) as many:
+            stats = self.purge()
+
+        self.assertEqual(stats['deleted'], 2)
+        self.assertEqual(len(many), len(few))
+        self.assertFalse(CartItem._base_manager.exists())
+
+    def test_user_and_active_guest_carts_stay(self):
+        user_cart = self.create_cart(2, user=self.user)
+        active = self.create_cart(2, expired=False)
+        self.create_cart(2)
+
+        self.assertEqual(self.purge()['deleted'], 1)
+        self.assertEqual(set(CartItem.objects.values_list('cart_id', flat=True)), {user_cart.pk, active.pk})
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = TieredCache(L1_TIMEOUT=60, LOCK_WAIT=0.2)
+
+    def same_stripe_keys(self, namespace):
+        stripes = {}
+        for i in range(1000):
+            full_key = self.cache.make_key(namespace, f'k{i}')
+            stripe = zlib.crc32(full_key.encode()) % TieredCache.LOCK_STRIPES
+            if stripe in stripes:
+                return stripes[stripe], f'k{i}'
+            stripes[stripe] = f'k{i}'
+
+    def run_in_thread(self, target):
+        result = {}
+        thread = threading.Thread(target=lambda: result.setdefault('value', target()))
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), 'get_or_set travou')
+        return result.get('value')
+
+    def test_l1_then_l2(self):
+        self.cache.set('ns', 'a', 1, timeout=60)
+        self.assertEqual(self.cache.get('ns', 'a'), 1)
+
+        cache.clear()
+        self.assertEqual(self.cache.get('ns', 'a'), 1)  # ainda no L1
+        self.cache.l1.clear()
+        self.assertIsNone(self.cache.get('ns', 'a'))
+
+        self.cache.set('ns', 'b', 2, timeout=60)
+        self.cache.l1.clear()
+        self.assertEqual(self.cache.get('ns', 'b'), 2)  # do L2, volta para o L1
+        cache.clear()
+        self.assertEqual(self.cache.get('ns', 'b'), 2)
+
+    def test_invalidate_bumps_the_namespace_version(self):
+        self.cache.set('ns', 'a', 1, timeout=60)
+        self.cache.set('other', 'a', 1, timeout=60)
+        self.cache.invalidate('ns')
+
+        self.assertIsNone(self.cache.get('ns', 'a'))
+        self.assertEqual(self.cache.get('other', 'a'), 1)
+        self.assertEqual(self.cache.get_or_set('ns', 'a', lambda: 2, 60), 2)
+
+    def test_xfetch_recomputes_early_only_near_expiry(self):
+        now = time.time()
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertTrue(self.cache.should_recompute((1, now, 0.0), now))
+            self.assertFalse(self.cache.should_recompute((1, now + 60, 0.1), now))
+            self.assertTrue(self.cache.should_recompute((1, now + 1, 5.0), now))
+
+    def test_single_flight_computes_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'valor'
+
+        threads = [threading.Thread(target=self.cache.get_or_set, args=('ns', 'a', compute, 60)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.get('ns', 'a'), 'valor')
+
+    def test_nested_get_or_set_on_the_same_stripe(self):
+        outer, inner = self.same_stripe_keys('ns')
+
+        value = self.run_in_thread(lambda: self.cache.get_or_set(
+            'ns', outer, lambda: self.cache.get_or_set('ns', inner, lambda: 'dentro', 60) + '+fora', 60,
+        ))
+        self.assertEqual(value, 'dentro+fora')
+
+    def test_busy_stripe_waits_at_most_lock_wait(self):
+        first, second = self.same_stripe_keys('ns')
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'lento'
+
+        thread = threading.Thread(target=self.cache.get_or_set, args=('ns', first, slow, 60))
+        thread.start()
+        started.wait(5)
+        try:
+            began = time.monotonic()
+            self.assertEqual(self.run_in_thread(lambda: self.cache.get_or_set('ns', second, lambda: 'rápido', 60)), 'rápido')
+            self.assertLess(time.monotonic() - began, 2)
+        finally:
+            release.set()
+            thread.join(5)
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ProductCategory.objects.create(name='Camisetas', slug='camisetas')
+        cls.product = Product.objects.create(
+            name='Camiseta', slug='camiseta', sku='SKU-1', price=Decimal('10.00'), category=cls.category,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.vary = FragmentCacheService.vary({})
+
+    def key(self):
+        return FragmentCacheService.card_key(Product.objects.get(pk=self.product.pk), self.vary)
+
+    def test_card_key_follows_the_product(self):
+        keys = [self.key()]
+
+        product = Product.objects.get(pk=self.product.pk)
+        product.name = 'Camiseta lisa'
+        product.save()
+        keys.append(self.key())
+
+        ProductImage.objects.create(product=product, image='products/camiseta.jpg', is_primary=True)
+        keys.append(self.key())
+
+        product = Product.objects.get(pk=self.product.pk)
+        product.is_wishlisted = True
+        keys.append(FragmentCacheService.card_key(product, self.vary))
+
+        self.assertEqual(len(set(keys)), 4)
+
+    def test_rendered_card_is_reused_until_the_product_changes(self):
+        first = FragmentCacheService.render_cards([self.product], {})[0]
+        with self.assertNumQueries(0), mock.patch('core.services.fragment_service.render_to_string') as render:
+            self.assertEqual(FragmentCacheService.render_cards([self.product], {})[0], first)
+        render.assert_not_called()
+
+        product = Product.objects.get(pk=self.product.pk)
+        product.name = 'Camiseta lisa'
+        product.save()
+        self.assertIn('Camiseta lisa', FragmentCacheService.render_cards([product], {})[0])
+
+    def test_category_save_invalidates_the_navbar_and_the_cards(self):
+        render = mock.Mock(side_effect=['menu 1', 'menu 2'])
+        context = {}
+
+        self.assertEqual(FragmentCacheService.render_block('navbar', 'categories-menu', context, render), 'menu 1')
+        self.assertEqual(FragmentCacheService.render_block('navbar', 'categories-menu', context, render), 'menu 1')
+        card = FragmentCacheService.card_key(self.product, self.vary)
+        FragmentCacheService.render_cards([self.product], context)
+
+        self.category.name = 'Camisetas e regatas'
+        self.category.save()
+
+        self.assertEqual(FragmentCacheService.render_block('navbar', 'categories-menu', context, render), 'menu 2')
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(tiered_cache.get_many(FragmentCacheService.CARDS_NAMESPACE, [card]), {})
+
+
+class LargeTableAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ProductCategory.objects.create(name='Camisetas', slug='camisetas')
+        for i in range(3):
+            Product.objects.create(
+                name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'), category=cls.category,
+            )
+
+    def test_exact_count_below_the_threshold_or_without_an_estimate(self):
+        paginator = EstimatedCountPaginator(Product.objects.order_by('pk'), 2)
+        if connection.vendor != 'postgresql':
+            self.assertIsNone(paginator.estimate())
+        self.assertEqual((paginator.count, paginator.num_pages), (3, 2))
+
+        with mock.patch.object(EstimatedCountPaginator, 'estimate', return_value=50000):
+            self.assertEqual(EstimatedCountPaginator(Product.objects.order_by('pk'), 2).count, 50000)
+        with mock.patch.object(EstimatedCountPaginator, 'estimate', return_value=5):
+            self.assertEqual(EstimatedCountPaginator(Product.objects.order_by('pk'), 2).count, 3)
+
+    @override_settings(ADMIN_EXACT_COUNT_THRESHOLD=0)
+    def test_planner_estimate_on_postgres(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('estimativa só no Postgres')
+        paginator = EstimatedCountPaginator(Product.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, paginator.estimate())
+        self.assertEqual(EstimatedCountPaginator(Product.objects.none(), 2).count, 0)
+
+    def choices(self, params):
+        request = RequestFactory().get('/admin/products/product/', params)
+        model_admin = admin.site._registry[Product]
+        list_filter = RelatedIdFilter(
+            Product._meta.get_field('category'), request, dict(params), Product, model_admin, 'category',
+        )
+        return list_filter.lookup_choices
+
+    def test_related_id_filter_shows_only_the_selected_record(self):
+        self.assertEqual(self.choices({'category__id__exact': str(self.category.pk)}), [(str(self.category.pk), 'Camisetas')])
+        self.assertEqual(self.choices({'category__id__exact': '999999'}), [])
+        self.assertEqual(self.choices({'category__id__exact': 'abc'}), [])
+        self.assertEqual(self.choices({}), [])
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_changelist_with_a_bad_or_missing_id(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', email='admin@example.com', password='x'))
+
+        response = self.client.get('/admin/products/product/', {'category__id__exact': '999999'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+        response = self.client.get('/admin/products/product/', {'category__id__exact': 'abc'})
+        self.assertRedirects(response, '/admin/products/product/?e=1', fetch_redirect_response=False)
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Cada teste roda num contexto copiado: o pin das escritas dos testes não vaza para cá"""
+
+    def setUp(self):
+        replicas = self.enterContext(mock.patch('models.routers.replica_aliases', return_value=['replica_0']))
+        self.enterContext(mock.patch('core.middleware.replica_aliases', replicas))
+        self.router = PrimaryReplicaRouter()
+
+    def run(self, result=None):
+        def fresh():
+            reset_pinning()
+            return super(PrimaryReplicaRouterTests, self).run(result)
+        return contextvars.copy_context().run(fresh)
+
+    def test_catalog_reads_go_to_a_replica_until_a_write(self):
+        self.assertEqual(self.router.db_for_read(Product), 'replica_0')
+        self.assertEqual(self.router.db_for_read(Order), 'default')
+
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+        self.assertEqual(self.router.db_for_write(Order), 'default')
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_without_replicas_everything_uses_the_primary(self):
+        with mock.patch('models.routers.replica_aliases', return_value=[]):
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Product), 'default')
+
+    def view(self, write=False):
+        seen = {}
+
+        def get_response(request):
+            seen['pinned'] = is_pinned()
+            if write:
+                pin_to_primary()
+            return HttpResponse()
+        return get_response, seen
+
+    def test_a_write_sets_the_pin_cookie_and_the_cookie_pins_the_next_request(self):
+        factory = RequestFactory()
+        get_response, seen = self.view(write=True)
+        response = ReplicaPinningMiddleware(get_response)(factory.post('/'))
+        self.assertFalse(seen['pinned'])
+        cookie = response.cookies[ReplicaPinningMiddleware.COOKIE_NAME]
+        self.assertEqual((cookie.value, cookie['max-age']), ('1', 5))
+
+        get_response, seen = self.view()
+        request = factory.get('/')
+        request.COOKIES[ReplicaPinningMiddleware.COOKIE_NAME] = '1'
+        ReplicaPinningMiddleware(get_response)(request)
+        self.assertTrue(seen['pinned'])
+
+    def test_pinning_does_not_leak_between_requests(self):
+        pin_to_primary()  # ex.: escrita anterior neste thread, fora de uma requisição
+        factory = RequestFactory()
+
+        get_response, seen = self.view(write=True)
+        ReplicaPinningMiddleware(get_response)(factory.get('/'))
+        get_response, seen = self.view()
+        response = ReplicaPinningMiddleware(get_response)(factory.get('/'))
+
+        self.assertFalse(seen['pinned'])
+        self.assertNotIn(ReplicaPinningMiddleware.COOKIE_NAME, response.cookies)
+        self.assertTrue(is_pinned())  # o valor de fora é restaurado ao final
+
+    def test_async_requests_are_pinned_independently(self):
+        async def get_response(request):
+            if request.method == 'POST':
+                await asyncio.sleep(0)
+                pin_to_primary()
+            await asyncio.sleep(0)
+            return HttpResponse(str(is_pinned()))
+
+        async def both():
+            middleware = ReplicaPinningMiddleware(get_response)
+            factory = RequestFactory()
+            return await asyncio.gather(middleware(factory.post('/')), middleware(factory.get('/')))
+
+        write, read = asyncio.run(both())
+        self.assertEqual((write.content, read.content), (b'True', b'False'))
+        self.assertIn(ReplicaPinningMiddleware.COOKIE_NAME, write.cookies)
+        self.assertNotIn(ReplicaPinningMiddleware.COOKIE_NAME, read.cookies)
+        self.assertFalse(is_pinned())
+
+
+class AssetBundleTests(SimpleTestCase):
+    def test_local_imports_are_inlined_once(self):
+        files = {
+            'css/a.css': "@import './b.css';\n@import url(\"../vendor/c.css\");\na { color: red; }",
+            'css/b.css': "@import 'a.css';\n@import url('https://fonts.example.com/x.css');\nb { color: blue; }",
+            'vendor/c.css': 'c { color: green; }',
+        }
+        with mock.patch.object(AssetBundleService, 'read', side_effect=files.__getitem__):
+            content = AssetBundleService.inline_css('css/a.css')
+
+        self.assertEqual(content.count('a { color: red; }'), 1)
+        self.assertLess(content.index('b { color: blue; }'), content.index('c { color: green; }'))
+        self.assertIn("@import url('https://fonts.example.com/x.css');", content)
+        self.assertNotIn('./b.css', content)
+
+    def test_css_bundle_has_no_local_imports(self):
+        content = AssetBundleService.build_css(['css/main.css'])
+        self.assertNotIn('@import', content)
+        self.assertIn('@keyframes bounce', content)
+
+    def test_js_bundle_per_language_preloads_the_dictionary(self):
+        with open(os.path.join(AssetBundleService.i18n_path(), 'en-US.json'), encoding='utf-8') as file:
+            dictionary = json.load(file)
+        content = AssetBundleService.build_js(['js/global.js', 'js/main.js'], 'en-US')
+
+        prelude = next(line for line in content.splitlines() if line.startswith('window.I18N_PRELOADED = '))
+        self.assertEqual(json.loads(prelude[len('window.I18N_PRELOADED = '):-1]), {'en-US': dictionary})
+        self.assertTrue(content.startswith('window.ASSET_BUNDLE = true;'))
+        self.assertNotIn('I18N_PRELOADED', AssetBundleService.build_js(['js/main.js']))
+
+        names = [name for name, _ in AssetBundleService.build()]
+        self.assertIn('js/core.bundle.en-US.js', names)
+        self.assertIn('js/core.bundle.pt-BR.js', names)
+        self.assertNotIn('js/core.bundle.js', names)
+
+    @override_settings(ASSET_BUNDLES_ENABLED=True, STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_original_files_without_collected_bundles(self):
+        self.assertEqual(asset_css('home'), '<link rel="stylesheet" href="/static/css/home.css">')
+        self.assertEqual(asset_js({}, 'core'), '<script src="/static/js/main.js"></script>')
+
+
+class ModalManifestTests(SimpleTestCase):
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_path)
+        self.addCleanup(ModalManifestService.reload)
+        self.write('Login', 'views/login.html', '<form></form>')
+        self.write('Login', 'scripts/login.js', 'init();')
+        self.write('Nova Senha', 'views/Nova.Senha.html', '<p></p>')
+        self.write('Vazio', 'views/outro.html', '')
+
+    def write(self, folder, name, content):
+        path = os.path.join(self.base_path, folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+
+    def scan(self, storage=None):
+        return {modal['name']: modal for modal in ModalManifestService.scan(storage or mock.Mock(), self.base_path)}
+
+    def test_scan_lists_each_modal_with_its_main_files(self):
+        storage = mock.Mock(url=lambda name: f'/static/{name}.hash')
+        modals = self.scan(storage)
+
+        self.assertEqual(list(modals), ['Login', 'Nova Senha', 'Vazio'])
+        self.assertEqual(modals['Login']['views_url'], '/static/modals/Login/views/login.html.hash')
+        self.assertEqual(modals['Login']['scripts'], 'modals/Login/scripts/login.js')
+        self.assertEqual(modals['Nova Senha']['views'], 'modals/Nova Senha/views/Nova.Senha.html')
+        self.assertEqual((modals['Vazio']['views'], modals['Vazio']['scripts_url']), (None, None))
+
+    def test_urls_without_collectstatic_and_stable_hashes(self):
+        storage = mock.Mock(url=mock.Mock(side_effect=ValueError))
+        before = self.scan(storage)
+        self.assertEqual(before['Login']['views_url'], '/static/modals/Login/views/login.html')
+        self.assertEqual(self.scan(storage)['Login']['hash'], before['Login']['hash'])
+
+        self.write('Login', 'scripts/login.js', 'init(true);')
+        after = self.scan(storage)
+        self.assertNotEqual(after['Login']['hash'], before['Login']['hash'])
+        self.assertEqual(after['Vazio']['hash'], before['Vazio']['hash'])
+
+    @override_settings(DEBUG=False, STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_without_the_collected_manifest_it_is_built_once_per_process(self):
+        ModalManifestService.reload()
+        with mock.patch.object(ModalManifestService, 'source_path', return_value=self.base_path), \
+                mock.patch.object(ModalManifestService, 'build', wraps=ModalManifestService.build) as build:
+            content, version = ModalManifestService.get()
+            self.assertEqual(ModalManifestService.get(), (content, version))
+            self.assertEqual(ModalManifestService.url(), '/modals/')
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual([modal['name'] for modal in json.loads(content)], ['Login', 'Nova Senha', 'Vazio'])
+
+
+class CollectstaticTests(SimpleTestCase):
+    """Um collectstatic de verdade (core.storage.StaticFilesStorage) num STATIC_ROOT temporário"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, static_root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=static_root, DEBUG=False, ASSET_BUNDLES_ENABLED=True))
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def setUp(self):
+        ModalManifestService.reload()
+        self.addCleanup(ModalManifestService.reload)
+
+    def read(self, name):
+        with staticfiles_storage.open(staticfiles_storage.stored_name(name)) as file:
+            return file.read().decode()
+
+    def test_bundles_are_hashed_and_rendered_by_the_tags(self):
+        site = staticfiles_storage.url('css/site.bundle.css')
+        self.assertRegex(site, r'^/static/css/site\.bundle\.[0-9a-f]{12}\.css$')
+        self.assertNotIn('@import', self.read('css/site.bundle.css'))
+        self.assertEqual(asset_css('site'), f'<link rel="stylesheet" href="{site}">')
+
+        english = staticfiles_storage.url('js/core.bundle.en-US.js')
+        self.assertIn('"en-US"', self.read('js/core.bundle.en-US.js'))
+        self.assertEqual(asset_js({'active_lang': mock.Mock(display='en-US')}, 'core'), f'<script src="{english}"></script>')
+        # Idioma sem bundle: o do idioma padrão
+        default = staticfiles_storage.url('js/core.bundle.pt-BR.js')
+        self.assertEqual(asset_js({'active_lang': mock.Mock(display='fr-FR')}, 'core'), f'<script src="{default}"></script>')
+
+    def test_modal_manifest_is_a_hashed_static_file(self):
+        manifest = json.loads(self.read(ModalManifestService.MANIFEST_NAME))
+        login = next(modal for modal in manifest if modal['name'] == 'Login')
+        self.assertEqual(login['views_url'], staticfiles_storage.url(login['views']))
+        self.assertNotEqual(login['views_url'], f'/static/{login["views"]}')
+
+        content, _ = ModalManifestService.get()
+        self.assertEqual(json.loads(content), manifest)
+        self.assertEqual(ModalManifestService.url(), staticfiles_storage.url(ModalManifestService.MANIFEST_NAME))
+        self.assertTrue(staticfiles_storage.exists(staticfiles_storage.stored_name(ModalManifestService.MANIFEST_NAME) + '.gz'))
+
+
+class CaptureMetricsTests(QueryBudgetMixin, TestCase):
+    def test_nested_capture_counts_queries_of_the_request(self):
+        # A requisição ativa as métricas do PerformanceMiddleware dentro da captura
+        with CaptureQueriesContext(connection) as executed, capture_metrics() as metrics:
+            response = self.client.get('/api/v1/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(executed), 0)
+        self.assertEqual(metrics.queries, len(executed))
+
+    def test_inner_capture_still_reports_to_outer(self):
+        with capture_metrics() as outer:
+            with capture_metrics() as inner:
+                list(User.objects.all())
+            list(User.objects.all())
+        self.assertEqual((inner.queries, outer.queries), (1, 2))
+
+    def test_query_budget_fails_when_exceeded(self):
+        with self.assertRaises(AssertionError):
+            self.assertQueryBudget('/api/v1/products/', max_queries=0)
+
+
+class ProductExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        warehouse = Warehouse.objects.create(name='Central', code='CD1')
+        cls.product = Product.objects.create(name='Camiseta', slug='camiseta', sku='CAM', price=Decimal('50.00'))
+        variant = ProductVariant.objects.create(product=cls.product, sku='CAM-M', attributes={'size': 'M'})
+        InventoryItem.objects.create(warehouse=warehouse, product=cls.product, variant=variant, quantity_available=3)
+        # Estoque do produto sem variante
+        InventoryItem.objects.create(warehouse=warehouse, product=cls.product, quantity_available=5, quantity_reserved=1)
+
+    def rows(self):
+        content = b''.join(ExportService.stream('products')).decode()
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_product_level_stock_is_exported_alongside_variants(self):
+        rows = self.rows()
+
+        self.assertEqual([row['variant_sku'] for row in rows], ['', 'CAM-M'])
+        self.assertEqual([(row['quantity_available'], row['quantity_reserved']) for row in rows], [('5', '1'), ('3', '0')])
+        self.assertEqual(sum(int(row['quantity_available']) for row in rows), 8)
+
+    def test_no_product_row_without_stock_outside_variants(self):
+        InventoryItem.objects.filter(variant__isnull=True).delete()
+        self.assertEqual([row['variant_sku'] for row in self.rows()], ['CAM-M'])
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class HotViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Orçamentos do QUERY_BUDGETS com páginas cheias: consultas por item estouram"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.objects.create(contact_email='contato@example.com', is_active=True)
+        cls.user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        category = ProductCategory.objects.create(name='Camisetas', slug='camisetas')
+        warehouse = Warehouse.objects.create(name='Central', code='CD1')
+        cls.products = []
+        for i in range(12):
+            product = Product.objects.create(
+                name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'),
+                category=category, is_featured=True,
+            )
+            ProductVariant.objects.create(product=product, sku=f'SKU-{i}-M', attributes={'size': 'M'})
+            InventoryItem.objects.create(warehouse=warehouse, product=product, quantity_available=i)
+            ProductReview.objects.create(product=product, user=cls.user, rating=4, title='Bom', is_approved=True)
+            cls.products.append(product)
+        cart = Cart.objects.create(user=cls.user)
+        for product in cls.products[:5]:
+            CartItem.objects.create(cart=cart, product=product, quantity=1, unit_price=product.price)
+
+    def test_home(self):
+        self.assertQueryBudget('/')
+
+    def test_product_list_api(self):
+        response = self.assertQueryBudget('/api/v1/products/')
+        first = next(row for row in response.json()['results'] if row['id'] == self.products[1].pk)
+        self.assertEqual((first['average_rating'], first['review_count'], first['is_in_stock']), (4, 1, True))
+
+    def test_product_detail_api(self):
+        self.assertQueryBudget(f'/api/v1/products/{self.products[0].pk}/')
+
+    def test_cart(self):
+        self.client.force_login(self.user)
+        self.assertQueryBudget('/pedidos/cart/count/')
+        response = self.assertQueryBudget('/api/v1/cart/current/')
+        self.assertEqual(len(response.json()['items']), 5)
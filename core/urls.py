@@ -13,6 +13,13 @@ urlpatterns = [
     path('search/suggestions/', SearchSuggestionsView.as_view(), name='search_suggestions'),
     
     # Static Modals
-    path('modals/', static_modals, name='modals')
+    path('modals/', static_modals, name='modals'),
+
+    # SEO: arquivos gerados por `generate_sitemaps`
+    path('sitemap.xml', sitemap_index, name='sitemap'),
+    path('robots.txt', robots_txt, name='robots'),
+
+    # Métricas (Prometheus)
+    path('metrics/', metrics, name='metrics'),
 ]
 
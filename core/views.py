@@ -3,6 +3,7 @@ from django.views.generic import TemplateView, View
 from django.db.models import Q, Count, Avg
 from django.http import JsonResponse
 
+import hashlib
 import os
 from django.conf import settings
 from django.core.cache import cache
@@ -27,10 +28,12 @@ class HomeView(TemplateView):
         print(list(sys_config.hero_sections))
         
         # Produtos em destaque
-        context['featured_products'] = Product.objects.filter(
+        # (renderizados como fragmentos em cache: {% product_cards %})
+        from marketing.services.wishlist_service import WishlistService
+        context['featured_products'] = WishlistService.annotate(self.request.user, Product.objects.filter(
             is_active=True, 
             is_featured=True
-        ).select_related('category', 'brand')[:8]
+        ).select_related('category', 'brand')[:8])
         
         # Produtos mais vendidos (baseado em pedidos)
         context['popular_products'] = Product.objects.filter(
@@ -68,14 +71,28 @@ class AboutView(TemplateView):
     template_name = 'modules/core/about.html'
 
 class SearchSuggestionsView(View):
-    """View para sugestões de busca em tempo real"""
+    """View para sugestões de busca em tempo real (assíncrona: ORM e cache async)"""
+    CACHE_TTL = 60
     
-    def get(self, request):
+    async def get(self, request):
         query = request.GET.get('q', '').strip()
         
         if len(query) < 2:
             return JsonResponse({'suggestions': []})
         
+        # Autocomplete repete os mesmos prefixos: resultado fica um minuto no cache
+        cache_key = 'search:suggestions:' + hashlib.md5(query.lower().encode()).hexdigest()
+        suggestions = await cache.aget(cache_key)
+        if suggestions is None:
+            suggestions = await self.build_suggestions(query)
+            await cache.aset(cache_key, suggestions, self.CACHE_TTL)
+        
+        return JsonResponse({
+            'suggestions': suggestions,
+            'query': query
+        })
+    
+    async def build_suggestions(self, query):
         # Buscar produtos
         products = Product.objects.filter(
             Q(name__icontains=query) | 
@@ -95,13 +112,13 @@ class SearchSuggestionsView(View):
         suggestions = []
         
         # Adicionar produtos às sugestões
-        for product in products:
+        async for product in products:
             suggestions.append({
                 'type': 'product',
                 'id': product.id,
                 'name': product.name,
                 'url': product.get_absolute_url(),
-                'image': product.get_primary_image(),
+                'image': self.primary_image(product),
                 'price': float(product.price),
                 'formatted_price': f'R$ {product.price:.2f}',
                 'category': product.category.name if product.category else '',
@@ -109,7 +126,7 @@ class SearchSuggestionsView(View):
             })
         
         # Adicionar categorias às sugestões
-        for category in categories:
+        async for category in categories:
             suggestions.append({
                 'type': 'category',
                 'id': category.id,
@@ -118,53 +135,78 @@ class SearchSuggestionsView(View):
                 'product_count': category.product_count,
             })
         
-        return JsonResponse({
-            'suggestions': suggestions,
-            'query': query
-        })
+        return suggestions
+    
+    @staticmethod
+    def primary_image(product):
+        """Mesmo critério de Product.get_primary_image, sobre as imagens pré-carregadas (sem consulta)"""
+        images = list(product.images.all())
+        image = next((image for image in images if image.is_primary), images[0] if images else None)
+        return image.image.url if image else None
           
 import os
 from django.conf import settings
 from django.http import JsonResponse
 
-def static_modals(request):
-    base_path = os.path.join(settings.BASE_DIR, 'static', 'modals')
-    resultado = []
-
-    if os.path.exists(base_path):
-        for folder_name in os.listdir(base_path):
-            folder_path = os.path.join(base_path, folder_name)
-
-            if os.path.isdir(folder_path):
-                base_name = folder_name.lower().replace(' ', '.')
-
-                views_path = os.path.join(folder_path, 'views')
-                scripts_path = os.path.join(folder_path, 'scripts')
-
-                # -------- Views --------
-                views_main = None
-
-                if os.path.exists(views_path):
-                    for f in os.listdir(views_path):
-                        if os.path.isfile(os.path.join(views_path, f)) and f.endswith('.html'):
-                            relative_path = f'modals/{folder_name}/views/{f}'
-                            if f.lower() == f'{base_name}.html':
-                                views_main = relative_path
-
-                # -------- Scripts --------
-                scripts_main = None
-
-                if os.path.exists(scripts_path):
-                    for f in os.listdir(scripts_path):
-                        if os.path.isfile(os.path.join(scripts_path, f)) and f.endswith('.js'):
-                            relative_path = f'modals/{folder_name}/scripts/{f}'
-                            if f.lower() == f'{base_name}.js':
-                                scripts_main = relative_path
-
-                resultado.append({
-                    'name': folder_name,
-                    'views': views_main,
-                    'scripts': scripts_main
-                })
-
-    return JsonResponse(resultado, safe=False)
+async def static_modals(request):
+    """
+    Manifesto dos modais (core.services.modal_service), já em memória. Em
+    produção o front usa o arquivo estático com hash; aqui vale o ETag.
+    """
+    from django.http import HttpResponse
+    from django.utils.cache import get_conditional_response, patch_cache_control
+    from django.utils.http import quote_etag
+    from core.services.modal_service import ModalManifestService
+
+    content, version = ModalManifestService.get()
+    etag = quote_etag(version)
+    response = get_conditional_response(request, etag=etag) or HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'MODALS_MANIFEST_MAX_AGE', 3600))
+    return response
+
+
+def metrics(request):
+    """
+    Métricas do processo no formato texto do Prometheus. Acesso para staff ou
+    com `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    from django.http import HttpResponse, HttpResponseForbidden
+    from django.utils.crypto import constant_time_compare
+    from core.instrumentation import registry
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorization = request.headers.get('Authorization', '')
+    allowed = request.user.is_staff or (token and constant_time_compare(authorization, f'Bearer {token}'))
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def sitemap_index(request):
+    """
+    /sitemap.xml: redireciona para o índice gerado no storage
+    (products.services.sitemap_service); nenhum acesso ao banco
+    """
+    from django.http import HttpResponseRedirect
+    from django.utils.cache import patch_cache_control
+    from products.services.sitemap_service import SitemapService
+
+    response = HttpResponseRedirect(SitemapService.index_url())
+    patch_cache_control(response, public=True, max_age=86400)
+    return response
+
+
+def robots_txt(request):
+    """robots.txt: aponta os sitemaps e tira dos crawlers as páginas de busca e de conta"""
+    from django.http import HttpResponse
+    from django.utils.cache import patch_cache_control
+    from django.urls import reverse
+    from products.services.sitemap_service import SitemapService
+
+    disallow = ['/api/', '/admin/', '/auth/', '/conta/', '/pedidos/', '/pagamento/', reverse('products:search')]
+    lines = ['User-agent: *'] + [f'Disallow: {path}' for path in disallow]
+    lines.append(f'Sitemap: {SitemapService.index_url()}')
+    response = HttpResponse('\n'.join(lines) + '\n', content_type='text/plain')
+    patch_cache_control(response, public=True, max_age=86400)
+    return response
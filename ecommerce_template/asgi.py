@@ -3,6 +3,12 @@ ASGI config for ecommerce_template project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Views assíncronas (autocomplete, badge e dropdown do carrinho, modais,
+reenvio de códigos por e-mail) atendem muitas requisições concorrentes por
+worker; as síncronas continuam funcionando, em threads. Em produção:
+
+    gunicorn ecommerce_template.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +18,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_template.settings')
+# Lido pelas settings: sem conexões persistentes no ASGI (use o PgBouncer)
+os.environ.setdefault('DJANGO_SERVER_MODE', 'asgi')
 
 application = get_asgi_application()
@@ -52,14 +52,20 @@ INSTALLED_APPS = [
     'analytics'
 ]
 
+# Os middlewares do projeto (core/orders) e o CorsMiddleware são nativamente
+# síncronos e assíncronos; os do Django (MiddlewareMixin) executam os hooks em
+# thread quando a requisição é assíncrona. Prefira HybridMiddleware em novos.
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'orders.middleware.GuestCartCookieMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -79,34 +85,71 @@ TEMPLATES = [
                 'theme.context_processors.theme_context',  # Processador de contexto para temas
                 'theme.context_processors.lang_context',  # Processador de contexto para linguagme
                 'core.context_processors.system_context',  # Processador de contexto para core
+                'core.context_processors.static_manifests',  # URLs dos manifestos estáticos (modais)
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'ecommerce_template.wsgi.application'
+ASGI_APPLICATION = 'ecommerce_template.asgi.application'
+# 'asgi' quando servido por ecommerce_template/asgi.py
+SERVER_MODE = os.getenv('DJANGO_SERVER_MODE', 'wsgi')
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'BRVlogistics.sqlite3',
+# Desenvolvimento usa SQLite; produção usa o perfil PostgreSQL (DB_BACKEND=postgres)
+DB_BACKEND = os.getenv('DB_BACKEND', 'sqlite')
+
+if DB_BACKEND == 'postgres':
+    # Com PgBouncer em modo transaction: sem cursores do lado do servidor e sem
+    # parâmetros de inicialização (o pooler recusa `options`)
+    DB_POOLER = os.getenv('DB_POOLER', '')
+
+    def postgres_database(host, port):
+        database = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'BRVLogistics'),
+            'USER': os.getenv('DB_USER', 'BRAVA'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': host,
+            'PORT': port,
+            # Conexões persistentes, validadas antes de reutilizar. No ASGI cada
+            # requisição abre e fecha a sua: o pool fica no PgBouncer
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0' if SERVER_MODE == 'asgi' else '600')),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+                'application_name': os.getenv('DB_APPLICATION_NAME', 'brv-web'),
+            },
+        }
+        if not DB_POOLER:
+            database['OPTIONS']['options'] = f"-c statement_timeout={os.getenv('DB_STATEMENT_TIMEOUT', '30000')}"
+        return database
+
+    DATABASES = {
+        'default': postgres_database(os.getenv('DB_HOST', 'localhost'), os.getenv('DB_PORT', '5432')),
     }
-}
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': os.getenv('DB_NAME', 'BRVLogistics'),
-#         'USER': os.getenv('DB_USER', 'BRAVA'),
-#         'PASSWORD': os.getenv('DB_PASSWORD', 'BRV2025!DevOPS'),
-#         'HOST': os.getenv('DB_HOST', 'localhost'),
-#         'PORT': os.getenv('DB_PORT', '5432'),
-#         'OPTIONS': {
-#             'charset': 'utf8',
-#         },
-#         'CONN_MAX_AGE': 600,
-#     }
-# }
+
+    # Réplicas de leitura: DB_REPLICA_HOSTS=host1:5432,host2:5432
+    for index, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+        host, _, port = replica.strip().partition(':')
+        DATABASES[f'replica_{index}'] = dict(postgres_database(host, port or '5432'), TEST={'MIRROR': 'default'})
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'BRVlogistics.sqlite3',
+        }
+    }
+
+# Leituras do catálogo vão para as réplicas (models.routers.PrimaryReplicaRouter);
+# carrinho, pedidos, estoque e autenticação ficam no primário
+DATABASE_ROUTERS = ['models.routers.PrimaryReplicaRouter']
+REPLICA_READ_APPS = ['products', 'analytics']
+# Depois de uma escrita, as leituras do mesmo cliente ficam no primário por
+# este tempo (cobre o atraso de replicação)
+REPLICA_PIN_SECONDS = 5
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -193,21 +236,56 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 # Cache Configuration
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django_redis.cache.RedisCache',
-#         'LOCATION': 'redis://127.0.0.1:6379/1',
-#         'OPTIONS': {
-#             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-#         }
-#     }
-# }
+# L2 compartilhado entre workers: Redis quando REDIS_URL está definido; sem ele
+# (desenvolvimento) um LocMem por processo faz o papel
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.InstrumentedRedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'brv',
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'SOCKET_CONNECT_TIMEOUT': 1,
+                'SOCKET_TIMEOUT': 1,
+            }
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.InstrumentedLocMemCache',
+            'KEY_PREFIX': 'brv',
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            }
+        }
+    }
+
+# L1 por processo + proteção contra stampede (core.cache.TieredCache)
+TIERED_CACHE = {
+    'ALIAS': 'default',
+    'L1_MAX_ENTRIES': 2048,
+    'L1_TIMEOUT': 5,      # segundos que um processo pode servir um valor já invalidado
+    'LOCK_TIMEOUT': 30,
+    'LOCK_WAIT': 2.0,
+    'STALE_GRACE': 60,
+}
+# HTML de cards de produto e blocos da navbar (core.services.fragment_service);
+# a chave já muda com o objeto, o TTL só limita o lixo de versões antigas
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 6
 
 # Session Configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+# cached_db: leitura pelo cache, gravação também no banco (sobrevive a
+# reinícios e à perda do cache)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_CACHE_ALIAS = 'default'
 SESSION_COOKIE_AGE = 86400 * 30  # 30 dias
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False  # Só grava quando a sessão muda (carrinho de visitante fica no banco)
 SESSION_EXPIRE_AT_BROWSER_CLOSE  = False
 
 # Internationalization
@@ -216,6 +294,10 @@ TIME_ZONE = 'America/Sao_Paulo'
 USE_I18N = True
 USE_L10N = True
 USE_TZ = True
+# Textos do site (static/i18n/<idioma>.json) renderizados no servidor por {% t %};
+# os arquivos são relidos quando mudam (mtime conferido a cada N segundos)
+I18N_DEFAULT_LANG = 'pt-BR'
+I18N_RELOAD_INTERVAL = 2
 
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
@@ -223,11 +305,39 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise (hash + compressão) e os arquivos gerados pelo projeto, como o
+# manifesto dos modais (core.storage.StaticFilesStorage)
+STATICFILES_STORAGE = 'core.storage.StaticFilesStorage'
+# Bundles por grupo de página gerados no collectstatic (core.services.asset_service)
+# e renderizados por {% asset_css %} / {% asset_js %} / {% asset_preload %}.
+# `fallback`: o que carregar sem bundle (o carregador original do main.js)
+ASSET_BUNDLES = {
+    'site': {'output': 'css/site.bundle.css', 'files': ['css/main.css']},
+    'auth': {'output': 'css/auth.bundle.css', 'files': ['css/auth.css']},
+    'home': {'output': 'css/home.bundle.css', 'files': ['css/home.css']},
+    'core': {
+        'output': 'js/core.bundle.js',
+        'files': [
+            'js/global.js', 'js/utils.js', 'js/message.js', 'js/notify.js', 'js/bindings.js',
+            'js/themes.js', 'js/translation.js', 'js/enchancer.js', 'js/main.js',
+        ],
+        'fallback': ['js/main.js'],
+        'i18n': True,  # um bundle por idioma de static/i18n, com o dicionário embutido
+    },
+}
+ASSET_BUNDLES_ENABLED = not DEBUG
+ASSET_BUNDLES_DEFAULT_LANG = I18N_DEFAULT_LANG
+# Cache do endpoint /modals/ (fallback sem collectstatic; revalida por ETag)
+MODALS_MANIFEST_MAX_AGE = 3600
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Sitemaps e feed de produtos gravados em MEDIA (seo/), um arquivo por faixa de ids
+SITEMAP_SHARD_SIZE = 10000
+# Admin de tabelas grandes (core.pagination): acima desta estimativa do Postgres
+# o changelist pagina pela estimativa em vez de um COUNT(*) exato
+ADMIN_EXACT_COUNT_THRESHOLD = 10000
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -251,6 +361,45 @@ LOGIN_NOTIFICATION_ENABLED = True
 MAX_LOGIN_ATTEMPTS = 5
 ACCOUNT_LOCKOUT_DURATION = 30  # minutos
 
+# Instrumentação (core.middleware.PerformanceMiddleware)
+PERFORMANCE_SERVER_TIMING = DEBUG
+PERFORMANCE_DUPLICATE_THRESHOLD = 3
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Máximo de consultas por view; excedentes vão para o log e falham em assertQueryBudget
+QUERY_BUDGETS = {
+    'core:home': 20,
+    'products:list': 15,
+    'products:category': 15,
+    'products:detail': 15,
+    'orders:cart_count': 3,
+    'product-list': 10,
+    'product-detail': 10,
+    'cart-current': 6,
+}
+
+# Retenção de dados (manage.py purge_expired); sobrescreve os padrões por política
+RETENTION_ARCHIVE_DIR = BASE_DIR / 'archive'
+RETENTION_POLICIES = {
+    # 'analytics_events': {'days': 365, 'archive': True},
+    # 'login_attempts': {'days': 30},
+}
+
+# CSS compilado dos temas: versões substituídas ficam no storage por este prazo
+# (segundos) antes do manage.py purge_theme_css apagá-las
+THEME_CSS_GRACE = 60 * 60 * 24 * 7
+
+# Webhooks de pagamento (payments.services.webhook_service): segredo HMAC-SHA256 por
+# provedor (slug de PaymentMethod.provider, o mesmo da URL), no formato
+# PAYMENT_WEBHOOK_SECRETS=mercado-pago:segredo,pagseguro:segredo.
+# Provedor sem segredo tem os webhooks recusados
+PAYMENT_WEBHOOK_SECRETS = {
+    provider.strip(): secret.strip()
+    for provider, _, secret in (
+        item.partition(':') for item in os.getenv('PAYMENT_WEBHOOK_SECRETS', '').split(',') if item.strip()
+    )
+    if secret.strip()
+}
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
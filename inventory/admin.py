@@ -4,6 +4,8 @@ from .models import *
 from django.utils.html import format_html
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from core.admin import LargeTableAdminMixin, RelatedIdFilter
+
 # Inventory Management
 @admin.register(Warehouse)
 class WarehouseAdmin(admin.ModelAdmin):
@@ -12,11 +14,29 @@ class WarehouseAdmin(admin.ModelAdmin):
     search_fields = ['name', 'code', 'city']
 
 @admin.register(InventoryItem)
-class InventoryItemAdmin(admin.ModelAdmin):
+class InventoryItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'product', 'warehouse', 'quantity_available', 
         'quantity_reserved', 'reorder_point', 'last_cost'
     ]
-    list_filter = ['warehouse', 'product__category']
+    list_filter = ['warehouse', ('product__category', RelatedIdFilter)]
+    list_select_related = ['product', 'variant__product', 'warehouse']
+    autocomplete_fields = ['product', 'warehouse']
+    raw_id_fields = ['variant', 'deleted_by']
     search_fields = ['product__name', 'product__sku', 'warehouse__name']
     readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = [
+        'inventory_item', 'movement_type', 'quantity_before',
+        'quantity_change', 'quantity_after', 'reference_type', 'reference_id', 'user', 'created_at'
+    ]
+    list_filter = ['movement_type', 'inventory_item__warehouse', ('inventory_item__product', RelatedIdFilter)]
+    list_select_related = [
+        'inventory_item__product', 'inventory_item__variant__product', 'inventory_item__warehouse', 'user'
+    ]
+    raw_id_fields = ['inventory_item', 'user', 'deleted_by']
+    search_fields = ['inventory_item__product__sku', 'reference_type']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'created_at'
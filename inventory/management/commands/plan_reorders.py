@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services.reorder_service import ReorderPlanner
+
+
+class Command(BaseCommand):
+    help = 'Calcula a reposição de estoque e gera pedidos de compra em rascunho por fornecedor/depósito'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history-days', type=int, default=28, help='Janela de histórico de vendas (dias)')
+        parser.add_argument('--horizon-days', type=int, default=14, help='Cobertura desejada (dias)')
+        parser.add_argument('--span', type=int, default=7, help='Span da média móvel exponencial')
+        parser.add_argument('--warehouse', type=str, help='Código do depósito')
+        parser.add_argument('--supplier', type=int, help='ID do fornecedor')
+        parser.add_argument('--chunk-size', type=int, default=ReorderPlanner.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Apenas exibe o plano, sem criar pedidos')
+
+    def handle(self, *args, **options):
+        from inventory.models import Warehouse
+
+        warehouse = None
+        if options['warehouse']:
+            try:
+                warehouse = Warehouse.objects.get(code=options['warehouse'])
+            except Warehouse.DoesNotExist:
+                raise CommandError(f"Depósito '{options['warehouse']}' não encontrado")
+
+        planner = ReorderPlanner(
+            history_days=options['history_days'],
+            horizon_days=options['horizon_days'],
+            span=options['span'],
+            warehouse=warehouse,
+            supplier=options['supplier'],
+            chunk_size=options['chunk_size'],
+        )
+        groups, orders = planner.run(dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            for (supplier_id, warehouse_id), lines in groups.items():
+                self.stdout.write(f'Fornecedor {supplier_id} / Depósito {warehouse_id}: {len(lines)} itens')
+                for line in lines:
+                    self.stdout.write(f"  {line['product_sku']}: {line['quantity']} un. ({line['velocity']}/dia)")
+
+        summary = ', '.join(f'{key}={value}' for key, value in planner.stats.items())
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services.supplier_sync_service import SupplierFeedSync
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza estoque e custos a partir do arquivo (CSV/CSV.GZ) de um fornecedor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Caminho do arquivo do fornecedor')
+        parser.add_argument('--supplier', type=int, help='ID do fornecedor (ignora SKUs de outros fornecedores)')
+        parser.add_argument('--warehouse', type=str, help='Código do depósito quando o arquivo não informa')
+        parser.add_argument('--delimiter', type=str, default=',')
+        parser.add_argument('--chunk-size', type=int, default=SupplierFeedSync.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta as alterações, sem gravar')
+
+    def handle(self, *args, **options):
+        from suppliers.models import Supplier
+
+        supplier = None
+        if options['supplier']:
+            try:
+                supplier = Supplier.objects.get(pk=options['supplier'])
+            except Supplier.DoesNotExist:
+                raise CommandError(f"Fornecedor {options['supplier']} não encontrado")
+
+        sync = SupplierFeedSync(
+            supplier=supplier,
+            warehouse=options['warehouse'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+        try:
+            stats = sync.run(options['path'], delimiter=options['delimiter'])
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo não encontrado: {options['path']}")
+
+        summary = ', '.join(f'{key}={value}' for key, value in stats.items())
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(f'{prefix}{summary}'))
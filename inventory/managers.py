@@ -1 +1,16 @@
+from django.db.models import F
 
+from models.managers import SoftDeleteManager, SoftDeleteQuerySet
+
+
+class InventoryItemQuerySet(SoftDeleteQuerySet):
+    def needs_reorder(self):
+        """Itens no ou abaixo do ponto de reposição, descontando o que já está em pedido"""
+        return self.filter(
+            reorder_point__gt=0,
+            quantity_available__lte=F('reorder_point') - F('quantity_on_order'),
+        )
+
+
+class InventoryItemManager(SoftDeleteManager.from_queryset(InventoryItemQuerySet)):
+    pass
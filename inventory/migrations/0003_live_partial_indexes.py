@@ -0,0 +1,21 @@
+# Generated by Django 4.2.21 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+from models.operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY (PostgreSQL) não roda dentro de transação
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0002_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['product', 'variant'], name='inventory_live_product_idx'),
+        ),
+    ]
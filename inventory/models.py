@@ -3,7 +3,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
-from models.base import BaseModel
+from models.base import BaseModel, live_index
+from .managers import InventoryItemManager
 
 User = get_user_model()
 
@@ -62,11 +63,17 @@ class InventoryItem(BaseModel):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
 
+    objects = InventoryItemManager()
+
     class Meta:
         verbose_name = 'Item de Estoque'
         verbose_name_plural = 'Itens de Estoque'
         unique_together = ['warehouse', 'product', 'variant']
         ordering = ['warehouse', 'product']
+        indexes = [
+            # Consultas por produto (o unique começa por depósito)
+            live_index('product', 'variant', name='inventory_live_product_idx'),
+        ]
 
     def __str__(self):
         product_name = self.variant.product.name if self.variant else self.product.name
@@ -0,0 +1,262 @@
+import logging
+import math
+import random
+import string
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from models.batching import keyset_chunks
+
+logger = logging.getLogger(__name__)
+
+
+def simple_moving_average(series):
+    return sum(series) / len(series) if series else 0.0
+
+
+def exponential_moving_average(series, span=7):
+    """EWMA iniciada pela média simples, para não depender do primeiro dia da série"""
+    if not series:
+        return 0.0
+    alpha = 2 / (span + 1)
+    value = simple_moving_average(series)
+    for point in series:
+        value = alpha * point + (1 - alpha) * value
+    return value
+
+
+class ReorderPlanner:
+    """
+    Planejamento de reposição para todos os pares SKU x depósito.
+
+    1. Candidatos vêm do SQL (`InventoryItem.objects.needs_reorder()`), em blocos keyset.
+    2. A demanda diária de cada bloco é agregada no banco a partir das
+       movimentações de venda do depósito; sem histórico de movimentação, usa a
+       demanda dos pedidos (OrderItem) do produto, dividida entre os depósitos.
+    3. A velocidade é a média móvel exponencial da série diária.
+    4. As sugestões são agrupadas em PurchaseOrders (rascunho) por fornecedor e
+       depósito, criados com bulk_create.
+    """
+    DEFAULT_CHUNK_SIZE = 5000
+    ORDER_STATUSES = ['confirmed', 'processing', 'shipped', 'delivered']
+
+    def __init__(self, history_days=28, horizon_days=14, span=7, warehouse=None, supplier=None, chunk_size=None, user=None):
+        self.history_days = history_days
+        self.horizon_days = horizon_days
+        self.span = span
+        self.warehouse = warehouse
+        self.supplier = supplier
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.user = user
+        self.today = timezone.localdate()
+        self.start = self.today - timedelta(days=history_days - 1)
+        self.start_at = timezone.make_aware(datetime.combine(self.start, time.min))
+        self.stats = dict.fromkeys(['candidates', 'planned', 'skipped_no_supplier', 'skipped_open_po', 'skipped_zero', 'purchase_orders'], 0)
+
+    def get_queryset(self):
+        from inventory.models import InventoryItem
+
+        queryset = InventoryItem.objects.needs_reorder().filter(
+            warehouse__is_active=True,
+            product__is_active=True,
+            product__track_inventory=True,
+        )
+        if self.warehouse:
+            queryset = queryset.filter(warehouse=self.warehouse)
+        if self.supplier:
+            queryset = queryset.filter(product__supplier=self.supplier)
+        return queryset.values(
+            'id', 'warehouse_id', 'product_id', 'variant_id',
+            'quantity_available', 'quantity_on_order', 'reorder_point', 'reorder_quantity', 'max_stock_level',
+            'last_cost', 'average_cost', 'product__supplier_id', 'product__name', 'product__sku',
+            'product__cost_price', 'variant__sku', 'variant__cost_price',
+        )
+
+    # region Demanda
+    def daily_index(self, day):
+        return (day - self.start).days
+
+    def movement_series(self, item_ids):
+        """Série diária de vendas por item de estoque (uma consulta por bloco)"""
+        from inventory.models import InventoryMovement
+
+        series = {}
+        for row in InventoryMovement.objects.filter(
+            inventory_item_id__in=item_ids,
+            movement_type='sale',
+            created_at__gte=self.start_at,
+        ).annotate(day=TruncDate('created_at')).values('inventory_item_id', 'day').annotate(
+            quantity=Sum('quantity_change')
+        ).order_by():
+            points = series.setdefault(row['inventory_item_id'], [0.0] * self.history_days)
+            index = self.daily_index(row['day'])
+            if 0 <= index < self.history_days:
+                points[index] += abs(row['quantity'] or 0)
+        return series
+
+    def order_series(self, product_ids):
+        """Série diária de vendas por (produto, variante) a partir dos pedidos"""
+        from orders.models import OrderItem
+
+        series = {}
+        for row in OrderItem.objects.filter(
+            product_id__in=product_ids,
+            order__status__in=self.ORDER_STATUSES,
+            order__created_at__gte=self.start_at,
+        ).annotate(day=TruncDate('order__created_at')).values('product_id', 'variant_id', 'day').annotate(
+            quantity=Sum('quantity')
+        ).order_by():
+            points = series.setdefault((row['product_id'], row['variant_id']), [0.0] * self.history_days)
+            index = self.daily_index(row['day'])
+            if 0 <= index < self.history_days:
+                points[index] += row['quantity'] or 0
+        return series
+
+    def warehouses_per_sku(self, product_ids):
+        from inventory.models import InventoryItem
+
+        return {
+            (row['product_id'], row['variant_id']): row['total']
+            for row in InventoryItem.objects.filter(product_id__in=product_ids, warehouse__is_active=True).values(
+                'product_id', 'variant_id'
+            ).annotate(total=Count('id')).order_by()
+        }
+
+    def velocities(self, rows):
+        """Unidades/dia previstas para cada item do bloco"""
+        movement = self.movement_series([row['id'] for row in rows])
+        missing = [row for row in rows if row['id'] not in movement]
+
+        velocity = {
+            item_id: exponential_moving_average(points, self.span)
+            for item_id, points in movement.items()
+        }
+
+        if missing:
+            product_ids = {row['product_id'] for row in missing}
+            orders = self.order_series(product_ids)
+            shares = self.warehouses_per_sku(product_ids)
+            for row in missing:
+                key = (row['product_id'], row['variant_id'])
+                points = orders.get(key)
+                velocity[row['id']] = exponential_moving_average(points, self.span) / max(shares.get(key, 1), 1) if points else 0.0
+        return velocity
+    # endregion
+
+    # region Quantidades
+    def suggested_quantity(self, row, velocity):
+        position = row['quantity_available'] + row['quantity_on_order']
+        forecast = velocity * self.horizon_days
+        quantity = max(math.ceil(row['reorder_point'] + forecast - position), row['reorder_quantity'])
+        if row['max_stock_level']:
+            quantity = min(quantity, row['max_stock_level'] - position)
+        return max(quantity, 0)
+
+    @staticmethod
+    def unit_cost(row):
+        for value in (row['last_cost'], row['average_cost'], row['variant__cost_price'], row['product__cost_price']):
+            if value:
+                return value
+        return Decimal('0.00')
+
+    def open_po_keys(self, rows):
+        """(depósito, produto, variante) que já estão em um PO em rascunho"""
+        from suppliers.models import PurchaseOrderItem
+
+        return set(PurchaseOrderItem.objects.filter(
+            purchase_order__status='draft',
+            purchase_order__warehouse_id__in={row['warehouse_id'] for row in rows},
+            product_id__in={row['product_id'] for row in rows},
+        ).values_list('purchase_order__warehouse_id', 'product_id', 'variant_id'))
+    # endregion
+
+    def plan(self):
+        """Gera as linhas sugeridas agrupadas por (fornecedor, depósito)"""
+        groups = defaultdict(list)
+        for rows in keyset_chunks(self.get_queryset(), self.chunk_size):
+            self.stats['candidates'] += len(rows)
+            velocity = self.velocities(rows)
+            open_keys = self.open_po_keys(rows)
+
+            for row in rows:
+                if not row['product__supplier_id']:
+                    self.stats['skipped_no_supplier'] += 1
+                    continue
+                if (row['warehouse_id'], row['product_id'], row['variant_id']) in open_keys:
+                    self.stats['skipped_open_po'] += 1
+                    continue
+                quantity = self.suggested_quantity(row, velocity[row['id']])
+                if not quantity:
+                    self.stats['skipped_zero'] += 1
+                    continue
+                groups[(row['product__supplier_id'], row['warehouse_id'])].append({
+                    'product_id': row['product_id'],
+                    'variant_id': row['variant_id'],
+                    'product_name': row['product__name'],
+                    'product_sku': row['variant__sku'] or row['product__sku'],
+                    'quantity': quantity,
+                    'unit_cost': self.unit_cost(row),
+                    'velocity': round(velocity[row['id']], 3),
+                })
+                self.stats['planned'] += 1
+        return groups
+
+    @staticmethod
+    def generate_po_number():
+        prefix = timezone.now().strftime('%Y%m%d')
+        suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+        return f'PO-{prefix}-{suffix}'
+
+    def create_purchase_orders(self, groups):
+        """Cria os POs em rascunho e seus itens em lote"""
+        from suppliers.models import PurchaseOrder, PurchaseOrderItem
+
+        if not groups:
+            return []
+
+        with transaction.atomic():
+            orders = []
+            for (supplier_id, warehouse_id), lines in groups.items():
+                subtotal = sum((line['unit_cost'] * line['quantity'] for line in lines), Decimal('0.00'))
+                orders.append(PurchaseOrder(
+                    supplier_id=supplier_id,
+                    warehouse_id=warehouse_id,
+                    po_number=self.generate_po_number(),
+                    status='draft',
+                    subtotal=subtotal,
+                    total_amount=subtotal,
+                    notes='Gerado automaticamente pelo planejador de reposição',
+                    created_by=self.user,
+                ))
+            PurchaseOrder.objects.bulk_create(orders, batch_size=self.chunk_size)
+
+            items = []
+            for order, lines in zip(orders, groups.values()):
+                for line in lines:
+                    items.append(PurchaseOrderItem(
+                        purchase_order=order,
+                        product_id=line['product_id'],
+                        variant_id=line['variant_id'],
+                        quantity_ordered=line['quantity'],
+                        unit_cost=line['unit_cost'],
+                        total_cost=line['unit_cost'] * line['quantity'],
+                        product_name=line['product_name'],
+                        product_sku=line['product_sku'],
+                    ))
+            PurchaseOrderItem.objects.bulk_create(items, batch_size=self.chunk_size)
+
+        self.stats['purchase_orders'] += len(orders)
+        logger.info('Planejamento de reposição: %s', self.stats)
+        return orders
+
+    def run(self, dry_run=False):
+        groups = self.plan()
+        if dry_run:
+            return groups, []
+        return groups, self.create_purchase_orders(groups)
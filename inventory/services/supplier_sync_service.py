@@ -0,0 +1,314 @@
+import csv
+import gzip
+import hashlib
+import io
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+
+class SupplierFeedSync:
+    """
+    Sincroniza estoque e custos a partir do arquivo de um fornecedor.
+
+    O arquivo (CSV, opcionalmente .gz) é lido em blocos. Para cada bloco as
+    linhas atuais de InventoryItem são carregadas numa única consulta e
+    comparadas com o feed por um hash dos campos relevantes; apenas as linhas
+    alteradas são gravadas (bulk_update/bulk_create) e geram movimentações.
+    Linhas com soft delete entram na comparação (o unique de depósito/produto/
+    variante vale para elas também) e são restauradas como se fossem novas.
+
+    Colunas aceitas: sku, warehouse (código, opcional), quantity, cost,
+    quantity_on_order (opcional). Campos ausentes mantêm o valor atual.
+    """
+    DEFAULT_CHUNK_SIZE = 1000
+    UPDATE_FIELDS = ['quantity_available', 'quantity_on_order', 'last_cost', 'average_cost', 'updated_at']
+    RESTORE_FIELDS = UPDATE_FIELDS + ['is_deleted', 'deleted_at', 'deleted_by']
+
+    def __init__(self, supplier=None, warehouse=None, chunk_size=None, dry_run=False, user=None):
+        self.supplier = supplier
+        self.default_warehouse = warehouse
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.dry_run = dry_run
+        self.user = user
+        self.stats = dict.fromkeys(['rows', 'unchanged', 'updated', 'created', 'restored', 'movements', 'unknown_sku', 'unknown_warehouse', 'foreign', 'invalid'], 0)
+        self._warehouses = None
+
+    # region Leitura
+    @staticmethod
+    def open_feed(path):
+        if str(path).endswith('.gz'):
+            return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8-sig', newline='')
+        return open(path, encoding='utf-8-sig', newline='')
+
+    def run(self, path, delimiter=','):
+        with self.open_feed(path) as handle:
+            return self.sync_rows(csv.DictReader(handle, delimiter=delimiter))
+
+    def sync_rows(self, rows):
+        """Processa um iterável de dicts (linhas do feed) em blocos"""
+        chunk = []
+        for row in rows:
+            self.stats['rows'] += 1
+            parsed = self.parse_row(row)
+            if parsed is None:
+                self.stats['invalid'] += 1
+                continue
+            chunk.append(parsed)
+            if len(chunk) >= self.chunk_size:
+                self.apply_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.apply_chunk(chunk)
+
+        logger.info('Sincronização de feed concluída: %s', self.stats)
+        return self.stats
+
+    def parse_row(self, row):
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        sku = row.get('sku')
+        if not sku:
+            return None
+        try:
+            return {
+                'sku': sku,
+                'warehouse': row.get('warehouse') or None,
+                'quantity': int(row['quantity']) if row.get('quantity') else None,
+                'cost': Decimal(row['cost']).quantize(CENT) if row.get('cost') else None,
+                'quantity_on_order': int(row['quantity_on_order']) if row.get('quantity_on_order') else None,
+            }
+        except (ValueError, InvalidOperation):
+            return None
+    # endregion
+
+    # region Comparação
+    @staticmethod
+    def fingerprint(quantity, cost, quantity_on_order):
+        """Hash dos campos sincronizados, usado para detectar linhas alteradas"""
+        cost = '' if cost is None else str(Decimal(cost).quantize(CENT))
+        raw = f'{quantity}|{cost}|{quantity_on_order}'.encode()
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def get_warehouses(self):
+        if self._warehouses is None:
+            from inventory.models import Warehouse
+            self._warehouses = dict(Warehouse.objects.filter(is_active=True).values_list('code', 'id'))
+        return self._warehouses
+
+    def resolve_skus(self, skus):
+        """SKU -> (product_id, variant_id, supplier_id) em duas consultas por bloco"""
+        from products.models import Product, ProductVariant
+
+        resolved = {}
+        for sku, product_id, supplier_id in Product.objects.filter(sku__in=skus).values_list('sku', 'id', 'supplier_id'):
+            resolved[sku] = (product_id, None, supplier_id)
+        for sku, variant_id, product_id, supplier_id in ProductVariant.objects.filter(sku__in=skus).values_list(
+            'sku', 'id', 'product_id', 'product__supplier_id'
+        ):
+            resolved[sku] = (product_id, variant_id, supplier_id)
+        return resolved
+    # endregion
+
+    # region Aplicação
+    def apply_chunk(self, chunk):
+        from inventory.models import InventoryItem
+
+        warehouses = self.get_warehouses()
+        resolved = self.resolve_skus({row['sku'] for row in chunk})
+        supplier_id = getattr(self.supplier, 'pk', self.supplier)
+
+        # Resolve cada linha para a chave (warehouse, product, variant)
+        keyed = {}
+        for row in chunk:
+            code = row['warehouse'] or self.default_warehouse
+            warehouse_id = warehouses.get(code)
+            if warehouse_id is None:
+                self.stats['unknown_warehouse'] += 1
+                continue
+            if row['sku'] not in resolved:
+                self.stats['unknown_sku'] += 1
+                continue
+            product_id, variant_id, product_supplier = resolved[row['sku']]
+            if supplier_id and product_supplier != supplier_id:
+                self.stats['foreign'] += 1
+                continue
+            keyed[(warehouse_id, product_id, variant_id)] = row
+
+        if not keyed:
+            return
+
+        with transaction.atomic():
+            current = {}
+            for item in InventoryItem._base_manager.select_for_update().filter(
+                warehouse_id__in={key[0] for key in keyed},
+                product_id__in={key[1] for key in keyed},
+            ).values('id', 'warehouse_id', 'product_id', 'variant_id', 'quantity_available', 'quantity_on_order', 'last_cost', 'average_cost', 'deleted_at'):
+                key = (item['warehouse_id'], item['product_id'], item['variant_id'])
+                if key in keyed:
+                    current[key] = item
+
+            changed, missing, deleted = [], [], []
+            for key, row in keyed.items():
+                item = current.get(key)
+                if item is None:
+                    missing.append((key, row))
+                    continue
+                if item['deleted_at'] is not None:
+                    deleted.append((item, row))
+                    continue
+                target = self.target_values(row, item)
+                if self.fingerprint(*target) == self.fingerprint(item['quantity_available'], item['last_cost'], item['quantity_on_order']):
+                    self.stats['unchanged'] += 1
+                    continue
+                changed.append((item, target))
+
+            if self.dry_run:
+                self.stats['updated'] += len(changed)
+                self.stats['created'] += len(missing)
+                self.stats['restored'] += len(deleted)
+                transaction.set_rollback(True)
+                return
+
+            movements = self.update_items(changed)
+            movements += self.restore_items(deleted)
+            movements += self.create_items(missing)
+            self.create_movements(movements)
+
+    @staticmethod
+    def target_values(row, item):
+        return (
+            item['quantity_available'] if row['quantity'] is None else row['quantity'],
+            item['last_cost'] if row['cost'] is None else row['cost'],
+            item['quantity_on_order'] if row['quantity_on_order'] is None else row['quantity_on_order'],
+        )
+
+    @staticmethod
+    def weighted_average_costs(quantities, averages, deltas, costs):
+        """
+        Custo médio ponderado calculado em lote (colunas paralelas).
+        Só entradas de estoque (delta > 0) com custo conhecido alteram a média.
+        """
+        result = []
+        for quantity, average, delta, cost in zip(quantities, averages, deltas, costs):
+            if cost is None or delta <= 0:
+                result.append(average)
+            elif average is None or quantity <= 0:
+                result.append(cost)
+            else:
+                result.append(((quantity * average + delta * cost) / (quantity + delta)).quantize(CENT))
+        return result
+
+    def update_items(self, changed):
+        from inventory.models import InventoryItem
+
+        if not changed:
+            return []
+
+        now = timezone.now()
+        quantities = [item['quantity_available'] for item, _ in changed]
+        deltas = [target[0] - item['quantity_available'] for item, target in changed]
+        averages = self.weighted_average_costs(
+            quantities,
+            [item['average_cost'] for item, _ in changed],
+            deltas,
+            [target[1] for _, target in changed],
+        )
+
+        objs, movements = [], []
+        for (item, (quantity, cost, on_order)), average, delta in zip(changed, averages, deltas):
+            objs.append(InventoryItem(
+                id=item['id'],
+                quantity_available=quantity,
+                quantity_on_order=on_order,
+                last_cost=cost,
+                average_cost=average,
+                updated_at=now,
+            ))
+            if delta:
+                movements.append((item['id'], item['quantity_available'], delta, cost))
+
+        InventoryItem.objects.bulk_update(objs, self.UPDATE_FIELDS, batch_size=self.chunk_size)
+        self.stats['updated'] += len(objs)
+        return movements
+
+    def restore_items(self, deleted):
+        """
+        Restaura linhas com soft delete presentes no feed. O estoque que elas
+        tinham já não contava, então recomeçam como uma linha nova.
+        """
+        from inventory.models import InventoryItem
+
+        if not deleted:
+            return []
+
+        now = timezone.now()
+        objs = [
+            InventoryItem(
+                id=item['id'],
+                quantity_available=row['quantity'] or 0,
+                quantity_on_order=row['quantity_on_order'] or 0,
+                last_cost=row['cost'],
+                average_cost=row['cost'],
+                updated_at=now,
+                is_deleted=False,
+                deleted_at=None,
+                deleted_by=None,
+            )
+            for item, row in deleted
+        ]
+        # O manager padrão esconde as linhas deletadas (e o bulk_update filtra por ele)
+        InventoryItem._base_manager.bulk_update(objs, self.RESTORE_FIELDS, batch_size=self.chunk_size)
+        self.stats['restored'] += len(objs)
+        return [(obj.id, 0, obj.quantity_available, obj.last_cost) for obj in objs if obj.quantity_available]
+
+    def create_items(self, missing):
+        from inventory.models import InventoryItem
+
+        if not missing:
+            return []
+
+        objs = [
+            InventoryItem(
+                warehouse_id=warehouse_id,
+                product_id=product_id,
+                variant_id=variant_id,
+                quantity_available=row['quantity'] or 0,
+                quantity_on_order=row['quantity_on_order'] or 0,
+                last_cost=row['cost'],
+                average_cost=row['cost'],
+            )
+            for (warehouse_id, product_id, variant_id), row in missing
+        ]
+        InventoryItem.objects.bulk_create(objs, batch_size=self.chunk_size)
+        self.stats['created'] += len(objs)
+        return [(obj.id, 0, obj.quantity_available, obj.last_cost) for obj in objs if obj.quantity_available]
+
+    def create_movements(self, movements):
+        from inventory.models import InventoryMovement
+
+        if not movements:
+            return
+
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                inventory_item_id=item_id,
+                movement_type='adjustment',
+                reference_type='supplier_feed',
+                reference_id=getattr(self.supplier, 'pk', self.supplier),
+                quantity_before=before,
+                quantity_change=delta,
+                quantity_after=before + delta,
+                unit_cost=cost,
+                notes='Sincronização de feed do fornecedor',
+                user=self.user,
+            )
+            for item_id, before, delta, cost in movements
+        ], batch_size=self.chunk_size)
+        self.stats['movements'] += len(movements)
+    # endregion
@@ -1,3 +1,155 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import Product
+from suppliers.models import PurchaseOrder, Supplier
+
+from .models import InventoryItem, InventoryMovement, Warehouse
+from .services.reorder_service import ReorderPlanner, exponential_moving_average, simple_moving_average
+from .services.supplier_sync_service import SupplierFeedSync
+
+ADDRESS = {'postal_code': '01310-100', 'city': 'São Paulo', 'state': 'SP'}
+
+
+def days_ago(days):
+    return timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=days), time(12)))
+
+
+class SupplierFeedSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warehouse = Warehouse.objects.create(name='Central', code='CD1')
+        cls.products = [
+            Product.objects.create(name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'))
+            for i in range(3)
+        ]
+
+    def sync(self, rows):
+        return SupplierFeedSync(warehouse='CD1').sync_rows(rows)
+
+    def item(self, product):
+        return InventoryItem.objects.with_deleted().get(warehouse=self.warehouse, product=product)
+
+    def test_only_changed_rows_are_written(self):
+        InventoryItem.objects.create(warehouse=self.warehouse, product=self.products[0], quantity_available=5, last_cost=Decimal('4.00'), average_cost=Decimal('4.00'))
+        InventoryItem.objects.create(warehouse=self.warehouse, product=self.products[1], quantity_available=7, last_cost=Decimal('3.00'))
+
+        stats = self.sync([
+            {'sku': 'SKU-0', 'quantity': '10', 'cost': '6.00'},
+            {'sku': 'SKU-1', 'quantity': '7', 'cost': '3'},
+            {'sku': 'SKU-2', 'quantity': '2'},
+            {'sku': 'NAO-EXISTE', 'quantity': '1'},
+        ])
+
+        self.assertEqual(
+            [stats[key] for key in ('updated', 'unchanged', 'created', 'unknown_sku', 'movements')],
+            [1, 1, 1, 1, 2],
+        )
+        item = self.item(self.products[0])
+        self.assertEqual((item.quantity_available, item.average_cost), (10, Decimal('5.00')))
+        self.assertEqual(self.item(self.products[2]).quantity_available, 2)
+
+    def test_soft_deleted_rows_are_restored(self):
+        deleted = InventoryItem.objects.create(warehouse=self.warehouse, product=self.products[0], quantity_available=50, last_cost=Decimal('9.00'))
+        deleted.delete()
+
+        stats = self.sync([{'sku': 'SKU-0', 'quantity': '4', 'cost': '2.00'}])
+
+        self.assertEqual((stats['restored'], stats['created']), (1, 0))
+        item = self.item(self.products[0])
+        self.assertEqual(item.pk, deleted.pk)
+        self.assertFalse(item.is_deleted)
+        self.assertEqual((item.quantity_available, item.average_cost), (4, Decimal('2.00')))
+        self.assertEqual(InventoryMovement.objects.get(inventory_item=item).quantity_change, 4)
+
+
+class MovingAverageTests(SimpleTestCase):
+    def test_simple_and_exponential_averages(self):
+        self.assertEqual(simple_moving_average([]), 0.0)
+        self.assertEqual(simple_moving_average([0, 0, 0, 4]), 1.0)
+        # alpha = 2 / (3 + 1) = 0.5, partindo da média simples (1.0): 0.5, 0.25, 0.125, 2.0625
+        self.assertAlmostEqual(exponential_moving_average([0, 0, 0, 4], span=3), 2.0625)
+        self.assertAlmostEqual(exponential_moving_average([2, 2, 2], span=7), 2.0)
+        self.assertEqual(exponential_moving_average([], span=3), 0.0)
+
+
+class ReorderPlannerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supplier = Supplier.objects.create(company_name='Fornecedor')
+        cls.central = Warehouse.objects.create(name='Central', code='CD1')
+        cls.north = Warehouse.objects.create(name='Norte', code='CD2')
+        cls.product = Product.objects.create(name='Produto', slug='produto', sku='SKU-1', price=Decimal('10.00'), supplier=cls.supplier)
+        cls.orphan = Product.objects.create(name='Sem fornecedor', slug='sem-fornecedor', sku='SKU-2', price=Decimal('10.00'))
+
+        # Central: vendas registradas no estoque (série [0, 0, 0, 4])
+        cls.central_item = InventoryItem.objects.create(
+            warehouse=cls.central, product=cls.product, quantity_available=5, reorder_point=10, last_cost=Decimal('4.00'),
+        )
+        sale = InventoryMovement.objects.create(
+            inventory_item=cls.central_item, movement_type='sale', quantity_before=9, quantity_change=-4, quantity_after=5,
+        )
+        InventoryMovement.objects.filter(pk=sale.pk).update(created_at=days_ago(0))
+
+        # Norte: sem movimentação; usa os pedidos do produto (série [0, 0, 8, 0]) dividida entre os 2 depósitos
+        cls.north_item = InventoryItem.objects.create(
+            warehouse=cls.north, product=cls.product, quantity_available=0, quantity_on_order=2,
+            reorder_point=4, reorder_quantity=5, max_stock_level=12,
+        )
+        order = Order.objects.create(
+            status='confirmed', billing_address=ADDRESS, shipping_address=ADDRESS,
+            subtotal=Decimal('80.00'), total_amount=Decimal('80.00'),
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=days_ago(1))
+        OrderItem.objects.create(
+            order=order, product=cls.product, product_name='Produto', product_sku='SKU-1',
+            quantity=8, unit_price=Decimal('10.00'), total_price=Decimal('80.00'),
+        )
+
+        InventoryItem.objects.create(warehouse=cls.central, product=cls.orphan, quantity_available=0, reorder_point=3)
+        # Acima do ponto de reposição (descontando o que está em pedido): fora do plano
+        InventoryItem.objects.create(warehouse=cls.north, product=cls.orphan, quantity_available=2, quantity_on_order=2, reorder_point=3)
+
+    def planner(self):
+        return ReorderPlanner(history_days=4, horizon_days=10, span=3)
+
+    def test_needs_reorder_discounts_quantity_on_order(self):
+        self.assertEqual(
+            set(InventoryItem.objects.needs_reorder().values_list('warehouse__code', 'product__sku')),
+            {('CD1', 'SKU-1'), ('CD2', 'SKU-1'), ('CD1', 'SKU-2')},
+        )
+
+    def test_quantities_from_the_demand_history(self):
+        planner = self.planner()
+        groups, orders = planner.run(dry_run=True)
+
+        lines = {
+            warehouse_id: line
+            for (_, warehouse_id), group in groups.items() for line in group
+        }
+        # Central: ceil(ponto 10 + 2.0625 * 10 dias - posição 5) = 26
+        self.assertEqual((lines[self.central.pk]['quantity'], lines[self.central.pk]['velocity']), (26, 2.062))
+        self.assertEqual(lines[self.central.pk]['unit_cost'], Decimal('4.00'))
+        # Norte: 2.125 / 2 depósitos; ceil(4 + 10.625 - 2) = 13, limitado ao máximo 12 - 2 = 10
+        self.assertEqual((lines[self.north.pk]['quantity'], lines[self.north.pk]['velocity']), (10, 1.062))
+        self.assertEqual(orders, [])
+        self.assertEqual(
+            [planner.stats[key] for key in ('candidates', 'planned', 'skipped_no_supplier')],
+            [3, 2, 1],
+        )
+
+    def test_purchase_orders_are_created_once(self):
+        _, orders = self.planner().run()
+
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(
+            sorted(PurchaseOrder.objects.values_list('warehouse__code', 'items__quantity_ordered', 'status')),
+            [('CD1', 26, 'draft'), ('CD2', 10, 'draft')],
+        )
+        planner = self.planner()
+        self.assertEqual(planner.run()[1], [])
+        self.assertEqual(planner.stats['skipped_open_po'], 2)
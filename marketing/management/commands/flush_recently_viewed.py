@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from marketing.services.recently_viewed_service import RecentlyViewedService
+
+
+class Command(BaseCommand):
+    help = 'Grava no banco os produtos vistos recentemente (cache) e apara o histórico'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--trim', action='store_true', help='Também remove o que passou do limite por usuário/sessão')
+        parser.add_argument('--limit', type=int, default=RecentlyViewedService.LIMIT)
+        parser.add_argument('--loop', action='store_true', help='Executa continuamente')
+        parser.add_argument('--interval', type=float, default=30.0, help='Segundos entre execuções no modo --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = RecentlyViewedService.flush(batch_size=options['batch_size'])
+            if options['trim']:
+                stats['trimmed'] = RecentlyViewedService.trim(limit=options['limit'])
+            self.stdout.write(self.style.SUCCESS(', '.join(f'{key}={value}' for key, value in stats.items())))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -1 +1,22 @@
+from models.managers import SoftDeleteManager, SoftDeleteQuerySet
 
+
+class CouponQuerySet(SoftDeleteQuerySet):
+    # Colunas que não mudam as regras compiladas (o esgotamento é tratado pelo redeem/release)
+    USAGE_FIELDS = {'used_count', 'updated_at'}
+
+    def update(self, **kwargs):
+        """
+        UPDATEs em massa (soft_delete, restore, ações do admin) não disparam os
+        signals do modelo; invalida as regras de cupons aqui.
+        """
+        from marketing.services.coupon_service import CouponService
+
+        updated = super().update(**kwargs)
+        if updated and set(kwargs) - self.USAGE_FIELDS:
+            CouponService.invalidate()
+        return updated
+
+
+class CouponManager(SoftDeleteManager.from_queryset(CouponQuerySet)):
+    pass
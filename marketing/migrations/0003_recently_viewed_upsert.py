@@ -0,0 +1,46 @@
+# Generated by Django 4.2.21 on 2026-10-19 11:37
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.utils.timezone
+
+
+def dedupe_recently_viewed(apps, schema_editor):
+    """Uma linha por (usuário, produto) e por (sessão, produto): a de maior (viewed_at, id)"""
+    RecentlyViewedProduct = apps.get_model('marketing', 'RecentlyViewedProduct')
+    rows = RecentlyViewedProduct.objects.using(schema_editor.connection.alias)
+
+    for owner in ('user', 'session_key'):
+        duplicates = rows.filter(**{f'{owner}__isnull': False}).values(owner, 'product').annotate(
+            total=Count('id'),
+        ).filter(total__gt=1).order_by()
+        for duplicate in list(duplicates):
+            stale = list(rows.filter(**{owner: duplicate[owner], 'product': duplicate['product']}).order_by(
+                '-viewed_at', '-id',
+            ).values_list('id', flat=True)[1:])
+            rows.filter(id__in=stale).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing', '0002_initial'),
+    ]
+
+    operations = [
+        # Remove duplicatas do histórico append-only, mantendo a visita mais recente
+        migrations.RunPython(dedupe_recently_viewed, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='recentlyviewedproduct',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Visitado em'),
+        ),
+        migrations.AddConstraint(
+            model_name='recentlyviewedproduct',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_recently_viewed_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='recentlyviewedproduct',
+            constraint=models.UniqueConstraint(fields=('session_key', 'product'), name='unique_recently_viewed_session'),
+        ),
+    ]
@@ -1,8 +1,11 @@
 from django.db import models
+from django.utils import timezone
 from django.db.models import JSONField
 from django.contrib.postgres.indexes import GinIndex
 from models.base import BaseModel
 
+from .managers import CouponManager
+
 class EmailCampaign(BaseModel):
     """Campanhas de email marketing"""
     TARGET_AUDIENCES = [
@@ -69,6 +72,8 @@ class Coupon(BaseModel):
     usage_limit = models.PositiveIntegerField(default=1)
     used_count = models.PositiveIntegerField(default=0)
     date_created = models.DateTimeField(auto_now_add=True)
+
+    objects = CouponManager()
     
     def __str__(self):
         return self.code
@@ -117,7 +122,7 @@ class RecentlyViewedProduct(BaseModel):
     user = models.ForeignKey('users.User', on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField('Chave da Sessão', max_length=100, null=True, blank=True)
     product = models.ForeignKey('products.Product', on_delete=models.CASCADE)
-    viewed_at = models.DateTimeField('Visitado em', auto_now_add=True)
+    viewed_at = models.DateTimeField('Visitado em', default=timezone.now)
     
     class Meta:
         verbose_name = 'Produto Visitado Recentemente'
@@ -130,7 +135,10 @@ class RecentlyViewedProduct(BaseModel):
             models.CheckConstraint(
                 check=models.Q(user__isnull=False) | models.Q(session_key__isnull=False),
                 name='user_or_session_required'
-            )
+            ),
+            # Uma linha por produto (upsert do viewed_at); NULLs não conflitam
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_recently_viewed_user'),
+            models.UniqueConstraint(fields=['session_key', 'product'], name='unique_recently_viewed_session'),
         ]
 
 class CustomerSegment(BaseModel):
@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+CompiledCoupon = namedtuple('CompiledCoupon', [
+    'id', 'code', 'discount_type', 'discount_value', 'minimum_order_value',
+    'valid_from', 'valid_to', 'usage_limit', 'exhausted',
+])
+
+
+class CouponResult:
+    """Resultado da avaliação de um cupom contra um carrinho/valor"""
+
+    def __init__(self, valid, message='', coupon=None, discount=Decimal('0.00'), reason=''):
+        self.valid = valid
+        self.message = message
+        self.coupon = coupon
+        self.discount = discount
+        self.reason = reason
+
+    def __bool__(self):
+        return self.valid
+
+    def as_dict(self):
+        return {
+            'valid': self.valid,
+            'message': self.message,
+            'reason': self.reason,
+            'code': self.coupon.code if self.coupon else None,
+            'discount': self.discount,
+        }
+
+
+class CouponService:
+    """
+    Regras de cupons compiladas em memória.
+
+    Os cupons ativos ficam num mapa código -> CompiledCoupon por processo. Uma
+    versão no cache compartilhado (`coupons:version`) é incrementada a cada
+    alteração de cupom (signals) e quando um cupom esgota; cada processo
+    confere a versão no máximo a cada CHECK_INTERVAL segundos e só então
+    recompila (uma consulta). A avaliação é Python puro; o uso é garantido
+    na redenção por um UPDATE condicional com F().
+    """
+    VERSION_KEY = 'coupons:version'
+    CHECK_INTERVAL = 5
+    _rules = None
+    _version = None
+    _checked_at = 0
+    _lock = threading.Lock()
+
+    # region Cache
+    @classmethod
+    def current_version(cls):
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            version = time.time_ns()
+            cache.add(cls.VERSION_KEY, version, timeout=None)
+            version = cache.get(cls.VERSION_KEY, version)
+        return version
+
+    @classmethod
+    def invalidate(cls):
+        """Nova versão para todos os processos (chamado pelos signals)"""
+        cache.set(cls.VERSION_KEY, time.time_ns(), timeout=None)
+        cls._checked_at = 0
+
+    @classmethod
+    def compile(cls):
+        from marketing.models import Coupon
+
+        rules = {}
+        for row in Coupon.objects.filter(is_active=True, valid_to__gte=timezone.now()).values(
+            'id', 'code', 'discount_type', 'discount_value', 'minimum_order_value',
+            'valid_from', 'valid_to', 'usage_limit', 'used_count',
+        ):
+            rules[row['code'].upper()] = CompiledCoupon(
+                id=row['id'],
+                code=row['code'],
+                discount_type=row['discount_type'],
+                discount_value=row['discount_value'],
+                minimum_order_value=row['minimum_order_value'] or Decimal('0.00'),
+                valid_from=row['valid_from'],
+                valid_to=row['valid_to'],
+                usage_limit=row['usage_limit'],
+                exhausted=bool(row['usage_limit']) and row['used_count'] >= row['usage_limit'],
+            )
+        return rules
+
+    @classmethod
+    def get_rules(cls):
+        now = time.monotonic()
+        if cls._rules is not None and now - cls._checked_at < cls.CHECK_INTERVAL:
+            return cls._rules
+
+        with cls._lock:
+            version = cls.current_version()
+            if cls._rules is None or version != cls._version:
+                cls._rules = cls.compile()
+                cls._version = version
+                logger.debug('Cupons recompilados (versão %s): %d ativos', version, len(cls._rules))
+            cls._checked_at = now
+        return cls._rules
+    # endregion
+
+    # region Avaliação
+    @staticmethod
+    def calculate_discount(coupon, subtotal):
+        if coupon.discount_type == 'percentage':
+            discount = subtotal * coupon.discount_value / Decimal('100')
+        else:
+            discount = coupon.discount_value
+        return min(discount, subtotal).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    @classmethod
+    def evaluate(cls, code, subtotal=None, now=None):
+        """
+        Valida o cupom e calcula o desconto sem acessar o banco. Sem
+        `subtotal`, valida apenas o cupom (vigência e disponibilidade).
+        """
+        coupon = cls.get_rules().get((code or '').strip().upper())
+        if coupon is None:
+            return CouponResult(False, 'Cupom inválido.', reason='invalid')
+
+        now = now or timezone.now()
+        if coupon.valid_from and coupon.valid_from > now:
+            return CouponResult(False, 'Cupom ainda não está vigente.', coupon, reason='not_started')
+        if coupon.valid_to and coupon.valid_to < now:
+            return CouponResult(False, 'Cupom expirado.', coupon, reason='expired')
+        if coupon.exhausted:
+            return CouponResult(False, 'Cupom esgotado.', coupon, reason='exhausted')
+        if subtotal is None:
+            return CouponResult(True, 'Cupom válido.', coupon)
+
+        subtotal = Decimal(subtotal)
+        if subtotal < coupon.minimum_order_value:
+            return CouponResult(
+                False, f'Pedido mínimo de R$ {coupon.minimum_order_value:.2f} para este cupom.', coupon, reason='minimum_order_value',
+            )
+        return CouponResult(True, 'Cupom aplicado.', coupon, cls.calculate_discount(coupon, subtotal))
+
+    @classmethod
+    def evaluate_cart(cls, code, cart):
+        """Avalia contra um Cart; o subtotal vem de um único aggregate"""
+        from django.db.models import Sum
+
+        subtotal = cart.items.aggregate(total=Sum(F('unit_price') * F('quantity')))['total'] or Decimal('0.00')
+        return cls.evaluate(code, subtotal)
+    # endregion
+
+    # region Redenção
+    @classmethod
+    def redeem(cls, code, subtotal=None):
+        """
+        Consome um uso do cupom. O UPDATE só acontece se ainda houver saldo
+        (`used_count < usage_limit`), então chamadas concorrentes nunca passam
+        do limite. Retorna o CouponResult (com desconto, se `subtotal`).
+        """
+        from marketing.models import Coupon
+
+        result = cls.evaluate(code, subtotal)
+        if not result:
+            return result
+
+        coupon = result.coupon
+        updated = Coupon.objects.filter(id=coupon.id, is_active=True).filter(
+            Q(usage_limit=0) | Q(used_count__lt=F('usage_limit'))
+        ).update(used_count=F('used_count') + 1)
+        if not updated:
+            cls.invalidate()
+            return CouponResult(False, 'Cupom esgotado.', coupon, reason='exhausted')
+
+        if coupon.usage_limit and Coupon.objects.filter(id=coupon.id, used_count__gte=F('usage_limit')).exists():
+            cls.invalidate()
+        return result
+
+    @classmethod
+    def release(cls, code):
+        """Devolve um uso (ex.: pedido cancelado)"""
+        from marketing.models import Coupon
+
+        coupon = cls.get_rules().get((code or '').strip().upper())
+        queryset = Coupon.objects.filter(id=coupon.id) if coupon else Coupon.objects.filter(code__iexact=code)
+        if queryset.filter(used_count__gt=0).update(used_count=F('used_count') - 1) and coupon and coupon.exhausted:
+            cls.invalidate()
+    # endregion
@@ -0,0 +1,262 @@
+import logging
+import secrets
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+logger = logging.getLogger(__name__)
+
+
+class RecentlyViewedService:
+    """
+    Produtos vistos recentemente, com o cache como fonte primária.
+
+    Cada usuário/sessão tem um anel no cache: lista [product_id, timestamp]
+    sem repetições, mais recente primeiro, limitada a LIMIT itens. Registrar
+    uma visita é uma leitura + escrita no cache; o dono do anel entra num
+    diário (contador atômico) uma única vez até o próximo flush. O `flush`
+    lê o diário e grava os anéis alterados com upserts em lote
+    (INSERT ... ON CONFLICT DO UPDATE viewed_at); `trim` apaga em lote o que
+    passou do limite no banco.
+
+    Visitantes são identificados por um token num cookie assinado (como o
+    carrinho de visitante), então registrar uma visita nunca cria nem grava
+    a sessão.
+
+    Requer um cache compartilhado entre processos (Redis em produção) para
+    que o flush enxergue as visitas registradas pelos workers web.
+    """
+    LIMIT = getattr(settings, 'RECENTLY_VIEWED_LIMIT', 20)
+    RING_TTL = 60 * 60 * 24 * 30
+    JOURNAL_TTL = 60 * 60 * 24
+    SEQ_KEY = 'rv:seq'
+    FLUSHED_KEY = 'rv:flushed'
+    LOCK_KEY = 'rv:flush-lock'
+    COOKIE_NAME = getattr(settings, 'RECENTLY_VIEWED_COOKIE_NAME', 'rv')
+    COOKIE_SALT = 'marketing.recently_viewed'
+
+    # region Chaves
+    @staticmethod
+    def ring_key(owner):
+        return f'rv:ring:{owner}'
+
+    @staticmethod
+    def pending_key(owner):
+        return f'rv:pending:{owner}'
+
+    @staticmethod
+    def journal_key(seq):
+        return f'rv:journal:{seq}'
+
+    @classmethod
+    def get_owner(cls, request, create=True):
+        """'u:<id>' para usuários; 's:<token do cookie>' para visitantes"""
+        if request.user.is_authenticated:
+            return f'u:{request.user.pk}'
+
+        token = getattr(request, 'recently_viewed_token', None) or request.get_signed_cookie(
+            cls.COOKIE_NAME, default=None, salt=cls.COOKIE_SALT,
+        )
+        if not token:
+            if not create:
+                return None
+            token = secrets.token_urlsafe(24)
+        # O cookie é (re)gravado pelo record() quando o anel muda
+        request.recently_viewed_token = token
+        return f's:{token}'
+
+    @classmethod
+    def set_cookie(cls, request, response):
+        token = getattr(request, 'recently_viewed_token', None)
+        if token and response is not None:
+            response.set_signed_cookie(
+                cls.COOKIE_NAME, token, salt=cls.COOKIE_SALT,
+                max_age=cls.RING_TTL, httponly=True, samesite='Lax',
+            )
+        return response
+    # endregion
+
+    # region Anel
+    @classmethod
+    def load_ring(cls, owner):
+        """Anel a partir do banco (cache frio)"""
+        from marketing.models import RecentlyViewedProduct
+
+        kind, value = owner.split(':', 1)
+        lookup = {'user_id': value} if kind == 'u' else {'session_key': value, 'user__isnull': True}
+        return [
+            [product_id, viewed_at.timestamp()]
+            for product_id, viewed_at in RecentlyViewedProduct.objects.filter(**lookup).order_by(
+                '-viewed_at'
+            ).values_list('product_id', 'viewed_at')[:cls.LIMIT]
+        ]
+
+    @classmethod
+    def get_ring(cls, owner):
+        ring = cache.get(cls.ring_key(owner))
+        if ring is None:
+            ring = cls.load_ring(owner)
+            cache.set(cls.ring_key(owner), ring, cls.RING_TTL)
+        return ring
+
+    @classmethod
+    def push(cls, ring, product_id, timestamp):
+        ring = [entry for entry in ring if entry[0] != product_id]
+        ring.insert(0, [product_id, timestamp])
+        return ring[:cls.LIMIT]
+
+    @classmethod
+    def mark_dirty(cls, owner):
+        """Coloca o dono no diário, uma vez por ciclo de flush"""
+        if not cache.add(cls.pending_key(owner), 1, cls.JOURNAL_TTL):
+            return
+        cache.add(cls.SEQ_KEY, 0, timeout=None)
+        seq = cache.incr(cls.SEQ_KEY)
+        cache.set(cls.journal_key(seq), owner, cls.JOURNAL_TTL)
+
+    @classmethod
+    def record(cls, request, product_id, response=None):
+        """Registra a visita; para visitantes, grava o cookie em `response`"""
+        owner = cls.get_owner(request)
+        ring = cls.get_ring(owner)
+        if ring and ring[0][0] == product_id and time.time() - ring[0][1] < 60:
+            return
+        cache.set(cls.ring_key(owner), cls.push(ring, product_id, time.time()), cls.RING_TTL)
+        cls.mark_dirty(owner)
+        if owner.startswith('s:'):
+            cls.set_cookie(request, response)
+
+    @classmethod
+    def get_product_ids(cls, request, limit=None, exclude=None):
+        """IDs mais recentes primeiro — uma leitura de cache"""
+        owner = cls.get_owner(request, create=False)
+        if not owner:
+            return []
+        ids = [product_id for product_id, _ in cls.get_ring(owner) if product_id != exclude]
+        return ids[:limit] if limit else ids
+
+    @classmethod
+    def get_products(cls, request, limit=None, exclude=None):
+        from products.models import Product
+
+        ids = cls.get_product_ids(request, limit, exclude)
+        if not ids:
+            return []
+        products = Product.objects.filter(is_active=True).select_related('category', 'brand').in_bulk(ids)
+        return [products[product_id] for product_id in ids if product_id in products]
+    # endregion
+
+    # region Persistência
+    @classmethod
+    def build_rows(cls, rings):
+        from marketing.models import RecentlyViewedProduct
+        from products.models import Product
+
+        product_ids = {product_id for ring in rings.values() for product_id, _ in ring}
+        existing = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+
+        users, sessions = [], []
+        for owner, ring in rings.items():
+            kind, value = owner.split(':', 1)
+            for product_id, timestamp in ring:
+                if product_id not in existing:
+                    continue
+                row = RecentlyViewedProduct(
+                    product_id=product_id,
+                    viewed_at=datetime.fromtimestamp(timestamp, tz=dt_timezone.utc),
+                    user_id=value if kind == 'u' else None,
+                    session_key=value if kind == 's' else None,
+                )
+                (users if kind == 'u' else sessions).append(row)
+        return users, sessions
+
+    @classmethod
+    def upsert(cls, users, sessions, batch_size=1000):
+        from marketing.models import RecentlyViewedProduct
+
+        if users:
+            RecentlyViewedProduct.objects.bulk_create(
+                users, batch_size=batch_size,
+                update_conflicts=True, unique_fields=['user', 'product'], update_fields=['viewed_at'],
+            )
+        if sessions:
+            RecentlyViewedProduct.objects.bulk_create(
+                sessions, batch_size=batch_size,
+                update_conflicts=True, unique_fields=['session_key', 'product'], update_fields=['viewed_at'],
+            )
+        return len(users) + len(sessions)
+
+    @classmethod
+    def flush(cls, batch_size=1000):
+        """Grava no banco os anéis alterados desde o último flush"""
+        stats = {'owners': 0, 'rows': 0}
+        if not cache.add(cls.LOCK_KEY, 1, 300):
+            return stats
+        try:
+            head = cache.get(cls.SEQ_KEY, 0)
+            flushed = cache.get(cls.FLUSHED_KEY, 0)
+            for start in range(flushed + 1, head + 1, batch_size):
+                end = min(start + batch_size, head + 1)
+                journal = [cls.journal_key(seq) for seq in range(start, end)]
+                owners = set(cache.get_many(journal).values())
+                # Libera antes de ler: visitas a partir daqui voltam para o diário
+                cache.delete_many([cls.pending_key(owner) for owner in owners])
+                rings = {
+                    key.split(':', 2)[2]: ring
+                    for key, ring in cache.get_many([cls.ring_key(owner) for owner in owners]).items()
+                }
+                stats['owners'] += len(rings)
+                stats['rows'] += cls.upsert(*cls.build_rows(rings), batch_size=batch_size)
+                cache.delete_many(journal)
+                cache.set(cls.FLUSHED_KEY, end - 1, timeout=None)
+        finally:
+            cache.delete(cls.LOCK_KEY)
+        return stats
+
+    @classmethod
+    def trim(cls, limit=None, batch_size=5000):
+        """Mantém só os `limit` mais recentes por usuário/sessão, apagando em lotes"""
+        from marketing.models import RecentlyViewedProduct
+
+        limit = limit or cls.LIMIT
+        deleted = 0
+        for partition, lookup in ((F('user_id'), {'user__isnull': False}), (F('session_key'), {'user__isnull': True})):
+            ranked = RecentlyViewedProduct.objects.filter(**lookup).annotate(
+                position=Window(RowNumber(), partition_by=[partition], order_by=F('viewed_at').desc()),
+            ).filter(position__gt=limit)
+            while True:
+                ids = list(ranked.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                deleted += RecentlyViewedProduct.objects.filter(id__in=ids).delete()[0]
+        return deleted
+
+    @classmethod
+    def merge_session(cls, request, user):
+        """No login, junta o histórico do visitante ao do usuário"""
+        from marketing.models import RecentlyViewedProduct
+
+        token = request.get_signed_cookie(cls.COOKIE_NAME, default=None, salt=cls.COOKIE_SALT)
+        if not token:
+            return
+        owner = f's:{token}'
+        session_ring = cls.get_ring(owner)
+        if not session_ring:
+            return
+
+        user_owner = f'u:{user.pk}'
+        latest = {}
+        for product_id, timestamp in cls.get_ring(user_owner) + session_ring:
+            latest[product_id] = max(timestamp, latest.get(product_id, 0))
+        ring = sorted(([product_id, timestamp] for product_id, timestamp in latest.items()), key=lambda entry: entry[1], reverse=True)[:cls.LIMIT]
+        cache.set(cls.ring_key(user_owner), ring, cls.RING_TTL)
+
+        users, _ = cls.build_rows({user_owner: ring})
+        cls.upsert(users, [])
+        RecentlyViewedProduct.objects.filter(session_key=owner.split(':', 1)[1], user__isnull=True).delete()
+        cache.delete_many([cls.ring_key(owner), cls.pending_key(owner)])
+    # endregion
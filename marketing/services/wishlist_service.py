@@ -0,0 +1,138 @@
+import logging
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class WishlistService:
+    """
+    Lista de desejos padrão do usuário com os IDs em cache.
+
+    O cache guarda (quantidade de itens, array ordenado de product_ids) — um
+    `array('q')` é bem mais compacto que uma lista/set de ints. Checar vários
+    produtos de uma vez é uma leitura de cache + busca binária em Python.
+    Toda escrita apaga a chave (aqui, já que os UPDATEs não disparam signals;
+    no admin etc., via signals) e a próxima leitura recarrega: um
+    get-altera-set concorrente perderia atualizações até o TTL.
+    """
+    CACHE_TTL = 60 * 60 * 24
+
+    @staticmethod
+    def cache_key(user_id):
+        return f'wishlist:ids:{user_id}'
+
+    @staticmethod
+    def user_id(user):
+        return getattr(user, 'pk', user)
+
+    @classmethod
+    def invalidate(cls, user):
+        cache.delete(cls.cache_key(cls.user_id(user)))
+
+    # region Leitura
+    @classmethod
+    def load(cls, user_id):
+        from marketing.models import WishlistItem
+
+        product_ids = list(WishlistItem.objects.filter(
+            wishlist__user_id=user_id, wishlist__is_default=True,
+        ).values_list('product_id', flat=True))
+        return len(product_ids), array('q', sorted(set(product_ids)))
+
+    @classmethod
+    def get(cls, user):
+        """(quantidade, array ordenado de product_ids)"""
+        user_id = cls.user_id(user)
+        entry = cache.get(cls.cache_key(user_id))
+        if entry is None:
+            entry = cls.load(user_id)
+            cache.set(cls.cache_key(user_id), entry, cls.CACHE_TTL)
+        return entry
+
+    @staticmethod
+    def _contains(ids, product_id):
+        index = bisect_left(ids, product_id)
+        return index < len(ids) and ids[index] == product_id
+
+    @classmethod
+    def count(cls, user):
+        if not getattr(user, 'is_authenticated', True):
+            return 0
+        return cls.get(user)[0]
+
+    @classmethod
+    def contains(cls, user, product_id):
+        if not getattr(user, 'is_authenticated', True):
+            return False
+        return cls._contains(cls.get(user)[1], product_id)
+
+    @classmethod
+    def contains_many(cls, user, product_ids):
+        """{product_id: bool} para uma lista de produtos — uma leitura de cache"""
+        if not getattr(user, 'is_authenticated', True):
+            return dict.fromkeys(product_ids, False)
+        ids = cls.get(user)[1]
+        return {product_id: cls._contains(ids, product_id) for product_id in product_ids}
+
+    @classmethod
+    def annotate(cls, user, products):
+        """Marca `is_wishlisted` em cada produto de uma listagem"""
+        products = list(products)
+        membership = cls.contains_many(user, [product.pk for product in products])
+        for product in products:
+            product.is_wishlisted = membership[product.pk]
+        return products
+    # endregion
+
+    # region Escrita
+    @classmethod
+    def get_default_wishlist(cls, user):
+        from marketing.models import Wishlist
+
+        wishlist = Wishlist.objects.filter(user=user, is_default=True).first()
+        if wishlist is None:
+            wishlist = Wishlist.objects.create(user=user, is_default=True)
+        return wishlist
+
+    @classmethod
+    def add(cls, user, product_id, variant_id=None):
+        """
+        Adiciona à lista padrão. Itens removidos (soft delete) são restaurados,
+        já que a chave (wishlist, produto, variante) é única. Retorna True se
+        o item foi incluído agora.
+        """
+        from marketing.models import Wishlist, WishlistItem
+
+        wishlist = cls.get_default_wishlist(user)
+        lookup = {'wishlist': wishlist, 'product_id': product_id, 'variant_id': variant_id}
+        if WishlistItem.objects.filter(**lookup).exists():
+            return False
+
+        now = timezone.now()
+        restored = WishlistItem._base_manager.filter(deleted_at__isnull=False, **lookup).update(
+            is_deleted=False, deleted_at=None, deleted_by=None, added_at=now, updated_at=now,
+        )
+        if not restored:
+            WishlistItem.objects.bulk_create([WishlistItem(**lookup)], ignore_conflicts=True)
+
+        Wishlist.objects.filter(pk=wishlist.pk).update(updated_at=now)
+        cls.invalidate(user)
+        return True
+
+    @classmethod
+    def remove(cls, user, product_id, variant_id=None):
+        """Remove da lista padrão (soft delete em um UPDATE)"""
+        from marketing.models import WishlistItem
+
+        now = timezone.now()
+        removed = WishlistItem.objects.filter(
+            wishlist__user=user, wishlist__is_default=True, product_id=product_id, variant_id=variant_id,
+        ).update(is_deleted=True, deleted_at=now, updated_at=now)
+        if removed:
+            cls.invalidate(user)
+        return bool(removed)
+    # endregion
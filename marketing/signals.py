@@ -0,0 +1,29 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Coupon, Wishlist, WishlistItem
+from .services.coupon_service import CouponService
+from .services.recently_viewed_service import RecentlyViewedService
+from .services.wishlist_service import WishlistService
+
+
+@receiver(post_save, sender=Coupon)
+def coupon_updated(sender, instance, **kwargs):
+    CouponService.invalidate()
+
+@receiver(post_delete, sender=Coupon)
+def coupon_deleted(sender, instance, **kwargs):
+    CouponService.invalidate()
+
+@receiver(user_logged_in)
+def merge_recently_viewed(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'COOKIES'):
+        RecentlyViewedService.merge_session(request, user)
+
+@receiver([post_save, post_delete], sender=Wishlist)
+def wishlist_changed(sender, instance, **kwargs):
+    WishlistService.invalidate(instance.user_id)
+
+@receiver([post_save, post_delete], sender=WishlistItem)
+def wishlist_item_changed(sender, instance, **kwargs):
+    WishlistService.invalidate(Wishlist._base_manager.filter(pk=instance.wishlist_id).values_list('user_id', flat=True).first())
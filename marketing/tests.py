@@ -1,3 +1,160 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Product
+from products.views import ProductDetailView
+from users.models import User
+
+from .models import Coupon, WishlistItem
+from .services.coupon_service import CouponService
+from .services.recently_viewed_service import RecentlyViewedService
+from .services.wishlist_service import WishlistService
+
+
+class WishlistToggleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        cls.products = [
+            Product.objects.create(name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def toggle(self, product):
+        return self.client.post(
+            reverse('wishlist:toggle_wishlist'), {'product_id': product.pk}, content_type='application/json',
+        ).json()
+
+    def test_toggle_adds_and_removes(self):
+        product = self.products[0]
+        self.assertEqual(self.toggle(product), {'success': True, 'added': True, 'wishlist_count': 1})
+        self.assertTrue(WishlistItem.objects.filter(product=product).exists())
+
+        self.assertEqual(self.toggle(product), {'success': True, 'added': False, 'wishlist_count': 0})
+        self.assertFalse(WishlistItem.objects.filter(product=product).exists())
+
+        # Item removido (soft delete) é restaurado, sem violar a chave única
+        self.assertTrue(self.toggle(product)['added'])
+        self.assertEqual(WishlistItem._base_manager.filter(product=product).count(), 1)
+
+    def test_writes_invalidate_the_warm_cache(self):
+        self.toggle(self.products[0])
+        WishlistService.get(self.user)  # aquece o cache
+
+        self.toggle(self.products[2])
+        self.assertEqual(cache.get(WishlistService.cache_key(self.user.pk)), WishlistService.load(self.user.pk))
+        self.toggle(self.products[1])
+        self.toggle(self.products[0])
+
+        total, ids = WishlistService.get(self.user)
+        self.assertEqual((total, list(ids)), (2, [self.products[1].pk, self.products[2].pk]))
+        self.assertEqual(WishlistService.get(self.user), WishlistService.load(self.user.pk))
+
+    def test_add_and_remove_endpoints(self):
+        product = self.products[0]
+        url = reverse('wishlist:add_to_wishlist')
+        self.assertTrue(self.client.post(url, {'product_id': product.pk}).json()['added'])
+        self.assertEqual(self.client.post(url, {'product_id': product.pk}).json()['wishlist_count'], 1)
+
+        response = self.client.post(reverse('wishlist:remove_from_wishlist'), {'product_id': product.pk}).json()
+        self.assertEqual((response['added'], response['wishlist_count']), (False, 0))
+
+    def test_requires_login_and_a_valid_product(self):
+        self.assertEqual(self.client.post(reverse('wishlist:toggle_wishlist'), {'product_id': 'x'}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('wishlist:toggle_wishlist'), {'product_id': 999999}).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.post(reverse('wishlist:toggle_wishlist'), {'product_id': 1}).status_code, 401)
+
+
+class CouponCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.coupon = Coupon.objects.create(
+            code='DEZ', discount_type='fixed', discount_value=Decimal('10.00'),
+            valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=30),
+        )
+
+    def setUp(self):
+        cache.clear()
+        CouponService.invalidate()
+
+    def test_bulk_soft_delete_and_restore_invalidate_rules(self):
+        self.assertTrue(CouponService.evaluate('DEZ'))
+
+        Coupon.objects.filter(code='DEZ').soft_delete()
+        self.assertEqual(CouponService.evaluate('DEZ').reason, 'invalid')
+
+        Coupon.objects.deleted_only().restore()
+        self.assertTrue(CouponService.evaluate('DEZ'))
+
+    def test_usage_updates_keep_the_rules(self):
+        CouponService.evaluate('DEZ')
+        version = CouponService.current_version()
+        Coupon.objects.filter(code='DEZ').update(used_count=0)
+        self.assertEqual(CouponService.current_version(), version)
+
+
+class RecentlyViewedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, cookies=None, user=None):
+        request = self.factory.get('/')
+        request.user = user or AnonymousUser()
+        request.session = SessionStore()
+        request.COOKIES.update(cookies or {})
+        return request
+
+    def visit(self, product, cookies=None):
+        request = self.request(cookies)
+        response = HttpResponse()
+        RecentlyViewedService.record(request, product.pk, response)
+        self.assertIsNone(request.session.session_key)
+        return {key: morsel.value for key, morsel in response.cookies.items()}
+
+    def test_anonymous_views_use_a_cookie_instead_of_the_session(self):
+        cookies = self.visit(self.products[0])
+        self.assertIn(RecentlyViewedService.COOKIE_NAME, cookies)
+        self.assertEqual(self.visit(self.products[1], cookies), cookies)
+
+        ids = RecentlyViewedService.get_product_ids(self.request(cookies))
+        self.assertEqual(ids, [self.products[1].pk, self.products[0].pk])
+        self.assertEqual(RecentlyViewedService.get_product_ids(self.request()), [])
+
+    def test_detail_view_lists_other_recent_products(self):
+        cookies = self.visit(self.products[0])
+        self.visit(self.products[1], cookies)
+
+        view = ProductDetailView()
+        view.setup(self.request(cookies), slug=self.products[0].slug)
+        view.object = view.get_object()
+        self.assertEqual(view.get_context_data()['recently_viewed'], [self.products[1]])
+
+    def test_login_merges_the_visitor_history(self):
+        user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        cookies = self.visit(self.products[2])
+
+        RecentlyViewedService.merge_session(self.request(cookies), user)
+        self.assertEqual(RecentlyViewedService.get_product_ids(self.request(user=user)), [self.products[2].pk])
+        self.assertEqual(RecentlyViewedService.get_product_ids(self.request(cookies)), [])
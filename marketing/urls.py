@@ -6,8 +6,9 @@ app_name = 'marketing'
 urlpatterns = [
     # Wishlist
     # path('lista-desejos/', views.WishlistView.as_view(), name='wishlist'),
-    # path('lista-desejos/adicionar/', views.AddToWishlistView.as_view(), name='add_to_wishlist'),
-    # path('lista-desejos/remover/', views.RemoveFromWishlistView.as_view(), name='remove_from_wishlist'),
+    path('lista-desejos/adicionar/', views.AddToWishlistView.as_view(), name='add_to_wishlist'),
+    path('lista-desejos/remover/', views.RemoveFromWishlistView.as_view(), name='remove_from_wishlist'),
+    path('lista-desejos/toggle/', views.ToggleWishlistView.as_view(), name='toggle_wishlist'),
     
     # # Cupons
     # path('cupons/', views.CouponsView.as_view(), name='coupons'),
@@ -19,4 +20,5 @@ app_name = 'wishlist'
 urlpatterns += [
     # path('', views.WishlistView.as_view(), name='index'),
     path('wishlist/count/', views.UpdateWishlistCountView.as_view(), name='wishlist_count'),
+    path('wishlist/status/', views.WishlistStatusView.as_view(), name='wishlist_status'),
 ]
\ No newline at end of file
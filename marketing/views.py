@@ -1,19 +1,103 @@
+import json
+
 from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from .models import WishlistItem
+from .services.wishlist_service import WishlistService
 
 class UpdateWishlistCountView(View):
     """View para atualizar contador da wishlist via AJAX"""
     
     @method_decorator(login_required)
     def get(self, request):
-        wishlist_count = WishlistItem.objects.filter(
-            wishlist__user=request.user,
-            wishlist__is_default=True
-        ).count()
+        return JsonResponse({
+            'wishlist_count': WishlistService.count(request.user)
+        })
+
+
+class WishlistStatusView(View):
+    """Quais produtos de uma listagem estão na wishlist (?ids=1,2,3)"""
+    
+    def get(self, request):
+        try:
+            product_ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()][:200]
+        except ValueError:
+            return JsonResponse({'error': 'IDs inválidos'}, status=400)
         
+        membership = WishlistService.contains_many(request.user, product_ids)
         return JsonResponse({
-            'wishlist_count': wishlist_count
-        })
\ No newline at end of file
+            'wishlisted': [product_id for product_id, wishlisted in membership.items() if wishlisted],
+            'wishlist_count': WishlistService.count(request.user),
+        })
+
+
+class WishlistWriteView(View):
+    """
+    Base das escritas na lista de desejos via AJAX (JSON ou form com
+    product_id e variant_id opcional). Passam pelo WishlistService, que
+    atualiza o cache de IDs incrementalmente.
+    """
+    
+    def payload(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                return {}
+            return data if isinstance(data, dict) else {}
+        return request.POST
+    
+    def post(self, request):
+        from products.models import Product, ProductVariant
+        
+        if not request.user.is_authenticated:
+            return JsonResponse({'success': False, 'message': 'Entre na sua conta para usar a lista de desejos'}, status=401)
+        
+        data = self.payload(request)
+        try:
+            product_id = int(data.get('product_id'))
+            variant_id = int(data['variant_id']) if data.get('variant_id') else None
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'message': 'Produto inválido'}, status=400)
+        
+        product = get_object_or_404(Product, pk=product_id, is_active=True)
+        if variant_id is not None:
+            get_object_or_404(ProductVariant, pk=variant_id, product=product)
+        
+        added = self.write(request.user, product.pk, variant_id)
+        return JsonResponse({
+            'success': True,
+            'added': added,
+            'wishlist_count': WishlistService.count(request.user),
+        })
+    
+    def write(self, user, product_id, variant_id):
+        raise NotImplementedError
+
+
+class AddToWishlistView(WishlistWriteView):
+    """Adiciona à lista de desejos padrão"""
+    
+    def write(self, user, product_id, variant_id):
+        WishlistService.add(user, product_id, variant_id)
+        return True
+
+
+class RemoveFromWishlistView(WishlistWriteView):
+    """Remove da lista de desejos padrão"""
+    
+    def write(self, user, product_id, variant_id):
+        WishlistService.remove(user, product_id, variant_id)
+        return False
+
+
+class ToggleWishlistView(WishlistWriteView):
+    """Adiciona se ainda não está na lista, senão remove (botão do card)"""
+    
+    def write(self, user, product_id, variant_id):
+        if WishlistService.add(user, product_id, variant_id):
+            return True
+        WishlistService.remove(user, product_id, variant_id)
+        return False
@@ -2,7 +2,7 @@ import uuid
 from django.db import models
 from django.utils import timezone
 from django.contrib.postgres.indexes import GinIndex
-from .managers import SoftDeleteManager
+from .managers import LIVE_ROWS, SoftDeleteManager
 
 class TimestampMixin(models.Model):
     """Mixin para timestamps automáticos"""
@@ -19,11 +19,6 @@ class UUIDMixin(models.Model):
     class Meta:
         abstract = True
 
-class SoftDeleteManager(models.Manager):
-    """Manager para soft delete"""
-    def get_queryset(self):
-        return super().get_queryset().filter(deleted_at__isnull=True)
-
 class SoftDeleteMixin(models.Model):
     """Mixin para soft delete"""
     is_deleted = models.BooleanField('Deletado', default=False)
@@ -35,6 +30,15 @@ class SoftDeleteMixin(models.Model):
     
     objects = SoftDeleteManager()
     
+    SOFT_DELETE_FIELDS = ['is_deleted', 'deleted_at', 'deleted_by']
+
+    def _save_soft_delete(self):
+        # Grava só as colunas de soft delete (e updated_at), não o registro inteiro
+        fields = list(self.SOFT_DELETE_FIELDS)
+        if any(field.name == 'updated_at' for field in self._meta.concrete_fields):
+            fields.append('updated_at')
+        self.save(update_fields=fields)
+
     def delete(self, user=None, hard=False):
         if hard:
             super().delete()
@@ -42,17 +46,28 @@ class SoftDeleteMixin(models.Model):
             self.is_deleted = True
             self.deleted_at = timezone.now()
             self.deleted_by = user
-            self.save()
+            self._save_soft_delete()
     
     def restore(self):
         self.is_deleted = False
         self.deleted_at = None
         self.deleted_by = None
-        self.save()
+        self._save_soft_delete()
     
     class Meta:
         abstract = True
 
+def live_index(*fields, name, condition=None):
+    """
+    Índice parcial só com os registros não deletados (a condição do manager
+    padrão), opcionalmente restrito por `condition` (ex.: Q(is_active=True)).
+    """
+    return models.Index(
+        fields=list(fields),
+        name=name,
+        condition=LIVE_ROWS & condition if condition is not None else LIVE_ROWS,
+    )
+
 class BaseModel(TimestampMixin, UUIDMixin, SoftDeleteMixin):
     """Model base com todos os mixins"""
     
@@ -0,0 +1,25 @@
+def keyset_chunks(queryset, chunk_size=2000, field='id'):
+    """
+    Percorre um queryset em blocos ordenados pela chave (keyset pagination).
+
+    Cada bloco é uma consulta independente (`WHERE field > último ORDER BY field
+    LIMIT n`), então a memória fica constante e não existe OFFSET crescente nem
+    cursor aberto durante todo o processamento. Funciona com instâncias ou com
+    `.values()` (desde que o campo esteja entre os valores selecionados).
+    """
+    queryset = queryset.order_by(field)
+    last = None
+
+    while True:
+        chunk = queryset if last is None else queryset.filter(**{f'{field}__gt': last})
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+
+        yield rows
+
+        if len(rows) < chunk_size:
+            return
+
+        tail = rows[-1]
+        last = tail[field] if isinstance(tail, dict) else getattr(tail, field)
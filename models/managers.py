@@ -1,22 +1,49 @@
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
+
+# Condição dos registros "vivos" — a mesma do manager padrão e dos índices parciais
+LIVE_ROWS = Q(deleted_at__isnull=True)
+
 
 class SoftDeleteQuerySet(models.QuerySet):
+    def alive(self):
+        return self.filter(LIVE_ROWS)
+
     def active(self):
-        return self.filter(is_deleted=False)
-    
+        return self.alive()
+
     def deleted(self):
-        return self.filter(is_deleted=True)
-    
+        return self.exclude(LIVE_ROWS)
+
     def with_deleted(self):
         return self
 
-class SoftDeleteManager(models.Manager):
+    def _soft_delete_values(self, **values):
+        field_names = {field.name for field in self.model._meta.concrete_fields}
+        if 'updated_at' in field_names:
+            values['updated_at'] = timezone.now()
+        return values
+
+    def soft_delete(self, user=None):
+        """Marca como deletados em um único UPDATE (sem save() nem signals)"""
+        return self.alive().update(**self._soft_delete_values(
+            is_deleted=True, deleted_at=timezone.now(), deleted_by=user,
+        ))
+
+    def restore(self):
+        """Restaura em um único UPDATE; use a partir de `with_deleted()`/`deleted_only()`"""
+        return self.deleted().update(**self._soft_delete_values(
+            is_deleted=False, deleted_at=None, deleted_by=None,
+        ))
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     def get_queryset(self):
-        return SoftDeleteQuerySet(self.model, using=self._db).active()
-    
+        return super().get_queryset().alive()
+
     def with_deleted(self):
-        return SoftDeleteQuerySet(self.model, using=self._db)
-    
+        return super().get_queryset()
+
     def deleted_only(self):
-        return SoftDeleteQuerySet(self.model, using=self._db).deleted()
\ No newline at end of file
+        return super().get_queryset().deleted()
@@ -0,0 +1,67 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Depois de uma escrita, as leituras do mesmo contexto (requisição, comando)
+# ficam no primário — o cliente sempre enxerga o que acabou de gravar
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def reset_pinning(value=False):
+    """Início de cada requisição (o middleware decide pelo cookie); retorna o token"""
+    return _pinned.set(value)
+
+
+def restore_pinning(token):
+    _pinned.reset(token)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+class PrimaryReplicaRouter:
+    """
+    Leituras dos apps de catálogo (`REPLICA_READ_APPS`) vão para uma réplica
+    aleatória; todo o resto — e qualquer escrita — vai para o primário.
+
+    Leituras voltam ao primário quando:
+    - houve escrita neste contexto (ou recente, pelo cookie do
+      ReplicaPinningMiddleware);
+    - há uma transação aberta no primário (select_for_update, ler o que a
+      própria transação gravou).
+
+    Sem réplicas configuradas, tudo usa o `default`.
+    """
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+        self.read_apps = set(getattr(settings, 'REPLICA_READ_APPS', []))
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or model._meta.app_label not in self.read_apps:
+            return DEFAULT_DB_ALIAS
+        if is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -4,20 +4,25 @@ from .models import *
 from django.utils.html import format_html
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from core.admin import LargeTableAdminMixin
+
 # Order Management
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    raw_id_fields = ['product', 'variant', 'deleted_by']
     readonly_fields = ['product_name', 'product_sku', 'total_price']
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     inlines = [OrderItemInline]
     list_display = [
         'order_number', 'user', 'status', 'total_amount', 
         'created_at', 'confirmed_at'
     ]
     list_filter = ['status', 'created_at', 'confirmed_at']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
     search_fields = ['order_number', 'user__email', 'user__first_name', 'user__last_name']
     readonly_fields = ['uuid', 'order_number', 'created_at', 'updated_at']
     date_hierarchy = 'created_at'
@@ -41,7 +46,7 @@ class OrderAdmin(admin.ModelAdmin):
         })
     )
     
-    actions = ['mark_as_confirmed', 'mark_as_shipped']
+    actions = ['mark_as_confirmed', 'mark_as_shipped', 'allocate_warehouses']
     
     def mark_as_confirmed(self, request, queryset):
         from django.utils import timezone
@@ -59,4 +64,16 @@ class OrderAdmin(admin.ModelAdmin):
             shipped_at=timezone.now()
         )
         self.message_user(request, f'{updated} pedidos marcados como enviados.')
-    mark_as_shipped.short_description = 'Marcar como enviado'
\ No newline at end of file
+    mark_as_shipped.short_description = 'Marcar como enviado'
+    
+    def allocate_warehouses(self, request, queryset):
+        from shipping.services.allocation_service import AllocationError, FulfillmentAllocator
+        allocated = 0
+        for order in queryset.filter(status__in=['confirmed', 'processing'], shipments__isnull=True).distinct():
+            try:
+                plan, shipments = FulfillmentAllocator(order).run(user=request.user)
+            except AllocationError:
+                continue
+            allocated += 1 if shipments else 0
+        self.message_user(request, f'{allocated} pedidos alocados.')
+    allocate_warehouses.short_description = 'Alocar depósitos e criar envios'
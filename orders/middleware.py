@@ -0,0 +1,18 @@
+from core.middleware import HybridMiddleware
+from orders.services.cart_service import CartService
+
+
+class GuestCartCookieMiddleware(HybridMiddleware):
+    """Remove o cookie do carrinho de visitante depois que ele foi mesclado no login"""
+
+    def process(self, request):
+        return self.clear_cookie(request, self.get_response(request))
+
+    async def aprocess(self, request):
+        return self.clear_cookie(request, await self.get_response(request))
+
+    @staticmethod
+    def clear_cookie(request, response):
+        if getattr(request, 'guest_cart_merged', False):
+            CartService.delete_cookie(response)
+        return response
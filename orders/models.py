@@ -120,6 +120,7 @@ class Order(BaseModel):
     shipping_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='Valor do Frete')
     discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='Valor do Desconto')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Valor Total')
+    coupon_code = models.CharField(max_length=50, blank=True, verbose_name='Cupom')  # Uso devolvido no cancelamento
     
     # Informações adicionais
     notes = models.TextField(blank=True, verbose_name='Observações')
@@ -0,0 +1,193 @@
+import logging
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class CartService:
+    """
+    Carrinho de usuários e visitantes.
+
+    Visitantes têm um Cart normal (session_key = token aleatório), identificado
+    por um cookie assinado "token:quantidade". O token não depende da sessão
+    (sobrevive ao cycle_key do login e não faz a sessão crescer) e a quantidade
+    no cookie alimenta o badge do carrinho sem nenhuma consulta. Para usuários
+    a quantidade fica no cache e é invalidada quando os itens mudam.
+    """
+    COOKIE_NAME = getattr(settings, 'GUEST_CART_COOKIE_NAME', 'cart')
+    COOKIE_SALT = 'orders.cart'
+    COOKIE_AGE = getattr(settings, 'GUEST_CART_COOKIE_AGE', 60 * 60 * 24 * 30)
+    COUNT_CACHE_TTL = 60 * 60
+
+    # region Cookie
+    @classmethod
+    def read_cookie(cls, request):
+        """(token, quantidade) do cookie assinado, ou (None, 0)"""
+        value = request.get_signed_cookie(cls.COOKIE_NAME, default=None, salt=cls.COOKIE_SALT)
+        if not value or ':' not in value:
+            return None, 0
+        token, count = value.rsplit(':', 1)
+        return token, int(count) if count.isdigit() else 0
+
+    @classmethod
+    def set_cookie(cls, response, token, count):
+        response.set_signed_cookie(
+            cls.COOKIE_NAME, f'{token}:{count}', salt=cls.COOKIE_SALT,
+            max_age=cls.COOKIE_AGE, httponly=True, samesite='Lax',
+        )
+        return response
+
+    @classmethod
+    def delete_cookie(cls, response):
+        response.delete_cookie(cls.COOKIE_NAME, samesite='Lax')
+        return response
+
+    @staticmethod
+    def new_token():
+        return secrets.token_urlsafe(24)
+    # endregion
+
+    # region Consulta
+    @staticmethod
+    def count_cache_key(user_id):
+        return f'cart:count:{user_id}'
+
+    @classmethod
+    def invalidate_count(cls, user_id):
+        if user_id:
+            cache.delete(cls.count_cache_key(user_id))
+
+    @classmethod
+    def count(cls, request):
+        """Quantidade para o badge: cookie para visitantes, cache para usuários"""
+        if not request.user.is_authenticated:
+            return cls.read_cookie(request)[1]
+
+        from orders.models import CartItem
+
+        key = cls.count_cache_key(request.user.pk)
+        count = cache.get(key)
+        if count is None:
+            count = CartItem.objects.filter(cart__user=request.user).aggregate(total=Sum('quantity'))['total'] or 0
+            cache.set(key, count, cls.COUNT_CACHE_TTL)
+        return count
+
+    @classmethod
+    async def acount(cls, request):
+        """count() para views assíncronas (ORM e cache assíncronos)"""
+        from core.asynchronous import aget_user
+        from orders.models import CartItem
+
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return cls.read_cookie(request)[1]
+
+        key = cls.count_cache_key(user.pk)
+        count = await cache.aget(key)
+        if count is None:
+            count = (await CartItem.objects.filter(cart__user_id=user.pk).aaggregate(total=Sum('quantity')))['total'] or 0
+            await cache.aset(key, count, cls.COUNT_CACHE_TTL)
+        return count
+
+    @classmethod
+    def get_cart(cls, request, create=False):
+        """Carrinho atual (usuário ou visitante); cria se `create`"""
+        from orders.models import Cart
+
+        if request.user.is_authenticated:
+            cart = Cart.objects.filter(user=request.user).order_by('-updated_at').first()
+            if cart is None and create:
+                cart = Cart.objects.create(user=request.user)
+            return cart
+
+        token, _ = cls.read_cookie(request)
+        cart = Cart.objects.filter(session_key=token, user__isnull=True, expires_at__gt=timezone.now()).first() if token else None
+        if cart is None and create:
+            cart = Cart.objects.create(session_key=token or cls.new_token())
+        return cart
+
+    @staticmethod
+    def cart_count(cart):
+        from orders.models import CartItem
+
+        return CartItem.objects.filter(cart=cart).aggregate(total=Sum('quantity'))['total'] or 0
+    # endregion
+
+    # region Escrita
+    @classmethod
+    def add_item(cls, request, product, variant=None, quantity=1):
+        """
+        Soma `quantity` ao item (um UPDATE com F(); INSERT se não existir).
+        Retorna (cart, quantidade total) — para visitantes, grave o cookie com
+        `set_cookie(response, cart.session_key, total)`.
+        """
+        from orders.models import Cart, CartItem
+
+        with transaction.atomic():
+            cart = cls.get_cart(request, create=True)
+            lookup = {'cart': cart, 'product': product, 'variant': variant}
+            now = timezone.now()
+            updated = CartItem.objects.filter(**lookup).update(quantity=F('quantity') + quantity, updated_at=now)
+            if not updated:
+                unit_price = variant.effective_price if variant else product.price
+                # Item removido (soft delete) volta com a nova quantidade: a chave (cart, product, variant) é única
+                restored = CartItem._base_manager.filter(deleted_at__isnull=False, **lookup).update(
+                    is_deleted=False, deleted_at=None, deleted_by=None,
+                    quantity=quantity, unit_price=unit_price, updated_at=now,
+                )
+                if not restored:
+                    CartItem.objects.create(quantity=quantity, unit_price=unit_price, **lookup)
+
+            # Carrinho de visitante expira pela inatividade
+            if cart.session_key:
+                Cart.objects.filter(pk=cart.pk).update(expires_at=Cart._meta.get_field('expires_at').get_default(), updated_at=timezone.now())
+
+        cls.invalidate_count(cart.user_id)
+        return cart, cls.cart_count(cart)
+
+    @classmethod
+    def merge_guest_cart(cls, request, user):
+        """
+        Junta o carrinho do visitante ao do usuário no login, baseado em
+        conjuntos: um UPDATE soma as quantidades dos itens em comum, outro move
+        os demais para o carrinho do usuário; o carrinho do visitante é apagado.
+        """
+        from orders.models import Cart, CartItem
+
+        token, _ = cls.read_cookie(request)
+        if not token:
+            return None
+        guest = Cart.objects.filter(session_key=token, user__isnull=True).first()
+        if guest is None:
+            return None
+
+        now = timezone.now()
+        with transaction.atomic():
+            cart = Cart.objects.filter(user=user).order_by('-updated_at').first() or Cart.objects.create(user=user)
+            items = CartItem.objects.annotate(variant_key=Coalesce('variant_id', Value(0)))
+            guest_match = items.filter(cart=guest, product_id=OuterRef('product_id'), variant_key=OuterRef('variant_key'))
+            user_match = items.filter(cart=cart, product_id=OuterRef('product_id'), variant_key=OuterRef('variant_key'))
+
+            # Itens removidos (soft delete) do carrinho do usuário colidiriam com a chave única ao mover
+            CartItem._base_manager.filter(cart=cart, deleted_at__isnull=False).delete()
+            merged = items.filter(cart=cart).filter(Exists(guest_match)).update(
+                quantity=F('quantity') + Subquery(guest_match.values('quantity')[:1]),
+                updated_at=now,
+            )
+            moved = items.filter(cart=guest).exclude(Exists(user_match)).update(cart=cart, updated_at=now)
+            Cart.objects.filter(pk=guest.pk).delete()
+            Cart.objects.filter(pk=cart.pk).update(updated_at=now)
+
+        cls.invalidate_count(user.pk)
+        request.guest_cart_merged = True
+        logger.info('Carrinho de visitante %s mesclado ao usuário %s (%d somados, %d movidos)', guest.pk, user.pk, merged, moved)
+        return cart
+    # endregion
+
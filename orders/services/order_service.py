@@ -0,0 +1,117 @@
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class OrderError(ValueError):
+    """Pedido não pode ser criado/alterado (responde 400)"""
+
+
+class OrderService:
+    """
+    Criação e cancelamento de pedidos.
+
+    O cupom é consumido (CouponService.redeem, UPDATE condicional) na mesma
+    transação que cria o pedido: se o cupom esgotou ou a criação falha, nada
+    fica gravado. O cancelamento devolve o uso com CouponService.release.
+    """
+    CANCELLABLE_STATUSES = ['pending', 'confirmed']
+
+    # region Criação
+    @classmethod
+    def place(cls, cart, billing_address, shipping_address, coupon_code='', notes=''):
+        """
+        Cria o pedido (pendente) a partir do carrinho e esvazia o carrinho.
+
+        Chamado pelo checkout com endereços já validados. As linhas do carrinho
+        são lidas com select_for_update dentro da transação: um segundo place
+        concorrente no mesmo carrinho espera e encontra o carrinho vazio, sem
+        gerar outro pedido nem consumir o cupom de novo. Os preços são os
+        atuais do produto/variante; a reserva de estoque fica com a alocação
+        de armazéns (FulfillmentAllocator), como nos demais pedidos.
+        """
+        from marketing.services.coupon_service import CouponService
+        from orders.models import CartItem, Order, OrderItem
+
+        from .cart_service import CartService
+
+        coupon_code = (coupon_code or '').strip()
+        with transaction.atomic():
+            items = list(
+                CartItem.objects.select_for_update(of=('self',)).filter(cart_id=cart.pk)
+                .select_related('product', 'variant').order_by('id')
+            )
+            if not items:
+                raise OrderError('Carrinho vazio.')
+            prices = [item.variant.effective_price if item.variant else item.product.price for item in items]
+            subtotal = sum((price * item.quantity for price, item in zip(prices, items)), Decimal('0.00'))
+
+            discount = Decimal('0.00')
+            if coupon_code:
+                result = CouponService.redeem(coupon_code, subtotal)
+                if not result:
+                    raise OrderError(result.message)
+                discount, coupon_code = result.discount, result.coupon.code
+
+            order = Order.objects.create(
+                user_id=cart.user_id,
+                billing_address=billing_address,
+                shipping_address=shipping_address,
+                subtotal=subtotal,
+                discount_amount=discount,
+                total_amount=subtotal - discount,
+                coupon_code=coupon_code,
+                notes=notes,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=item.product,
+                    variant=item.variant,
+                    product_name=item.product.name,
+                    product_sku=item.variant.sku if item.variant else item.product.sku,
+                    variant_attributes=item.variant.attributes if item.variant else {},
+                    quantity=item.quantity,
+                    unit_price=price,
+                    total_price=price * item.quantity,
+                )
+                for price, item in zip(prices, items)
+            ])
+            CartItem._base_manager.filter(pk__in=[item.pk for item in items]).delete()
+
+        CartService.invalidate_count(cart.user_id)
+        logger.info('Pedido %s criado (%d itens, cupom %r)', order.order_number, len(items), coupon_code)
+        return order
+    # endregion
+
+    # region Cancelamento
+    @classmethod
+    def cancel(cls, order, user=None, comment=''):
+        """
+        Cancela o pedido com um UPDATE condicional no status, então dois
+        cancelamentos concorrentes não devolvem o cupom duas vezes.
+        """
+        from marketing.services.coupon_service import CouponService
+        from orders.models import Order, OrderStatusHistory
+
+        now = timezone.now()
+        previous_status = order.status
+        with transaction.atomic():
+            updated = Order.objects.filter(pk=order.pk, status__in=cls.CANCELLABLE_STATUSES).update(
+                status='cancelled', cancelled_at=now, updated_at=now,
+            )
+            if not updated:
+                raise OrderError('Pedido não pode ser cancelado.')
+            if order.coupon_code:
+                CouponService.release(order.coupon_code)
+            OrderStatusHistory.objects.create(
+                order=order, previous_status=previous_status, new_status='cancelled', comment=comment, user=user,
+            )
+
+        order.status, order.cancelled_at, order.updated_at = 'cancelled', now, now
+        return order
+    # endregion
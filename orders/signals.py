@@ -0,0 +1,23 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from orders.models import Cart, CartItem
+from orders.services.cart_service import CartService
+
+
+@receiver(user_logged_in)
+def merge_guest_cart(sender, request, user, **kwargs):
+    """Carrinho do visitante passa para o usuário no login"""
+    if request is not None:
+        CartService.merge_guest_cart(request, user)
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def invalidate_cart_count(sender, instance, **kwargs):
+    """Escritas fora do CartService (admin, API) invalidam o contador em cache"""
+    if CartItem.cart.is_cached(instance):
+        user_id = instance.cart.user_id
+    else:
+        user_id = Cart._base_manager.filter(pk=instance.cart_id).values_list('user_id', flat=True).first()
+    CartService.invalidate_count(user_id)
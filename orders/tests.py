@@ -1,3 +1,202 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from marketing.models import Coupon
+from marketing.services.coupon_service import CouponService
+from products.models import Product, ProductVariant
+from users.models import User
+
+from .models import Cart, CartItem, Order, OrderStatusHistory
+from .services.cart_service import CartService
+from .services.order_service import OrderError, OrderService
+
+ADDRESS = {'postal_code': '01310-100', 'city': 'São Paulo', 'state': 'SP'}
+
+
+class OrderCouponTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        cls.product = Product.objects.create(name='Produto', slug='produto', sku='SKU-1', price=Decimal('50.00'))
+        now = timezone.now()
+        cls.coupon = Coupon.objects.create(
+            code='DEZ', discount_type='percentage', discount_value=Decimal('10'),
+            valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=30), usage_limit=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+        CouponService.invalidate()
+
+    def fill_cart(self, user=None):
+        cart = Cart.objects.create(user=user or self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2, unit_price=Decimal('50.00'))
+        return cart
+
+    def used_count(self):
+        return Coupon.objects.values_list('used_count', flat=True).get(pk=self.coupon.pk)
+
+    def test_place_redeems_coupon_and_empties_cart(self):
+        cart = self.fill_cart()
+        order = OrderService.place(cart, ADDRESS, ADDRESS, coupon_code='dez')
+
+        self.assertEqual((order.subtotal, order.discount_amount, order.total_amount), (Decimal('100.00'), Decimal('10.00'), Decimal('90.00')))
+        self.assertEqual(order.coupon_code, 'DEZ')
+        self.assertEqual(list(order.items.values_list('product_sku', 'quantity', 'total_price')), [('SKU-1', 2, Decimal('100.00'))])
+        self.assertFalse(CartItem.objects.filter(cart=cart).exists())
+        self.assertEqual(self.used_count(), 1)
+
+    def test_exhausted_coupon_aborts_the_order(self):
+        OrderService.place(self.fill_cart(), ADDRESS, ADDRESS, coupon_code='DEZ')
+        other = User.objects.create_user(username='outro', email='outro@example.com', password='x')
+        cart = self.fill_cart(other)
+
+        with self.assertRaises(OrderError):
+            OrderService.place(cart, ADDRESS, ADDRESS, coupon_code='DEZ')
+        self.assertEqual(Order.objects.filter(user=other).count(), 0)
+        self.assertTrue(CartItem.objects.filter(cart=cart).exists())
+        self.assertEqual(self.used_count(), 1)
+
+    def test_cancel_releases_coupon_once(self):
+        order = OrderService.place(self.fill_cart(), ADDRESS, ADDRESS, coupon_code='DEZ')
+        OrderService.cancel(order, user=self.user)
+
+        self.assertEqual(self.used_count(), 0)
+        self.assertTrue(CouponService.evaluate('DEZ'))
+        self.assertEqual(OrderStatusHistory.objects.get(order=order).new_status, 'cancelled')
+        with self.assertRaises(OrderError):
+            OrderService.cancel(order)
+        self.assertEqual(self.used_count(), 0)
+
+    def test_place_uses_current_prices_and_a_second_place_finds_the_cart_empty(self):
+        cart = self.fill_cart()
+        Product.objects.filter(pk=self.product.pk).update(price=Decimal('40.00'))
+        order = OrderService.place(cart, ADDRESS, ADDRESS, coupon_code='DEZ')
+
+        self.assertEqual((order.subtotal, order.total_amount), (Decimal('80.00'), Decimal('72.00')))
+        with self.assertRaises(OrderError):
+            OrderService.place(cart, ADDRESS, ADDRESS, coupon_code='DEZ')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.used_count(), 1)
+        self.assertFalse(CartItem._base_manager.filter(cart=cart).exists())
+
+    def test_api_cancel_releases_coupon(self):
+        order = OrderService.place(self.fill_cart(), ADDRESS, ADDRESS, coupon_code='DEZ')
+        self.client.force_login(self.user)
+
+        self.assertEqual(self.client.post(f'/api/v1/orders/{order.pk}/cancel/').status_code, 200)
+        self.assertEqual(self.used_count(), 0)
+        self.assertEqual(self.client.post('/api/v1/orders/place/', {'billing_address': ADDRESS}, content_type='application/json').status_code, 405)
+
+    def test_validate_coupon_rejects_invalid_subtotals(self):
+        self.client.force_login(self.user)
+        url = '/api/v1/coupons/validate_coupon/'
+
+        for subtotal in ('NaN', 'Infinity', '-10', 'abc'):
+            response = self.client.post(url, {'code': 'DEZ', 'subtotal': subtotal}, content_type='application/json')
+            self.assertEqual(response.status_code, 400, subtotal)
+        response = self.client.post(url, {'code': 'DEZ', 'subtotal': '100'}, content_type='application/json')
+        self.assertEqual(Decimal(str(response.json()['discount'])), Decimal('10.00'))
+
+    def test_validate_coupon_reads_the_cart_only_when_asked(self):
+        self.fill_cart()
+        self.client.force_login(self.user)
+        CouponService.evaluate('DEZ')
+        url = '/api/v1/coupons/validate_coupon/'
+
+        with self.assertNumQueries(0):
+            CouponService.evaluate('DEZ')
+        response = self.client.post(url, {'code': 'DEZ'}, content_type='application/json')
+        self.assertIsNone(response.json()['discount'])
+        response = self.client.post(url, {'code': 'DEZ', 'cart': True}, content_type='application/json')
+        self.assertEqual(Decimal(str(response.json()['discount'])), Decimal('10.00'))
+
+
+class GuestCartMergeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        cls.products = [
+            Product.objects.create(name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, user=None, cookies=None):
+        request = self.factory.get('/')
+        request.user = user or AnonymousUser()
+        request.COOKIES.update(cookies or {})
+        return request
+
+    def guest_cart(self, quantities):
+        request = self.request()
+        for product, quantity in quantities:
+            cart, count = CartService.add_item(request, product, quantity=quantity)
+            request = self.request(cookies=self.cookie(cart, count))
+        return cart, request.COOKIES
+
+    def cookie(self, cart, count):
+        response = CartService.set_cookie(HttpResponse(), cart.session_key, count)
+        return {CartService.COOKIE_NAME: response.cookies[CartService.COOKIE_NAME].value}
+
+    def quantities(self, cart):
+        return dict(CartItem.objects.filter(cart=cart).values_list('product__sku', 'quantity'))
+
+    def test_merge_sums_common_items_and_moves_the_rest(self):
+        user_cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=user_cart, product=self.products[0], quantity=1, unit_price=Decimal('10.00'))
+        guest, cookies = self.guest_cart([(self.products[0], 2), (self.products[1], 1)])
+
+        request = self.request(self.user, cookies)
+        merged = CartService.merge_guest_cart(request, self.user)
+
+        self.assertEqual(merged.pk, user_cart.pk)
+        self.assertEqual(self.quantities(user_cart), {'SKU-0': 3, 'SKU-1': 1})
+        self.assertFalse(Cart.objects.with_deleted().filter(pk=guest.pk).exists())
+        self.assertTrue(request.guest_cart_merged)
+        self.assertEqual(CartService.cart_count(user_cart), 4)
+
+    def test_merge_creates_the_user_cart(self):
+        _, cookies = self.guest_cart([(self.products[2], 2)])
+
+        cart = CartService.merge_guest_cart(self.request(self.user, cookies), self.user)
+
+        self.assertEqual(cart.user, self.user)
+        self.assertEqual(self.quantities(cart), {'SKU-2': 2})
+
+    def test_without_guest_cookie_nothing_happens(self):
+        self.assertIsNone(CartService.merge_guest_cart(self.request(self.user), self.user))
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+    def test_removed_items_are_restored_on_add_and_merge(self):
+        variant = ProductVariant.objects.create(product=self.products[0], sku='SKU-0-M', attributes={'size': 'M'})
+        user_cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=user_cart, product=self.products[0], variant=variant, quantity=1, unit_price=Decimal('10.00')).delete()
+
+        cart, count = CartService.add_item(self.request(self.user), self.products[0], variant, quantity=2)
+        self.assertEqual((cart.pk, count), (user_cart.pk, 2))
+        self.assertEqual(CartItem._base_manager.filter(cart=user_cart).count(), 1)
+
+        CartItem.objects.get(cart=user_cart).delete()
+        request = self.request()
+        guest, guest_count = CartService.add_item(request, self.products[0], variant, quantity=3)
+        CartService.merge_guest_cart(self.request(self.user, self.cookie(guest, guest_count)), self.user)
+        self.assertEqual(list(CartItem.objects.filter(cart=user_cart).values_list('variant__sku', 'quantity')), [('SKU-0-M', 3)])
+
+    def test_add_to_cart_rejects_bad_ids(self):
+        url = reverse('orders:add_to_cart')
+
+        self.assertEqual(self.client.post(url, {'product_id': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'product_id': self.products[0].pk, 'variant_id': '1x'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'product_id': '999999'}).status_code, 404)
+        self.assertEqual(self.client.post(url, {'product_id': self.products[0].pk}).json()['cart_count'], 1)
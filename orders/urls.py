@@ -6,7 +6,7 @@ app_name = 'orders'
 urlpatterns = [
     # Carrinho
     # path('carrinho/', views.CartView.as_view(), name='cart'),
-    # path('carrinho/adicionar/', views.AddToCartView.as_view(), name='add_to_cart'),
+    path('carrinho/adicionar/', views.AddToCartView.as_view(), name='add_to_cart'),
     # path('carrinho/remover/', views.RemoveFromCartView.as_view(), name='remove_from_cart'),
     # path('carrinho/atualizar/', views.UpdateCartView.as_view(), name='update_cart'),
     
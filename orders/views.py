@@ -1,37 +1,41 @@
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 from django.views import View
-from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from django.db.models import Sum
 from django.template.loader import render_to_string
+from core.asynchronous import aget_user, async_login_required
 from .models import CartItem
+from .services.cart_service import CartService
 
-@method_decorator(login_required, name='dispatch')
+@method_decorator(async_login_required, name='dispatch')
 class CartDropdownView(View):
-    """View para conteúdo do dropdown do carrinho"""
+    """View para conteúdo do dropdown do carrinho (assíncrona)"""
     
-    def get(self, request):
+    async def get(self, request):
         try:
+            user = await aget_user(request)
+            
             # Buscar itens do carrinho
-            cart_items = CartItem.objects.filter(
-                cart__user=request.user
+            cart_items = [item async for item in CartItem.objects.filter(
+                cart__user_id=user.pk
             ).select_related(
                 'product', 'variant'
             ).prefetch_related(
                 'product__images'
-            )[:5]  # Mostrar apenas os primeiros 5 itens
+            )[:5]]  # Mostrar apenas os primeiros 5 itens
             
             # Calcular total
             total_amount = sum(
-                item.quantity * (item.variant.price if item.variant else item.product.price)
+                item.quantity * ((item.variant.price if item.variant else None) or item.product.price)
                 for item in cart_items
             )
             
             # Total de itens
             total_items = sum(item.quantity for item in cart_items)
             
-            # Renderizar template
-            html = render_to_string('components/cart_dropdown.html', {
+            # Renderizar template (os context processors consultam o banco: thread do ORM)
+            html = await sync_to_async(render_to_string)('components/cart_dropdown.html', {
                 'cart_items': cart_items,
                 'total_amount': total_amount,
                 'total_items': total_items,
@@ -51,23 +55,41 @@ class CartDropdownView(View):
 
 
 class UpdateCartCountView(View):
-    """View para atualizar contador do carrinho via AJAX"""
+    """View para atualizar contador do carrinho via AJAX (assíncrona)"""
     
-    def get(self, request):
-        if request.user.is_authenticated:
-            cart_count = CartItem.objects.filter(
-                cart__user=request.user
-            ).aggregate(
-                total_items=Sum('quantity')
-            )['total_items'] or 0
-        else:
-            # Para usuários não logados
-            cart_count = 0
-            if 'cart_items' in request.session:
-                cart_count = sum(
-                    item['quantity'] for item in request.session['cart_items'].values()
-                )
-        
+    async def get(self, request):
+        # Visitantes: contador do cookie assinado; usuários: cache
         return JsonResponse({
-            'cart_count': cart_count
+            'cart_count': await CartService.acount(request)
+        })
+
+
+class AddToCartView(View):
+    """Adiciona um produto ao carrinho (usuário ou visitante) via AJAX"""
+    
+    def post(self, request):
+        from products.models import Product, ProductVariant
+        
+        try:
+            quantity = max(int(request.POST.get('quantity', 1)), 1)
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Quantidade inválida'}, status=400)
+        
+        product_id = request.POST.get('product_id', '')
+        variant_id = request.POST.get('variant_id', '')
+        if not product_id.isdigit() or (variant_id and not variant_id.isdigit()):
+            return JsonResponse({'error': 'Produto inválido'}, status=400)
+        
+        product = get_object_or_404(Product, pk=product_id, is_active=True)
+        variant = None
+        if variant_id:
+            variant = get_object_or_404(ProductVariant, pk=variant_id, product=product, is_active=True)
+        
+        cart, cart_count = CartService.add_item(request, product, variant, quantity)
+        response = JsonResponse({
+            'success': True,
+            'cart_count': cart_count,
         })
+        if not request.user.is_authenticated:
+            CartService.set_cookie(response, cart.session_key, cart_count)
+        return response
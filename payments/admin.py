@@ -14,3 +14,32 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     search_fields = ['order__order_number', 'external_id', 'reference']
     readonly_fields = ['uuid', 'created_at', 'updated_at']
 
+
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['provider', 'event_id', 'external_id', 'status', 'state', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['state', 'provider']
+    search_fields = ['event_id', 'external_id']
+    readonly_fields = ['uuid', 'payload', 'created_at', 'updated_at', 'processed_at', 'locked_at']
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(state='processed').update(state='pending', attempts=0, locked_at=None, error='')
+        self.message_user(request, f'{updated} eventos reenviados para a fila.')
+    requeue.short_description = 'Reprocessar eventos selecionados'
+
+
+@admin.register(PaymentReconciliation)
+class PaymentReconciliationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'provider', 'status', 'settlement_rows', 'checked', 'matched', 'mismatched', 'started_at', 'finished_at']
+    list_filter = ['status', 'provider', 'is_dry_run']
+    readonly_fields = ['uuid', 'started_at', 'finished_at', 'created_at', 'updated_at']
+
+
+@admin.register(PaymentReconciliationItem)
+class PaymentReconciliationItemAdmin(admin.ModelAdmin):
+    list_display = ['external_id', 'issue', 'expected_amount', 'settled_amount', 'expected_fee', 'settled_fee', 'reconciliation']
+    list_filter = ['issue']
+    search_fields = ['external_id']
+    raw_id_fields = ['reconciliation', 'transaction']
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from payments.services.webhook_service import WebhookProcessor
+
+
+class Command(BaseCommand):
+    help = 'Processa a caixa de entrada de webhooks de pagamento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Número de workers em paralelo')
+        parser.add_argument('--batch-size', type=int, default=WebhookProcessor.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--retry-delay', type=int, default=60, help='Segundos até reprocessar um evento sem transação')
+        parser.add_argument('--loop', action='store_true', help='Continua aguardando novos eventos')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Espera (s) com a fila vazia, no modo --loop')
+
+    def handle(self, *args, **options):
+        processor = WebhookProcessor(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            max_attempts=options['max_attempts'],
+            retry_delay=options['retry_delay'],
+        )
+        try:
+            stats = processor.run(loop=options['loop'], idle_sleep=options['sleep'])
+        except KeyboardInterrupt:
+            stats = processor.stats
+
+        summary = ', '.join(f'{key}={value}' for key, value in stats.items())
+        self.stdout.write(self.style.SUCCESS(f'Webhooks: {summary}'))
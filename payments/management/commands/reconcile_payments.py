@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.export_service import ExportService
+from payments.services.reconciliation_service import SettlementReconciler
+
+
+class Command(BaseCommand):
+    help = 'Concilia as transações de pagamento com arquivos de liquidação do gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Arquivos CSV de liquidação (aceita .gz)')
+        parser.add_argument('--provider', type=str, default='', help='Provedor do método de pagamento')
+        parser.add_argument('--since', type=str, help='Transações criadas a partir de (ISO)')
+        parser.add_argument('--until', type=str, help='Transações criadas antes de (ISO)')
+        parser.add_argument('--delimiter', type=str, default=',')
+        parser.add_argument('--chunk-size', type=int, default=SettlementReconciler.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--tolerance', type=str, default='0.01', help='Diferença aceita em valores')
+        parser.add_argument('--dry-run', action='store_true', help='Gera o relatório sem marcar transações')
+
+    def handle(self, *args, **options):
+        try:
+            reconciler = SettlementReconciler(
+                provider=options['provider'],
+                since=ExportService.parse_since(options['since']),
+                until=ExportService.parse_since(options['until']),
+                chunk_size=options['chunk_size'],
+                tolerance=options['tolerance'],
+                dry_run=options['dry_run'],
+            )
+            report = reconciler.run(options['paths'], options['delimiter'])
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        issues = ', '.join(f'{key}={value}' for key, value in reconciler.issues.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Conciliação #{report.pk}: linhas={report.settlement_rows}, transações={report.checked}, '
+            f'conciliadas={report.matched}, {issues}'
+        ))
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.21 on 2026-10-19 11:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, unique=True, verbose_name='UUID Público')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='Deletado')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Deletado em')),
+                ('provider', models.CharField(max_length=100, verbose_name='Provedor')),
+                ('event_id', models.CharField(max_length=200, verbose_name='ID do Evento')),
+                ('external_id', models.CharField(max_length=200, verbose_name='ID Externo')),
+                ('event_type', models.CharField(blank=True, max_length=100, verbose_name='Tipo do Evento')),
+                ('status', models.CharField(blank=True, max_length=50, verbose_name='Status Informado')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Payload')),
+                ('state', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('processed', 'Processado'), ('ignored', 'Ignorado'), ('failed', 'Falhou')], default='pending', max_length=20, verbose_name='Situação')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Travado em')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deleted_%(class)s', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Webhook de Pagamento',
+                'verbose_name_plural': 'Webhooks de Pagamento',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['state', 'created_at'], name='payments_pa_state_eb92af_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='paymentwebhookevent',
+            constraint=models.UniqueConstraint(fields=('provider', 'external_id', 'event_id'), name='unique_payment_webhook_event'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.21 on 2026-10-19 11:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0003_paymentwebhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentReconciliation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, unique=True, verbose_name='UUID Público')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='Deletado')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Deletado em')),
+                ('provider', models.CharField(blank=True, max_length=100, verbose_name='Provedor')),
+                ('source', models.TextField(blank=True, verbose_name='Arquivos de Origem')),
+                ('period_start', models.DateTimeField(blank=True, null=True, verbose_name='Início do Período')),
+                ('period_end', models.DateTimeField(blank=True, null=True, verbose_name='Fim do Período')),
+                ('status', models.CharField(choices=[('running', 'Em execução'), ('completed', 'Concluída'), ('failed', 'Falhou')], default='running', max_length=20, verbose_name='Status')),
+                ('is_dry_run', models.BooleanField(default=False, verbose_name='Simulação')),
+                ('settlement_rows', models.PositiveIntegerField(default=0, verbose_name='Linhas do Arquivo')),
+                ('checked', models.PositiveIntegerField(default=0, verbose_name='Transações Analisadas')),
+                ('matched', models.PositiveIntegerField(default=0, verbose_name='Conciliadas')),
+                ('mismatched', models.PositiveIntegerField(default=0, verbose_name='Divergências')),
+                ('settled_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor Liquidado')),
+                ('settled_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Taxas Liquidadas')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Iniciada em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizada em')),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deleted_%(class)s', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conciliação de Pagamentos',
+                'verbose_name_plural': 'Conciliações de Pagamentos',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='paymenttransaction',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Conciliado em'),
+        ),
+        migrations.CreateModel(
+            name='PaymentReconciliationItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, unique=True, verbose_name='UUID Público')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='Deletado')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Deletado em')),
+                ('external_id', models.CharField(max_length=200, verbose_name='ID Externo')),
+                ('issue', models.CharField(choices=[('amount', 'Valor divergente'), ('fee', 'Taxa divergente'), ('missing_transaction', 'Liquidação sem transação'), ('missing_settlement', 'Transação sem liquidação'), ('duplicate', 'Duplicidade')], max_length=30, verbose_name='Divergência')),
+                ('expected_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor Esperado')),
+                ('settled_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor Liquidado')),
+                ('expected_fee', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Taxa Esperada')),
+                ('settled_fee', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Taxa Liquidada')),
+                ('details', models.JSONField(blank=True, default=dict, verbose_name='Detalhes')),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deleted_%(class)s', to=settings.AUTH_USER_MODEL)),
+                ('reconciliation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='payments.paymentreconciliation', verbose_name='Conciliação')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reconciliation_items', to='payments.paymenttransaction', verbose_name='Transação')),
+            ],
+            options={
+                'verbose_name': 'Divergência de Conciliação',
+                'verbose_name_plural': 'Divergências de Conciliação',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['reconciliation', 'issue'], name='payments_pa_reconci_3db6b7_idx')],
+            },
+        ),
+    ]
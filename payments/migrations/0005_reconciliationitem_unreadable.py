@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-19 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_payment_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymentreconciliationitem',
+            name='issue',
+            field=models.CharField(choices=[('amount', 'Valor divergente'), ('fee', 'Taxa divergente'), ('missing_transaction', 'Liquidação sem transação'), ('missing_settlement', 'Transação sem liquidação'), ('duplicate', 'Duplicidade'), ('unreadable', 'Linha ilegível no arquivo')], max_length=30, verbose_name='Divergência'),
+        ),
+    ]
@@ -73,6 +73,7 @@ class PaymentTransaction(BaseModel):
     # Datas
     processed_at = models.DateTimeField(null=True, blank=True, verbose_name='Processado em')
     expires_at = models.DateTimeField(null=True, blank=True, verbose_name='Expira em')
+    reconciled_at = models.DateTimeField(null=True, blank=True, verbose_name='Conciliado em')
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
@@ -117,6 +118,112 @@ class PaymentTransactionHistory(BaseModel):
         return f"Transação #{self.transaction.id} - {self.previous_status} → {self.new_status}"
 
 
+class PaymentWebhookEvent(BaseModel):
+    """Caixa de entrada dos webhooks dos gateways (processada de forma assíncrona)"""
+    STATE_CHOICES = [
+        ('pending', 'Pendente'),
+        ('processing', 'Processando'),
+        ('processed', 'Processado'),
+        ('ignored', 'Ignorado'),
+        ('failed', 'Falhou'),
+    ]
+
+    provider = models.CharField(max_length=100, verbose_name='Provedor')
+    event_id = models.CharField(max_length=200, verbose_name='ID do Evento')
+    external_id = models.CharField(max_length=200, verbose_name='ID Externo')
+    event_type = models.CharField(max_length=100, blank=True, verbose_name='Tipo do Evento')
+    status = models.CharField(max_length=50, blank=True, verbose_name='Status Informado')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Payload')
+
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='pending', verbose_name='Situação')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Tentativas')
+    error = models.TextField(blank=True, verbose_name='Erro')
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name='Travado em')
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name='Processado em')
+
+    class Meta:
+        verbose_name = 'Webhook de Pagamento'
+        verbose_name_plural = 'Webhooks de Pagamento'
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'external_id', 'event_id'], name='unique_payment_webhook_event'),
+        ]
+        indexes = [
+            models.Index(fields=['state', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_id} - {self.external_id} ({self.state})"
+
+
+class PaymentReconciliation(BaseModel):
+    """Execução de conciliação contra um arquivo de liquidação do gateway"""
+    STATUS_CHOICES = [
+        ('running', 'Em execução'),
+        ('completed', 'Concluída'),
+        ('failed', 'Falhou'),
+    ]
+
+    provider = models.CharField(max_length=100, blank=True, verbose_name='Provedor')
+    source = models.TextField(blank=True, verbose_name='Arquivos de Origem')
+    period_start = models.DateTimeField(null=True, blank=True, verbose_name='Início do Período')
+    period_end = models.DateTimeField(null=True, blank=True, verbose_name='Fim do Período')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', verbose_name='Status')
+    is_dry_run = models.BooleanField(default=False, verbose_name='Simulação')
+
+    # Totais
+    settlement_rows = models.PositiveIntegerField(default=0, verbose_name='Linhas do Arquivo')
+    checked = models.PositiveIntegerField(default=0, verbose_name='Transações Analisadas')
+    matched = models.PositiveIntegerField(default=0, verbose_name='Conciliadas')
+    mismatched = models.PositiveIntegerField(default=0, verbose_name='Divergências')
+    settled_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Valor Liquidado')
+    settled_fee = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Taxas Liquidadas')
+
+    started_at = models.DateTimeField(auto_now_add=True, verbose_name='Iniciada em')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Finalizada em')
+
+    class Meta:
+        verbose_name = 'Conciliação de Pagamentos'
+        verbose_name_plural = 'Conciliações de Pagamentos'
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Conciliação #{self.id} - {self.provider or 'todos'} ({self.get_status_display()})"
+
+
+class PaymentReconciliationItem(BaseModel):
+    """Divergência encontrada numa conciliação"""
+    ISSUE_CHOICES = [
+        ('amount', 'Valor divergente'),
+        ('fee', 'Taxa divergente'),
+        ('missing_transaction', 'Liquidação sem transação'),
+        ('missing_settlement', 'Transação sem liquidação'),
+        ('duplicate', 'Duplicidade'),
+        ('unreadable', 'Linha ilegível no arquivo'),
+    ]
+
+    reconciliation = models.ForeignKey(PaymentReconciliation, on_delete=models.CASCADE, related_name='items', verbose_name='Conciliação')
+    transaction = models.ForeignKey(PaymentTransaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='reconciliation_items', verbose_name='Transação')
+    external_id = models.CharField(max_length=200, verbose_name='ID Externo')
+    issue = models.CharField(max_length=30, choices=ISSUE_CHOICES, verbose_name='Divergência')
+    expected_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Valor Esperado')
+    settled_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Valor Liquidado')
+    expected_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Taxa Esperada')
+    settled_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Taxa Liquidada')
+    details = models.JSONField(default=dict, blank=True, verbose_name='Detalhes')
+
+    class Meta:
+        verbose_name = 'Divergência de Conciliação'
+        verbose_name_plural = 'Divergências de Conciliação'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['reconciliation', 'issue']),
+        ]
+
+    def __str__(self):
+        return f"{self.external_id} - {self.get_issue_display()}"
+
+
 class UserPaymentCard(BaseModel):
     """Cartões salvos dos usuários"""
     BRAND_CHOICES = [
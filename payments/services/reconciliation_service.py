@@ -0,0 +1,322 @@
+import csv
+import gzip
+import io
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from models.batching import keyset_chunks
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+
+def decimal_separator(value):
+    """
+    Separador decimal que o valor revela sozinho (',' ou '.'), ou None quando
+    ele não permite decidir ('1.234', '1,234', sem separador).
+    """
+    value = (value or '').strip()
+    last = max(value.rfind(','), value.rfind('.'))
+    if last < 0:
+        return None
+    separator = value[last]
+    other = '.' if separator == ',' else ','
+    if other in value:
+        return separator
+    if value.count(separator) > 1:
+        return other
+    return separator if len(value) - last - 1 != 3 else None
+
+
+def parse_decimal(value, separator=None):
+    """
+    Valor monetário em '1234.56', '1,234.56', '1.234,56' ou '1234,56': o
+    último separador é o decimal e o outro é o de milhar. Texto sem número
+    vira None. '1,234'/'1.234' só são aceitos com o `separator` decimal do
+    arquivo; sem ele, e com grupos de milhar irregulares, levantam ValueError
+    em vez de virar outro valor.
+    """
+    value = (value or '').strip().replace('R$', '').replace(' ', '')
+    if not value:
+        return None
+
+    last = max(value.rfind(','), value.rfind('.'))
+    if last < 0:
+        integer, fraction = value, ''
+    else:
+        separator_found = value[last]
+        other = '.' if separator_found == ',' else ','
+        if other not in value and value.count(separator_found) > 1:
+            # Só um tipo de separador, repetido: é o de milhar ('1.234.567')
+            integer, fraction = value, ''
+        elif other not in value and len(value) - last - 1 == 3 and separator != separator_found:
+            if separator is None:
+                raise ValueError(f'Valor ambíguo: {value!r} (separador de milhar ou decimal?)')
+            integer, fraction = value, ''
+        else:
+            integer, fraction = value[:last], value[last + 1:]
+
+    groups = integer.lstrip('-').replace('.', ',').split(',')
+    if len(groups) > 1 and (not 1 <= len(groups[0]) <= 3 or any(len(group) != 3 for group in groups[1:])):
+        raise ValueError(f'Valor ambíguo: {value!r} (grupos de milhar irregulares)')
+
+    number = integer.replace(',', '').replace('.', '') + (f'.{fraction}' if fraction else '')
+    try:
+        return Decimal(number).quantize(CENT)
+    except InvalidOperation:
+        return None
+
+
+class SettlementReconciler:
+    """
+    Concilia transações com os arquivos de liquidação do gateway.
+
+    Os arquivos (CSV, opcionalmente .gz) são lidos em streaming para um mapa
+    external_id -> (valor, taxa); as transações são percorridas em blocos
+    keyset e unidas a esse mapa em memória (hash join). Divergências viram
+    PaymentReconciliationItem (bulk_create por bloco) e as transações
+    conferidas recebem `reconciled_at` num único UPDATE por bloco.
+
+    Colunas aceitas: external_id (ou id/transaction_id), amount (ou
+    gross_amount), fee (ou fee_amount).
+    """
+    DEFAULT_CHUNK_SIZE = 5000
+    STATUSES = ['completed', 'partially_refunded', 'refunded']
+    COLUMN_ALIASES = {
+        'external_id': ('external_id', 'id', 'transaction_id'),
+        'amount': ('amount', 'gross_amount', 'valor'),
+        'fee': ('fee', 'fee_amount', 'taxa'),
+    }
+
+    def __init__(self, provider='', since=None, until=None, chunk_size=None, tolerance=CENT, dry_run=False):
+        self.provider = provider
+        self.since = since
+        self.until = until
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.tolerance = Decimal(tolerance)
+        self.dry_run = dry_run
+        self.settlements = {}   # external_id -> [valor, taxa, ocorrências]
+        self.seen = set()
+        self.unreadable = []    # divergências das linhas que não puderam ser lidas
+        self.unreadable_ids = set()
+        self.report = None
+        self.issues = dict.fromkeys([choice for choice, _ in self._issue_choices()], 0)
+
+    @staticmethod
+    def _issue_choices():
+        from payments.models import PaymentReconciliationItem
+        return PaymentReconciliationItem.ISSUE_CHOICES
+
+    # region Leitura
+    @staticmethod
+    def open_file(path):
+        if str(path).endswith('.gz'):
+            return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8-sig', newline='')
+        return open(path, encoding='utf-8-sig', newline='')
+
+    def resolve_columns(self, fieldnames):
+        names = {(name or '').strip().lower(): name for name in fieldnames or []}
+        columns = {}
+        for column, aliases in self.COLUMN_ALIASES.items():
+            columns[column] = next((names[alias] for alias in aliases if alias in names), None)
+        if not columns['external_id'] or not columns['amount']:
+            raise ValueError('O arquivo precisa das colunas external_id e amount')
+        return columns
+
+    def load_settlements(self, paths, delimiter=','):
+        """
+        Monta o mapa de liquidação; IDs repetidos no arquivo são contados.
+
+        O separador decimal é decidido uma vez por arquivo, pelo primeiro
+        valor que o revela; linhas ambíguas antes dele ('1.000') esperam o fim
+        do arquivo. Uma linha que nem assim pode ser lida vira divergência
+        `unreadable` em vez de interromper a conciliação.
+        """
+        rows = 0
+        for path in paths:
+            separator, pending = None, []
+            with self.open_file(path) as handle:
+                reader = csv.DictReader(handle, delimiter=delimiter)
+                columns = self.resolve_columns(reader.fieldnames)
+                for row in reader:
+                    external_id = (row.get(columns['external_id']) or '').strip()
+                    if not external_id:
+                        continue
+                    values = (row.get(columns['amount']), row.get(columns['fee']) if columns['fee'] else None)
+                    separator = separator or next(filter(None, map(decimal_separator, values)), None)
+                    try:
+                        rows += self.add_settlement(external_id, values, separator)
+                    except ValueError as e:
+                        if separator is None:
+                            pending.append((reader.line_num, external_id, values))
+                        else:
+                            self.add_unreadable(path, reader.line_num, external_id, values, e)
+
+            for line_num, external_id, values in pending:
+                try:
+                    rows += self.add_settlement(external_id, values, separator)
+                except ValueError as e:
+                    self.add_unreadable(path, line_num, external_id, values, e)
+        return rows
+
+    def add_unreadable(self, path, line_num, external_id, values, error):
+        logger.warning('%s, linha %s: %s', path, line_num, error)
+        self.unreadable_ids.add(external_id)
+        self.unreadable.append(self.issue(
+            'unreadable', external_id=external_id, source=str(path), line=line_num,
+            amount=values[0], fee=values[1], error=str(error),
+        ))
+
+    def add_settlement(self, external_id, values, separator):
+        amount = parse_decimal(values[0], separator)
+        fee = parse_decimal(values[1], separator) if values[1] is not None else None
+        if amount is None:
+            return 0
+        entry = self.settlements.get(external_id)
+        if entry is None:
+            self.settlements[external_id] = [amount, fee, 1]
+        else:
+            entry[2] += 1
+        return 1
+    # endregion
+
+    def get_queryset(self):
+        from payments.models import PaymentTransaction
+
+        queryset = PaymentTransaction.objects.filter(status__in=self.STATUSES).exclude(external_id='')
+        if self.provider:
+            queryset = queryset.filter(payment_method__provider__iexact=self.provider)
+        if self.since:
+            queryset = queryset.filter(created_at__gte=self.since)
+        if self.until:
+            queryset = queryset.filter(created_at__lt=self.until)
+        return queryset.values('id', 'external_id', 'amount', 'fee_amount')
+
+    def issue(self, issue, row=None, external_id='', settlement=None, **details):
+        from payments.models import PaymentReconciliationItem
+
+        self.issues[issue] += 1
+        return PaymentReconciliationItem(
+            reconciliation=self.report,
+            transaction_id=row['id'] if row else None,
+            external_id=row['external_id'] if row else external_id,
+            issue=issue,
+            expected_amount=row['amount'] if row else None,
+            expected_fee=row['fee_amount'] if row else None,
+            settled_amount=settlement[0] if settlement else None,
+            settled_fee=settlement[1] if settlement else None,
+            details=details,
+        )
+
+    def compare(self, rows):
+        """Hash join de um bloco de transações com o mapa de liquidação"""
+        items, confirmed = [], []
+        for row in rows:
+            external_id = row['external_id']
+            if external_id in self.seen:
+                items.append(self.issue('duplicate', row, source='transactions'))
+                continue
+            self.seen.add(external_id)
+
+            settlement = self.settlements.pop(external_id, None)
+            if settlement is None:
+                # Linha ilegível no arquivo: já registrada como `unreadable`
+                if external_id not in self.unreadable_ids:
+                    items.append(self.issue('missing_settlement', row))
+                continue
+
+            amount, fee, occurrences = settlement
+            ok = True
+            if occurrences > 1:
+                items.append(self.issue('duplicate', row, settlement=settlement, source='settlement', occurrences=occurrences))
+                ok = False
+            if abs(amount - row['amount']) > self.tolerance:
+                items.append(self.issue('amount', row, settlement=settlement))
+                ok = False
+            if fee is not None and abs(fee - row['fee_amount']) > self.tolerance:
+                items.append(self.issue('fee', row, settlement=settlement))
+                ok = False
+            if ok:
+                confirmed.append(row['id'])
+        return items, confirmed
+
+    def save_chunk(self, items, confirmed, now):
+        from payments.models import PaymentReconciliationItem, PaymentTransaction
+
+        PaymentReconciliationItem.objects.bulk_create(items, batch_size=self.chunk_size)
+        if confirmed and not self.dry_run:
+            PaymentTransaction.objects.filter(id__in=confirmed).update(reconciled_at=now, updated_at=now)
+
+    def leftovers(self, now):
+        """
+        Liquidações que sobraram: procura as transações fora do período/filtro
+        antes de marcá-las como sem transação.
+        """
+        from payments.models import PaymentTransaction
+
+        pending = [external_id for external_id in self.settlements if external_id not in self.seen]
+        for start in range(0, len(pending), self.chunk_size):
+            keys = pending[start:start + self.chunk_size]
+            rows = list(PaymentTransaction.objects.filter(external_id__in=keys).values(
+                'id', 'external_id', 'amount', 'fee_amount', 'status'
+            ).order_by('id'))
+
+            # Liquidado no gateway, mas sem pagamento concluído do nosso lado
+            unpaid = [row for row in rows if row['status'] not in self.STATUSES]
+            items = [
+                self.issue('missing_transaction', row, settlement=self.settlements.pop(row['external_id'], None), status=row['status'])
+                for row in unpaid if row['external_id'] in self.settlements
+            ]
+            rows = [row for row in rows if row['status'] in self.STATUSES]
+            found, confirmed = self.compare(rows)
+            items += found
+            self.report.checked += len(rows)
+            self.report.matched += len(confirmed)
+            for external_id in keys:
+                settlement = self.settlements.pop(external_id, None)
+                if settlement is not None:
+                    items.append(self.issue('missing_transaction', external_id=external_id, settlement=settlement))
+            self.save_chunk(items, confirmed, now)
+
+    def run(self, paths, delimiter=','):
+        from payments.models import PaymentReconciliation
+
+        self.report = PaymentReconciliation.objects.create(
+            provider=self.provider,
+            source='\n'.join(str(path) for path in paths),
+            period_start=self.since,
+            period_end=self.until,
+            is_dry_run=self.dry_run,
+        )
+        try:
+            self.report.settlement_rows = self.load_settlements(paths, delimiter)
+            self.save_chunk(self.unreadable, [], None)
+            self.report.settled_amount = sum((entry[0] for entry in self.settlements.values()), Decimal('0.00'))
+            self.report.settled_fee = sum((entry[1] or 0 for entry in self.settlements.values()), Decimal('0.00'))
+
+            now = timezone.now()
+            for rows in keyset_chunks(self.get_queryset(), self.chunk_size):
+                with transaction.atomic():
+                    items, confirmed = self.compare(rows)
+                    self.save_chunk(items, confirmed, now)
+                self.report.checked += len(rows)
+                self.report.matched += len(confirmed)
+
+            with transaction.atomic():
+                self.leftovers(now)
+        except Exception:
+            self.report.status = 'failed'
+            self.report.finished_at = timezone.now()
+            self.report.save()
+            raise
+
+        self.report.mismatched = sum(self.issues.values())
+        self.report.status = 'completed'
+        self.report.finished_at = timezone.now()
+        self.report.save()
+        logger.info('Conciliação #%s concluída: %s', self.report.pk, self.issues)
+        return self.report
@@ -0,0 +1,281 @@
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookError(ValueError):
+    """Payload de webhook inválido (responde 400 ao gateway)"""
+
+
+# region Recebimento
+class WebhookInbox:
+    """
+    Recebe o callback do gateway e grava na caixa de entrada.
+
+    O request só faz um INSERT ... ON CONFLICT DO NOTHING pela chave
+    (provider, external_id, event_id); retentativas do gateway caem no
+    conflito e são reconhecidas sem gerar trabalho novo. O processamento
+    fica a cargo do WebhookProcessor.
+    """
+    SIGNATURE_HEADER = 'HTTP_X_WEBHOOK_SIGNATURE'
+
+    @staticmethod
+    def get_secret(provider):
+        return getattr(settings, 'PAYMENT_WEBHOOK_SECRETS', {}).get(provider)
+
+    @classmethod
+    def verify_signature(cls, provider, body, signature):
+        """HMAC-SHA256 do corpo com o segredo do provedor; provedor sem segredo é recusado"""
+        secret = cls.get_secret(provider)
+        if not secret:
+            logger.warning('Webhook recusado: provedor sem segredo configurado (%s)', provider)
+            return False
+        expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, (signature or '').strip())
+
+    @staticmethod
+    def parse(payload, body=b''):
+        """Extrai (event_id, external_id, event_type, status) dos formatos comuns"""
+        if not isinstance(payload, dict):
+            raise WebhookError('Payload deve ser um objeto JSON')
+
+        data = payload.get('data') if isinstance(payload.get('data'), dict) else {}
+        external_id = payload.get('external_id') or payload.get('transaction_id') or data.get('id')
+        if not external_id:
+            raise WebhookError('ID externo da transação ausente')
+
+        # Sem ID de evento, o hash do corpo deduplica retentativas idênticas
+        event_id = payload.get('event_id') or payload.get('id') or hashlib.blake2b(body, digest_size=16).hexdigest()
+        return {
+            'event_id': str(event_id)[:200],
+            'external_id': str(external_id)[:200],
+            'event_type': str(payload.get('type') or payload.get('action') or payload.get('event') or '')[:100],
+            'status': str(payload.get('status') or data.get('status') or '')[:50],
+        }
+
+    @classmethod
+    def receive(cls, provider, payload, body=b''):
+        from payments.models import PaymentWebhookEvent
+
+        fields = cls.parse(payload, body)
+        PaymentWebhookEvent.objects.bulk_create(
+            [PaymentWebhookEvent(provider=provider, payload=payload, **fields)],
+            ignore_conflicts=True,
+        )
+        return fields
+# endregion
+
+
+class WebhookProcessor:
+    """
+    Aplica os webhooks pendentes às transações.
+
+    Cada worker reivindica um lote com SELECT ... FOR UPDATE SKIP LOCKED, então
+    vários workers (threads ou processos) nunca disputam os mesmos eventos. Por
+    lote: uma consulta para as transações, uma atualização condicional por
+    transação (`status` atual como versão — concorrência otimista), o histórico
+    em bulk_create e a confirmação dos pedidos em um único UPDATE.
+    """
+    DEFAULT_BATCH_SIZE = 500
+    STATUS_ALIASES = {
+        'approved': 'completed', 'paid': 'completed', 'succeeded': 'completed', 'confirmed': 'completed',
+        'in_process': 'processing', 'in_mediation': 'processing', 'authorized': 'processing', 'waiting': 'processing',
+        'rejected': 'failed', 'declined': 'failed', 'refused': 'failed',
+        'canceled': 'cancelled', 'expired': 'cancelled',
+        'charged_back': 'refunded', 'chargeback': 'refunded',
+    }
+    TRANSITIONS = {
+        'pending': {'processing', 'completed', 'failed', 'cancelled'},
+        'processing': {'completed', 'failed', 'cancelled'},
+        'failed': {'processing', 'completed'},
+        'completed': {'refunded', 'partially_refunded'},
+        'partially_refunded': {'refunded'},
+    }
+    FINAL_STATUSES = {'completed', 'failed', 'cancelled', 'refunded'}
+
+    def __init__(self, batch_size=None, workers=1, max_attempts=5, retry_delay=60, lock_timeout=300):
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = timedelta(seconds=retry_delay)
+        self.lock_timeout = timedelta(seconds=lock_timeout)
+        self.stats = dict.fromkeys(['events', 'processed', 'ignored', 'retried', 'failed', 'conflicts', 'orders'], 0)
+        self._lock = threading.Lock()
+
+    def count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    @classmethod
+    def normalize_status(cls, status):
+        status = (status or '').strip().lower()
+        return cls.STATUS_ALIASES.get(status, status)
+
+    def claim(self):
+        """Reivindica o próximo lote; eventos travados há muito tempo voltam para a fila"""
+        from payments.models import PaymentWebhookEvent
+
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(PaymentWebhookEvent.objects.select_for_update(skip_locked=True).filter(
+                Q(state='pending', locked_at__isnull=True)
+                | Q(state='pending', locked_at__lt=now - self.retry_delay)
+                | Q(state='processing', locked_at__lt=now - self.lock_timeout)
+            ).order_by('created_at', 'id').values_list('id', flat=True)[:self.batch_size])
+            if not ids:
+                return []
+            PaymentWebhookEvent.objects.filter(id__in=ids).update(
+                state='processing', locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+            )
+
+        return list(PaymentWebhookEvent.objects.filter(id__in=ids).values(
+            'id', 'provider', 'event_id', 'external_id', 'status', 'payload', 'attempts'
+        ).order_by('created_at', 'id'))
+
+    def load_transactions(self, events):
+        """(provedor, external_id) -> transação; só casa com transações do provedor do evento"""
+        from payments.models import PaymentTransaction
+
+        candidates = defaultdict(list)
+        for row in PaymentTransaction.objects.filter(
+            external_id__in={event['external_id'] for event in events}
+        ).values('id', 'external_id', 'status', 'order_id', 'payment_method__provider'):
+            candidates[row['external_id']].append(row)
+
+        def pick(event):
+            for row in candidates.get(event['external_id'], []):
+                if slugify(row['payment_method__provider']) == event['provider']:
+                    return row
+            return None
+
+        return pick
+
+    def process_batch(self, events):
+        from orders.models import Order
+        from payments.models import PaymentTransaction, PaymentTransactionHistory
+
+        now = timezone.now()
+        pick = self.load_transactions(events)
+        outcome = {}                 # event id -> (state, erro)
+        per_transaction = {}         # transaction id -> {'row', 'status', 'history', 'events'}
+
+        for event in events:
+            row = pick(event)
+            if row is None:
+                state = 'failed' if event['attempts'] >= self.max_attempts else 'pending'
+                outcome[event['id']] = (state, 'Transação não encontrada')
+                continue
+
+            entry = per_transaction.setdefault(row['id'], {'row': row, 'status': row['status'], 'history': [], 'events': []})
+            entry['events'].append(event['id'])
+            target = self.normalize_status(event['status'])
+            if target == entry['status']:
+                outcome[event['id']] = ('ignored', 'Status já aplicado')
+            elif target not in self.TRANSITIONS.get(entry['status'], ()):
+                outcome[event['id']] = ('ignored', f"Transição inválida: {entry['status']} -> {target or '?'}")
+            else:
+                entry['history'].append((entry['status'], target, event))
+                entry['status'] = target
+                outcome[event['id']] = ('processed', '')
+
+        history, paid_orders = [], set()
+        for transaction_id, entry in per_transaction.items():
+            if not entry['history']:
+                continue
+            changes = {'status': entry['status'], 'updated_at': now}
+            if entry['status'] in self.FINAL_STATUSES:
+                changes['processed_at'] = now
+
+            # Concorrência otimista: só grava se ninguém mudou o status desde a leitura
+            updated = PaymentTransaction.objects.filter(id=transaction_id, status=entry['row']['status']).update(**changes)
+            if not updated:
+                self.count('conflicts')
+                for event_id in entry['events']:
+                    outcome[event_id] = ('pending', 'Conflito de concorrência')
+                continue
+
+            for previous, new, event in entry['history']:
+                history.append(PaymentTransactionHistory(
+                    transaction_id=transaction_id,
+                    previous_status=previous,
+                    new_status=new,
+                    response_data=event['payload'],
+                    notes=f"Webhook {event['provider']} {event['event_id']}",
+                ))
+            if entry['status'] == 'completed':
+                paid_orders.add(entry['row']['order_id'])
+
+        PaymentTransactionHistory.objects.bulk_create(history, batch_size=self.batch_size)
+
+        # Um único UPDATE condicional por lote evita disputa de lock nos pedidos
+        if paid_orders:
+            self.count('orders', Order.objects.filter(id__in=paid_orders, status='pending').update(
+                status='confirmed', confirmed_at=now, updated_at=now,
+            ))
+
+        self.finish(events, outcome, now)
+
+    def finish(self, events, outcome, now):
+        """Grava a situação final dos eventos com um UPDATE por combinação (situação, erro)"""
+        from payments.models import PaymentWebhookEvent
+
+        groups = defaultdict(list)
+        for event in events:
+            groups[outcome[event['id']]].append(event['id'])
+
+        for (state, error), ids in groups.items():
+            changes = {'state': state, 'error': error, 'updated_at': now}
+            if state in ('processed', 'ignored'):
+                changes['processed_at'] = now
+            if state == 'pending':
+                self.count('retried', len(ids))
+            else:
+                self.count(state, len(ids))
+            PaymentWebhookEvent.objects.filter(id__in=ids).update(**changes)
+        self.count('events', len(events))
+
+    def work(self, loop=False, idle_sleep=2.0, stop=None, close=False):
+        """
+        Loop de um worker; sem `loop`, termina quando a fila esvazia. `close`
+        fecha a conexão ao sair (threads do pool, que têm conexão própria).
+        """
+        try:
+            while not (stop and stop.is_set()):
+                events = self.claim()
+                if events:
+                    self.process_batch(events)
+                    continue
+                if not loop:
+                    break
+                time.sleep(idle_sleep)
+                # Worker de longa duração: descarta conexões velhas ou quebradas
+                close_old_connections()
+        finally:
+            if close:
+                connection.close()
+
+    def run(self, loop=False, idle_sleep=2.0, stop=None):
+        if self.workers <= 1:
+            # Na thread de quem chamou: a conexão (e a transação dela) não é nossa
+            self.work(loop, idle_sleep, stop)
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(self.work, loop, idle_sleep, stop, True) for _ in range(self.workers)]
+                for future in futures:
+                    future.result()
+
+        logger.info('Webhooks de pagamento processados: %s', self.stats)
+        return self.stats
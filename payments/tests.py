@@ -1,3 +1,162 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from orders.models import Order
+from users.models import User
+
+from .models import PaymentMethod, PaymentReconciliationItem, PaymentTransaction, PaymentWebhookEvent
+from .services.reconciliation_service import SettlementReconciler, parse_decimal
+from .services.webhook_service import WebhookInbox, WebhookProcessor
+
+SECRETS = {'mercado-pago': 'segredo-mp', 'pagseguro': 'segredo-ps'}
+
+
+def sign(body, secret):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+@override_settings(PAYMENT_WEBHOOK_SECRETS=SECRETS)
+class PaymentWebhookTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        address = {'postal_code': '01310-100', 'city': 'São Paulo', 'state': 'SP'}
+        cls.order = Order.objects.create(
+            user=user, billing_address=address, shipping_address=address,
+            subtotal=Decimal('100.00'), total_amount=Decimal('100.00'),
+        )
+        method = PaymentMethod.objects.create(name='Mercado Pago', code='mp', type='pix', provider='Mercado Pago')
+        cls.transaction = PaymentTransaction.objects.create(
+            order=cls.order, payment_method=method, external_id='TX-1',
+            amount=Decimal('100.00'), net_amount=Decimal('100.00'),
+        )
+
+    def post(self, provider, payload, signature=None):
+        body = json.dumps(payload).encode()
+        headers = {}
+        if signature is not None:
+            headers['HTTP_X_WEBHOOK_SIGNATURE'] = signature
+        url = reverse('payments:webhook', kwargs={'provider': provider})
+        return self.client.post(url, body, content_type='application/json', **headers)
+
+    def approved(self):
+        return {'event_id': 'EV-1', 'external_id': 'TX-1', 'status': 'approved'}
+
+    def test_valid_signature_is_received_and_applied(self):
+        body = json.dumps(self.approved()).encode()
+        response = self.post('mercado-pago', self.approved(), sign(body, SECRETS['mercado-pago']))
+        self.assertEqual(response.status_code, 200)
+
+        WebhookProcessor().run()
+        self.transaction.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.transaction.status, 'completed')
+        self.assertEqual(self.order.status, 'confirmed')
+
+    def test_bad_signature_is_rejected(self):
+        response = self.post('mercado-pago', self.approved(), sign(b'outro corpo', SECRETS['mercado-pago']))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_missing_signature_is_rejected(self):
+        response = self.post('mercado-pago', self.approved())
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_unknown_provider_is_rejected(self):
+        response = self.post('attacker', self.approved())
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(WebhookInbox.verify_signature('attacker', b'{}', sign(b'{}', '')))
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_event_from_another_provider_does_not_touch_transaction(self):
+        # Assinado corretamente, mas pelo provedor errado para esta transação
+        body = json.dumps(self.approved()).encode()
+        response = self.post('pagseguro', self.approved(), sign(body, SECRETS['pagseguro']))
+        self.assertEqual(response.status_code, 200)
+
+        WebhookProcessor().run()
+        self.transaction.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.transaction.status, 'pending')
+        self.assertEqual(self.order.status, 'pending')
+        self.assertEqual(PaymentWebhookEvent.objects.get().error, 'Transação não encontrada')
+
+
+class ParseDecimalTests(SimpleTestCase):
+    def test_decimal_separator_is_the_last_one(self):
+        cases = {
+            '1234.56': '1234.56', '1234,56': '1234.56', '1,234.56': '1234.56', '1.234,56': '1234.56',
+            'R$ 1.234.567,89': '1234567.89', '1,234,567': '1234567.00', '-1,234.50': '-1234.50', '12,5': '12.50',
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(parse_decimal(value), Decimal(expected))
+
+    def test_ambiguous_values_raise(self):
+        for value in ('1,234', '1.234', '12,34.5', '1.2,3'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_decimal(value)
+
+    def test_file_separator_resolves_ambiguous_values(self):
+        self.assertEqual(parse_decimal('1.000', '.'), Decimal('1.00'))
+        self.assertEqual(parse_decimal('1.000', ','), Decimal('1000.00'))
+        self.assertEqual(parse_decimal('1,000', ','), Decimal('1.00'))
+        with self.assertRaises(ValueError):
+            parse_decimal('12,34.5', '.')
+
+    def test_empty_or_non_numeric_is_none(self):
+        self.assertIsNone(parse_decimal(''))
+        self.assertIsNone(parse_decimal('abc'))
+
+
+class SettlementReconcilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        address = {'postal_code': '01310-100', 'city': 'São Paulo', 'state': 'SP'}
+        order = Order.objects.create(
+            user=user, billing_address=address, shipping_address=address,
+            subtotal=Decimal('1000.00'), total_amount=Decimal('1000.00'),
+        )
+        method = PaymentMethod.objects.create(name='Mercado Pago', code='mp', type='pix', provider='Mercado Pago')
+        for external_id, amount in (('TX-1', '1000.00'), ('TX-2', '12.50'), ('TX-3', '1.00')):
+            PaymentTransaction.objects.create(
+                order=order, payment_method=method, external_id=external_id, status='completed',
+                amount=Decimal(amount), net_amount=Decimal(amount),
+            )
+
+    def settlement_file(self, *lines):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w') as file:
+            file.write('\n'.join(['external_id;amount', *lines]) + '\n')
+        return path
+
+    def reconcile(self, *lines):
+        return SettlementReconciler(chunk_size=2).run([self.settlement_file(*lines)], delimiter=';')
+
+    def issues(self, report):
+        return sorted(report.items.values_list('external_id', 'issue'))
+
+    def test_separator_is_taken_from_the_unambiguous_rows(self):
+        report = self.reconcile('TX-1;1.000', 'TX-2;12,50', 'TX-3;1,00')
+
+        self.assertEqual((report.status, report.matched), ('completed', 3))
+        self.assertEqual(self.issues(report), [])
+
+    def test_ambiguous_rows_are_reported_without_failing_the_run(self):
+        report = self.reconcile('TX-1;1.000', 'TX-2;1,234', 'TX-3;1')
+
+        self.assertEqual((report.status, report.matched), ('completed', 1))
+        self.assertEqual(self.issues(report), [('TX-1', 'unreadable'), ('TX-2', 'unreadable')])
+        item = report.items.get(external_id='TX-1')
+        self.assertEqual((item.details['line'], item.details['amount']), (2, '1.000'))
+        self.assertEqual(PaymentReconciliationItem.objects.filter(issue='missing_settlement').count(), 0)
@@ -4,4 +4,5 @@ from . import views
 app_name = 'payments'
 
 urlpatterns = [
-]
\ No newline at end of file
+    path('webhooks/<slug:provider>/', views.PaymentWebhookView.as_view(), name='webhook'),
+]
@@ -1,3 +1,28 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .services.webhook_service import WebhookError, WebhookInbox
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PaymentWebhookView(View):
+    """
+    Endpoint dos webhooks dos gateways. Apenas grava o evento na caixa de
+    entrada e responde; o processamento é feito por `process_payment_webhooks`.
+    """
+
+    def post(self, request, provider):
+        body = request.body
+        if not WebhookInbox.verify_signature(provider, body, request.META.get(WebhookInbox.SIGNATURE_HEADER)):
+            return JsonResponse({'error': 'Assinatura inválida'}, status=403)
+
+        try:
+            event = WebhookInbox.receive(provider, json.loads(body or b'{}'), body)
+        except (ValueError, WebhookError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        return JsonResponse({'received': True, 'event_id': event['event_id']})
@@ -1,9 +1,21 @@
 from django.contrib import admin
 from .models import *
 
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from core.admin import LargeTableAdminMixin, RelatedIdFilter
+
+
+def product_count_subquery(field):
+    """Produtos por `field` numa subconsulta (calculada só para as linhas da página)"""
+    products = Product.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        total=Count('pk'),
+    ).values('total')
+    return Coalesce(Subquery(products, output_field=IntegerField()), 0)
+
 # Product Management
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
@@ -29,10 +41,15 @@ class ProductCategoryAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
     ordering = ['sort_order', 'name']
+    list_select_related = ['parent']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(total_products=product_count_subquery('category'))
     
     def product_count(self, obj):
-        return obj.products.count()
+        return obj.total_products
     product_count.short_description = 'Produtos'
+    product_count.admin_order_field = 'total_products'
 
 @admin.register(ProductBrand)
 class ProductBrandAdmin(admin.ModelAdmin):
@@ -41,20 +58,28 @@ class ProductBrandAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(total_products=product_count_subquery('brand'))
+    
     def product_count(self, obj):
-        return obj.products.count()
+        return obj.total_products
     product_count.short_description = 'Produtos'
+    product_count.admin_order_field = 'total_products'
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     inlines = [ProductImageInline, ProductVariantInline, ProductAttributeValueInline]
     list_display = [
         'name', 'sku', 'category', 'brand', 'price', 'is_active', 
         'is_featured', 'stock_status', 'created_at'
     ]
     list_filter = [
-        'is_active', 'is_featured', 'is_digital', 'category', 'brand', 'created_at'
+        'is_active', 'is_featured', 'is_digital',
+        ('category', RelatedIdFilter), ('brand', RelatedIdFilter), 'created_at'
     ]
+    list_select_related = ['category', 'brand']
+    autocomplete_fields = ['category', 'brand']
+    raw_id_fields = ['supplier']
     search_fields = ['name', 'sku', 'description']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['uuid', 'created_at', 'updated_at']
@@ -91,13 +116,20 @@ class ProductAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        from inventory.models import InventoryItem
+        stock = InventoryItem.objects.filter(product=OuterRef('pk')).order_by().values('product').annotate(
+            total=Sum('quantity_available'),
+        ).values('total')
+        return super().get_queryset(request).annotate(
+            total_stock=Coalesce(Subquery(stock, output_field=IntegerField()), 0),
+        )
+    
     def stock_status(self, obj):
         if not obj.track_inventory:
             return format_html('Não rastreado')
         
-        total_stock = sum([
-            item.quantity_available for item in obj.inventory_items.all()
-        ])
+        total_stock = obj.total_stock
         
         if total_stock > 0:
             return format_html('{} unidades', total_stock)
@@ -105,6 +137,7 @@ class ProductAdmin(admin.ModelAdmin):
             return format_html('Sem estoque')
     
     stock_status.short_description = 'Estoque'
+    stock_status.admin_order_field = 'total_stock'
 
 @admin.register(ProductReview)
 class ProductReviewAdmin(admin.ModelAdmin):
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from products.services.sitemap_service import SitemapService
+
+
+class Command(BaseCommand):
+    help = 'Gera sitemaps e o feed de produtos no storage (só os shards alterados desde a última execução)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Regravar todos os shards')
+
+    def handle(self, *args, **options):
+        report = SitemapService.generate(full=options['full'])
+        for name in report['written']:
+            self.stdout.write(f'gravado: {name}')
+        for name in report['removed']:
+            self.stdout.write(f'removido: {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(report['written'])} arquivos gravados, {report['skipped']} inalterados; "
+            f'índice em {SitemapService.index_url()}'
+        ))
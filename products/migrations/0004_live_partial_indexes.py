@@ -0,0 +1,37 @@
+# Generated by Django 4.2.21 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+from models.operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY (PostgreSQL) não roda dentro de transação
+    atomic = False
+
+    dependencies = [
+        ('products', '0003_alter_productcategory_options'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='product',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('is_active', True)), fields=['-created_at'], name='product_live_active_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='product',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('is_active', True)), fields=['category', '-created_at'], name='product_live_category_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='product',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('is_active', True), ('is_featured', True)), fields=['-created_at'], name='product_live_featured_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='productbrand',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('is_active', True)), fields=['name'], name='brand_live_name_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='productcategory',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('is_active', True)), fields=['parent', 'sort_order', 'name'], name='category_live_parent_idx'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from models.base import BaseModel
+from models.base import BaseModel, live_index
 from django.utils.text import slugify
 import uuid
 from django.urls import reverse
@@ -50,6 +50,10 @@ class ProductCategory(BaseModel):
     class Meta:
         verbose_name = 'Categoria'
         verbose_name_plural = 'Categorias'
+        indexes = [
+            # Menu/home: categorias ativas por pai, na ordem de exibição
+            live_index('parent', 'sort_order', 'name', name='category_live_parent_idx', condition=models.Q(is_active=True)),
+        ]
 
 
 class ProductBrand(BaseModel):
@@ -67,6 +71,9 @@ class ProductBrand(BaseModel):
         verbose_name = 'Marca'
         verbose_name_plural = 'Marcas'
         ordering = ['name']
+        indexes = [
+            live_index('name', name='brand_live_name_idx', condition=models.Q(is_active=True)),
+        ]
 
     def __str__(self):
         return self.name
@@ -135,6 +142,12 @@ class Product(BaseModel):
         verbose_name = 'Produto'
         verbose_name_plural = 'Produtos'
         ordering = ['-created_at']
+        # slug e sku já têm índice único; os parciais cobrem as listagens da vitrine
+        indexes = [
+            live_index('-created_at', name='product_live_active_idx', condition=models.Q(is_active=True)),
+            live_index('category', '-created_at', name='product_live_category_idx', condition=models.Q(is_active=True)),
+            live_index('-created_at', name='product_live_featured_idx', condition=models.Q(is_active=True, is_featured=True)),
+        ]
 
     def __str__(self):
         return self.name
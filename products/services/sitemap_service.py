@@ -0,0 +1,383 @@
+import gzip
+import json
+import logging
+import tempfile
+from urllib.parse import quote_plus
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+IMAGE_NS = 'http://www.google.com/schemas/sitemap-image/1.1'
+GOOGLE_NS = 'http://base.google.com/ns/1.0'
+
+
+class SitemapService:
+    """
+    Sitemaps (`sitemap-*.xml.gz` + índice `sitemap.xml`) e feed de produtos
+    no formato do Google Shopping (`product-feed.xml.gz`), gravados no storage
+    de mídia e servidos como arquivos: os crawlers não passam pela aplicação.
+
+    Produtos são divididos em shards por faixa de id (`SITEMAP_SHARD_SIZE`).
+    Cada shard tem uma marca d'água — quantidade de produtos e maior
+    `updated_at` do produto, do estoque e das imagens (com a quantidade
+    delas, que muda quando uma é apagada) — guardada em `seo/state.json`; uma
+    execução só regrava os shards cuja marca mudou. O feed é montado a partir
+    dos trechos por shard já gravados, sem reler os produtos inalterados.
+
+    Gerado pelo comando `generate_sitemaps` (cron).
+    """
+    OUTPUT_DIR = 'seo'
+    STATE_NAME = 'seo/state.json'
+    INDEX_NAME = 'seo/sitemap.xml'
+    FEED_NAME = 'seo/product-feed.xml.gz'
+    CHUNK_SIZE = 2000
+
+    # region Configuração
+    @staticmethod
+    def shard_size():
+        # Limite do protocolo: 50.000 URLs por sitemap
+        return min(getattr(settings, 'SITEMAP_SHARD_SIZE', 10000), 50000)
+
+    @staticmethod
+    def base_url():
+        return str(settings.SITE_URL).rstrip('/')
+
+    @classmethod
+    def absolute(cls, url):
+        return url if '://' in url else f'{cls.base_url()}{url}'
+
+    @staticmethod
+    def currency():
+        from core.services.config_service import ConfigService
+        return ConfigService.get('currency', 'BRL')
+
+    @classmethod
+    def index_url(cls):
+        return cls.absolute(default_storage.url(cls.INDEX_NAME))
+
+    @classmethod
+    def feed_url(cls):
+        return cls.absolute(default_storage.url(cls.FEED_NAME))
+
+    @classmethod
+    def shard_names(cls, shard):
+        return {
+            'sitemap': f'{cls.OUTPUT_DIR}/sitemap-products-{shard}.xml.gz',
+            'feed': f'{cls.OUTPUT_DIR}/feed/items-{shard}.xml',
+        }
+    # endregion
+
+    # region Estado (marcas d'água)
+    @classmethod
+    def load_state(cls):
+        try:
+            with default_storage.open(cls.STATE_NAME) as file:
+                return json.loads(file.read().decode())
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def save_state(cls, state):
+        cls.replace(cls.STATE_NAME, ContentFile(json.dumps(state, sort_keys=True).encode()))
+
+    @staticmethod
+    def watermark(*parts):
+        """Quantidades e datas numa string comparável ('-' para data ausente)"""
+        return ':'.join('-' if part is None else part.isoformat() if hasattr(part, 'isoformat') else str(part) for part in parts)
+
+    @staticmethod
+    def product_queryset():
+        from products.models import Product
+        return Product.objects.filter(is_active=True)
+
+    @classmethod
+    def shard_expression(cls, field):
+        return Cast((F(field) - 1) / cls.shard_size(), IntegerField())
+
+    @classmethod
+    def product_watermarks(cls):
+        """{shard: marca} por faixa de id, em três consultas agregadas"""
+        from inventory.models import InventoryItem
+        from products.models import ProductImage
+
+        rows = cls.product_queryset().order_by().annotate(shard=cls.shard_expression('pk')).values('shard').annotate(
+            count=Count('pk'), updated=Max('updated_at'),
+        )
+        stock = dict(
+            InventoryItem.objects.filter(product__in=cls.product_queryset()).order_by()
+            .annotate(shard=cls.shard_expression('product_id'))
+            .values('shard').annotate(updated=Max('updated_at')).values_list('shard', 'updated')
+        )
+        images = {
+            row['shard']: (row['count'], row['updated'])
+            for row in ProductImage.objects.filter(product__in=cls.product_queryset()).order_by()
+            .annotate(shard=cls.shard_expression('product_id'))
+            .values('shard').annotate(count=Count('pk'), updated=Max('updated_at'))
+        }
+        return {
+            str(row['shard']): cls.watermark(
+                row['count'], row['updated'], stock.get(row['shard']), *images.get(row['shard'], (0, None)),
+            )
+            for row in rows
+        }
+
+    @classmethod
+    def model_watermark(cls, model):
+        row = model.objects.filter(is_active=True).aggregate(count=Count('pk'), updated=Max('updated_at'))
+        return cls.watermark(row['count'], row['updated'])
+    # endregion
+
+    # region Escrita
+    @staticmethod
+    def replace(name, content):
+        """Grava `name` no storage substituindo o anterior (sem sufixo aleatório)"""
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        saved = default_storage.save(name, content)
+        if saved != name:
+            logger.warning('SEO: storage gravou %s em vez de %s', saved, name)
+        return saved
+
+    @classmethod
+    def write(cls, name, chunks, compress=False):
+        """Grava o conteúdo em streaming (arquivo temporário, gzip opcional)"""
+        with tempfile.TemporaryFile() as temp:
+            target = gzip.GzipFile(fileobj=temp, mode='wb', mtime=0) if compress else temp
+            for chunk in chunks:
+                target.write(chunk.encode())
+            if compress:
+                target.close()
+            temp.seek(0)
+            cls.replace(name, File(temp, name=name))
+
+    @staticmethod
+    def delete(name):
+        if default_storage.exists(name):
+            default_storage.delete(name)
+    # endregion
+
+    # region Sitemaps
+    @staticmethod
+    def urlset(entries, images=False):
+        """<urlset> em partes, a partir de (loc, lastmod, imagem)"""
+        extra = f' xmlns:image="{IMAGE_NS}"' if images else ''
+        yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}"{extra}>\n'
+        for loc, lastmod, image in entries:
+            parts = [f'<url><loc>{escape(loc)}</loc>']
+            if lastmod:
+                parts.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+            if image:
+                parts.append(f'<image:image><image:loc>{escape(image)}</image:loc></image:image>')
+            parts.append('</url>\n')
+            yield ''.join(parts)
+        yield '</urlset>\n'
+    # endregion
+
+    # region Produtos
+    @classmethod
+    def product_rows(cls, shard):
+        """Produtos do shard em streaming, com imagem principal e estoque anotados"""
+        from inventory.models import InventoryItem
+        from products.models import ProductImage
+
+        size = cls.shard_size()
+        image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('-is_primary', 'sort_order').values('image')[:1]
+        stock = InventoryItem.objects.filter(product=OuterRef('pk')).order_by().values('product').annotate(
+            total=Sum('quantity_available'),
+        ).values('total')
+        return cls.product_queryset().filter(
+            pk__gt=shard * size, pk__lte=(shard + 1) * size,
+        ).select_related('category', 'brand').only(
+            'pk', 'sku', 'ean', 'name', 'slug', 'price', 'compare_at_price', 'short_description',
+            'meta_title', 'meta_description', 'track_inventory', 'allow_backorder', 'updated_at',
+            'category__name', 'brand__name',
+        ).annotate(
+            primary_image=Subquery(image),
+            stock=Subquery(stock),
+        ).order_by('pk').iterator(chunk_size=cls.CHUNK_SIZE)
+
+    @classmethod
+    def product_url_pattern(cls):
+        """URL de detalhe montada por substituição (sem um reverse por produto)"""
+        return cls.absolute(reverse('products:detail', kwargs={'slug': 'slug-placeholder'}))
+
+    @classmethod
+    def image_url(cls, name):
+        return cls.absolute(default_storage.url(name)) if name else ''
+
+    @staticmethod
+    def availability(product):
+        if not product.track_inventory or (product.stock or 0) > 0:
+            return 'in_stock'
+        return 'backorder' if product.allow_backorder else 'out_of_stock'
+
+    @classmethod
+    def feed_item(cls, product, url, currency):
+        """<item> do Google Shopping: `price` é o preço cheio, `sale_price` o praticado"""
+        fields = [
+            ('g:id', product.sku),
+            ('title', product.meta_title or product.name),
+            ('description', product.meta_description or product.short_description or product.name),
+            ('link', url),
+            ('g:image_link', cls.image_url(product.primary_image)),
+            ('g:availability', cls.availability(product)),
+            ('g:condition', 'new'),
+            ('g:brand', product.brand.name if product.brand else ''),
+            ('g:gtin', product.ean),
+            ('g:mpn', product.sku),
+            ('g:product_type', product.category.name if product.category else ''),
+        ]
+        if product.compare_at_price and product.compare_at_price > product.price:
+            fields += [
+                ('g:price', f'{product.compare_at_price:.2f} {currency}'),
+                ('g:sale_price', f'{product.price:.2f} {currency}'),
+            ]
+        else:
+            fields.append(('g:price', f'{product.price:.2f} {currency}'))
+        body = ''.join(f'<{tag}>{escape(str(value))}</{tag}>' for tag, value in fields if value)
+        return f'<item>{body}</item>\n'
+
+    @classmethod
+    def write_product_shard(cls, shard):
+        """Sitemap e trecho do feed do shard, numa única leitura (em streaming) dos produtos"""
+        names = cls.shard_names(shard)
+        pattern = cls.product_url_pattern()
+        currency = cls.currency()
+        count = 0
+
+        def entries():
+            nonlocal count
+            for product in cls.product_rows(int(shard)):
+                url = pattern.replace('slug-placeholder', product.slug)
+                feed.write(cls.feed_item(product, url, currency).encode())
+                count += 1
+                yield url, product.updated_at, cls.image_url(product.primary_image)
+
+        with tempfile.TemporaryFile() as feed:
+            cls.write(names['sitemap'], cls.urlset(entries(), images=True), compress=True)
+            feed.seek(0)
+            cls.replace(names['feed'], File(feed, name=names['feed']))
+        return count
+
+    @classmethod
+    def write_feed(cls, shards):
+        """Feed completo a partir dos trechos por shard (sem consultar produtos)"""
+        def chunks():
+            yield (
+                f'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0" xmlns:g="{GOOGLE_NS}"><channel>'
+                f'<title>{escape(str(settings.SITE_NAME))}</title><link>{escape(cls.base_url())}/</link>'
+                f'<description>{escape(str(settings.SITE_NAME))}</description>\n'
+            )
+            for shard in sorted(shards, key=int):
+                name = cls.shard_names(shard)['feed']
+                if default_storage.exists(name):
+                    with default_storage.open(name) as file:
+                        for line in file:
+                            yield line.decode()
+            yield '</channel></rss>\n'
+
+        cls.write(cls.FEED_NAME, chunks(), compress=True)
+    # endregion
+
+    # region Seções simples
+    @classmethod
+    def simple_entries(cls, section):
+        from products.models import ProductBrand, ProductCategory
+
+        if section == 'pages':
+            names = ['core:home', 'products:list', 'products:offers']
+            return [(cls.absolute(reverse(name)), None, '') for name in names]
+        if section == 'categories':
+            rows = ProductCategory.objects.filter(is_active=True).only('slug', 'updated_at').order_by('pk')
+            return [(cls.absolute(category.get_absolute_url()), category.updated_at, '') for category in rows.iterator()]
+        # Marcas ainda não têm página própria: entram na busca
+        rows = ProductBrand.objects.filter(is_active=True).only('name', 'updated_at').order_by('pk')
+        search = cls.absolute(reverse('products:search'))
+        return [(f'{search}?q={quote_plus(brand.name)}', brand.updated_at, '') for brand in rows.iterator()]
+
+    @classmethod
+    def simple_watermarks(cls):
+        from products.models import ProductBrand, ProductCategory
+
+        return {
+            'pages': 'static',
+            'categories': cls.model_watermark(ProductCategory),
+            'brands': cls.model_watermark(ProductBrand),
+        }
+    # endregion
+
+    # region Geração
+    @classmethod
+    def write_index(cls, state):
+        names = [f'{cls.OUTPUT_DIR}/sitemap-{section}.xml.gz' for section in sorted(state.get('sections', {}))]
+        names += [cls.shard_names(shard)['sitemap'] for shard in sorted(state.get('products', {}), key=int)]
+        lastmod = state.get('lastmod', {})
+
+        def chunks():
+            yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+            for name in names:
+                url = escape(cls.absolute(default_storage.url(name)))
+                yield f'<sitemap><loc>{url}</loc><lastmod>{lastmod.get(name, state["generated_at"])}</lastmod></sitemap>\n'
+            yield '</sitemapindex>\n'
+
+        cls.write(cls.INDEX_NAME, chunks())
+
+    @classmethod
+    def generate(cls, full=False):
+        """
+        Regrava o que mudou desde a última execução (tudo com `full`).
+        Retorna {'written': [...], 'removed': [...], 'skipped': n}.
+        """
+        state = {} if full else cls.load_state()
+        report = {'written': [], 'removed': [], 'skipped': 0}
+        previous_products = state.get('products', {})
+        previous_sections = state.get('sections', {})
+
+        products = cls.product_watermarks()
+        for shard, mark in sorted(products.items(), key=lambda item: int(item[0])):
+            names = cls.shard_names(shard)
+            if previous_products.get(shard) == mark and default_storage.exists(names['sitemap']):
+                report['skipped'] += 1
+                continue
+            count = cls.write_product_shard(shard)
+            report['written'].append(names['sitemap'])
+            logger.info('SEO: shard %s de produtos regravado (%s URLs)', shard, count)
+
+        for shard in set(previous_products) - set(products):
+            for name in cls.shard_names(shard).values():
+                cls.delete(name)
+            report['removed'].append(cls.shard_names(shard)['sitemap'])
+
+        sections = cls.simple_watermarks()
+        for section, mark in sections.items():
+            name = f'{cls.OUTPUT_DIR}/sitemap-{section}.xml.gz'
+            if previous_sections.get(section) == mark and default_storage.exists(name):
+                report['skipped'] += 1
+                continue
+            cls.write(name, cls.urlset(cls.simple_entries(section)), compress=True)
+            report['written'].append(name)
+
+        today = timezone.now().date().isoformat()
+        lastmod = {name: date for name, date in state.get('lastmod', {}).items() if name not in report['removed']}
+        lastmod.update({name: today for name in report['written']})
+
+        products_changed = report['removed'] or any('sitemap-products-' in name for name in report['written'])
+        if products_changed or not default_storage.exists(cls.FEED_NAME):
+            cls.write_feed(products)
+        changed = report['written'] or report['removed']
+        state = {'products': products, 'sections': sections, 'lastmod': lastmod, 'generated_at': today}
+        if changed or not default_storage.exists(cls.INDEX_NAME):
+            cls.write_index(state)
+        cls.save_state(state)
+        return report
+    # endregion
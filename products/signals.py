@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Product, ProductBrand, ProductCategory, ProductImage
+
+# Cards de produto em cache (core.services.fragment_service): a chave usa o
+# updated_at do produto, então mudar as imagens "toca" o produto; categoria e
+# marca aparecem em muitos cards e descartam todos
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def product_image_changed(sender, instance, **kwargs):
+    # update(): novo updated_at sem passar pelo save() do produto
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=ProductBrand)
+@receiver(post_delete, sender=ProductBrand)
+def product_cards_changed(sender, instance, **kwargs):
+    from core.services.fragment_service import FragmentCacheService
+    FragmentCacheService.reload_cards()
@@ -1,3 +1,86 @@
-from django.test import TestCase
+import gzip
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase, override_settings
+
+from .models import Product, ProductImage
+from .services.sitemap_service import SitemapService
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2)
+class SitemapGenerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(name=f'Produto {i}', slug=f'produto-{i}', sku=f'SKU-{i}', price=Decimal('10.00'))
+            for i in range(4)
+        ]
+
+    def setUp(self):
+        self.storage = InMemoryStorage()
+        self.enterContext(mock.patch('products.services.sitemap_service.default_storage', self.storage))
+
+    def read(self, name):
+        with self.storage.open(name) as file:
+            content = file.read()
+        return (gzip.decompress(content) if name.endswith('.gz') else content).decode()
+
+    def shard(self, product):
+        return str((product.pk - 1) // 2)
+
+    def sitemap(self, product):
+        return SitemapService.shard_names(self.shard(product))['sitemap']
+
+    def test_unchanged_shards_are_skipped(self):
+        first = SitemapService.generate()
+        shards = {self.shard(product) for product in self.products}
+
+        self.assertEqual(len(first['written']), len(shards) + 3)
+        feed = self.read(SitemapService.FEED_NAME)
+        self.assertTrue(all(f'<g:id>{product.sku}</g:id>' in feed for product in self.products))
+        index = self.read(SitemapService.INDEX_NAME)
+        self.assertTrue(all(self.sitemap(product) in index for product in self.products))
+        self.assertIn('/produto-0/', self.read(self.sitemap(self.products[0])))
+
+        second = SitemapService.generate()
+        self.assertEqual((second['written'], second['removed'], second['skipped']), ([], [], len(shards) + 3))
+
+    def test_changed_shard_is_rewritten_and_the_feed_follows(self):
+        SitemapService.generate()
+        product = self.products[0]
+        product.name = 'Produto renomeado'
+        product.save()
+
+        report = SitemapService.generate()
+
+        self.assertEqual(report['written'], [self.sitemap(product)])
+        self.assertIn('<title>Produto renomeado</title>', self.read(SitemapService.FEED_NAME))
+        self.assertIn('<g:id>SKU-3</g:id>', self.read(SitemapService.FEED_NAME))
+
+    def test_image_change_rewrites_the_shard(self):
+        SitemapService.generate()
+        product = self.products[3]
+        # Operações em lote: sem os signals que tocam o updated_at do produto
+        ProductImage.objects.bulk_create([ProductImage(product=product, image='products/foto.jpg', is_primary=True)])
+
+        self.assertEqual(SitemapService.generate()['written'], [self.sitemap(product)])
+        self.assertIn('products/foto.jpg', self.read(self.sitemap(product)))
+
+        ProductImage.objects.filter(product=product).soft_delete()
+        self.assertEqual(SitemapService.generate()['written'], [self.sitemap(product)])
+        self.assertNotIn('products/foto.jpg', self.read(self.sitemap(product)))
+
+    def test_empty_shard_is_removed(self):
+        SitemapService.generate()
+        last = self.products[-1]
+        emptied = [product for product in self.products if self.shard(product) == self.shard(last)]
+        Product.objects.filter(pk__in=[product.pk for product in emptied]).update(is_active=False)
+
+        report = SitemapService.generate()
+
+        self.assertEqual(report['removed'], [self.sitemap(last)])
+        self.assertFalse(self.storage.exists(self.sitemap(last)))
+        self.assertNotIn(self.sitemap(last), self.read(SitemapService.INDEX_NAME))
+        self.assertNotIn(f'<g:id>{last.sku}</g:id>', self.read(SitemapService.FEED_NAME))
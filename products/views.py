@@ -2,8 +2,21 @@ from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView, DetailView
 from django.db.models import Q, F
 from .models import Product, ProductCategory
+from marketing.services.recently_viewed_service import RecentlyViewedService
+from marketing.services.wishlist_service import WishlistService
 
-class ProductSearchView(ListView):
+class WishlistStateMixin:
+    """Marca `is_wishlisted` nos produtos da página com uma leitura de cache"""
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        products = WishlistService.annotate(self.request.user, context['object_list'])
+        context['object_list'] = context[self.context_object_name] = products
+        if context.get('page_obj'):
+            context['page_obj'].object_list = products
+        return context
+
+class ProductSearchView(WishlistStateMixin, ListView):
     model = Product
     template_name = 'modules/products/search.html'
     context_object_name = 'products'
@@ -25,7 +38,7 @@ class ProductSearchView(ListView):
         context['query'] = self.request.GET.get('q', '')
         return context
 
-class CategoryView(ListView):
+class CategoryView(WishlistStateMixin, ListView):
     model = Product
     template_name = 'modules/products/category.html'
     context_object_name = 'products'
@@ -50,8 +63,19 @@ class ProductDetailView(DetailView):
     
     def get_queryset(self):
         return Product.objects.filter(is_active=True).select_related('category', 'brand')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Lido antes do record(): o produto atual não entra na própria lista
+        context['recently_viewed'] = RecentlyViewedService.get_products(self.request, limit=8, exclude=self.object.pk)
+        return context
+    
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        RecentlyViewedService.record(request, self.object.pk, response)
+        return response
 
-class OffersView(ListView):
+class OffersView(WishlistStateMixin, ListView):
     model = Product
     template_name = 'modules/products/offers.html'
     context_object_name = 'products'
@@ -63,7 +87,7 @@ class OffersView(ListView):
             is_active=True,
         ).select_related('category', 'brand')
 
-class ProductListView(ListView):
+class ProductListView(WishlistStateMixin, ListView):
     model = Product
     template_name = 'modules/products/list.html'
     context_object_name = 'products'
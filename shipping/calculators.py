@@ -1 +1,115 @@
+import re
+import time
+from decimal import Decimal
 
+from django.conf import settings
+
+
+def normalize_postal_code(value):
+    """CEP somente com dígitos (8 posições) ou string vazia"""
+    digits = re.sub(r'[^0-9]', '', value or '')
+    return digits if len(digits) == 8 else ''
+
+
+class ShippingCostCalculator:
+    """
+    Estimativa de frete por depósito de origem e CEP de destino.
+
+    As tabelas de zonas/taxas são carregadas uma vez por processo (com TTL
+    curto), então cada cotação é um cálculo em memória. O custo base vem da
+    taxa da zona de destino (ou do método quando não há zona); a origem entra
+    como um acréscimo proporcional à distância entre as regiões postais
+    (primeiro dígito do CEP), configurável em FULFILLMENT_REGION_FACTOR.
+    """
+    CACHE_TTL = 300
+    _tables = None
+    _loaded_at = 0
+
+    def __init__(self, postal_code, state=''):
+        self.postal_code = normalize_postal_code(postal_code)
+        self.state = (state or '').upper()
+        self.region_factor = Decimal(str(getattr(settings, 'FULFILLMENT_REGION_FACTOR', '0.10')))
+        self._zone_ids = None
+
+    @classmethod
+    def get_tables(cls):
+        if cls._tables is None or time.monotonic() - cls._loaded_at > cls.CACHE_TTL:
+            cls._tables = cls.load_tables()
+            cls._loaded_at = time.monotonic()
+        return cls._tables
+
+    @classmethod
+    def clear_cache(cls):
+        cls._tables = None
+
+    @staticmethod
+    def load_tables():
+        from .models import ShippingMethod, ShippingZoneRate, ShippingZoneRegion
+
+        regions = list(ShippingZoneRegion.objects.filter(zone__is_active=True).values_list('zone_id', 'type', 'value'))
+        rates = {}
+        for rate in ShippingZoneRate.objects.filter(method__is_active=True, zone__is_active=True).values(
+            'zone_id', 'method_id', 'min_weight', 'max_weight', 'price', 'additional_kg_price'
+        ):
+            rates.setdefault(rate['zone_id'], []).append(rate)
+        methods = list(ShippingMethod.objects.filter(is_active=True).exclude(calculation_method='api_based').values(
+            'id', 'base_price', 'price_per_kg', 'min_weight', 'max_weight'
+        ).order_by('sort_order'))
+        return {'regions': regions, 'rates': rates, 'methods': methods}
+
+    def region_matches(self, type, value):
+        value = (value or '').strip()
+        if type == 'state':
+            return bool(self.state) and value.upper() == self.state
+        if type == 'postal_code' and self.postal_code:
+            if '-' in value and len(re.sub(r'[^0-9]', '', value)) == 16:
+                start, end = (normalize_postal_code(part) for part in value.split('-', 1))
+                return start <= self.postal_code <= end
+            return self.postal_code.startswith(re.sub(r'[^0-9]', '', value))
+        return False
+
+    def zone_ids(self):
+        if self._zone_ids is None:
+            self._zone_ids = {
+                zone_id for zone_id, type, value in self.get_tables()['regions']
+                if self.region_matches(type, value)
+            }
+        return self._zone_ids
+
+    @staticmethod
+    def within(weight, minimum, maximum):
+        return (minimum is None or weight >= minimum) and (maximum is None or weight <= maximum)
+
+    def base_cost(self, weight):
+        """(método, custo) mais barato para o peso informado, sem considerar a origem"""
+        tables = self.get_tables()
+        weight = Decimal(weight or 0)
+        best = None
+
+        for zone_id in self.zone_ids():
+            for rate in tables['rates'].get(zone_id, []):
+                if not self.within(weight, rate['min_weight'], rate['max_weight']):
+                    continue
+                extra = max(weight - (rate['min_weight'] or 0), 0)
+                cost = rate['price'] + rate['additional_kg_price'] * extra
+                if best is None or cost < best[1]:
+                    best = (rate['method_id'], cost)
+
+        if best is None:
+            for method in tables['methods']:
+                if not self.within(weight, method['min_weight'], method['max_weight']):
+                    continue
+                cost = method['base_price'] + method['price_per_kg'] * weight
+                if best is None or cost < best[1]:
+                    best = (method['id'], cost)
+
+        return best or (None, Decimal('0.00'))
+
+    def cost(self, origin_postal_code, weight):
+        """(método, custo) de um envio partindo do CEP de origem"""
+        method_id, cost = self.base_cost(weight)
+        origin = normalize_postal_code(origin_postal_code)
+        if origin and self.postal_code:
+            distance = abs(int(origin[0]) - int(self.postal_code[0]))
+            cost = cost * (1 + self.region_factor * distance)
+        return method_id, cost.quantize(Decimal('0.01'))
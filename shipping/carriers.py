@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import json
+import urllib.request
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+
+def event_key(event):
+    """Identidade de um evento de rastreamento, usada para deduplicar"""
+    raw = f"{event.get('occurred_at', '')}|{event.get('code') or event.get('status', '')}|{event.get('location', '')}"
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+def normalize_event(event):
+    """Formato único dos eventos gravados em Shipment.tracking_events"""
+    occurred_at = event.get('occurred_at') or event.get('date') or ''
+    if isinstance(occurred_at, datetime):
+        occurred_at = occurred_at.isoformat()
+    normalized = {
+        'occurred_at': occurred_at,
+        'status': event.get('status', ''),
+        'code': str(event.get('code', '')),
+        'description': event.get('description', ''),
+        'location': event.get('location', ''),
+    }
+    normalized['id'] = event_key(normalized)
+    return normalized
+
+
+class BaseCarrier:
+    """
+    Adaptador de transportadora. `track` recebe um lote de códigos e devolve
+    {codigo: [eventos]}; códigos sem resposta simplesmente não aparecem.
+    """
+    name = ''
+    batch_size = 50
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.batch_size = int(self.config.get('tracking_batch_size', self.batch_size))
+
+    async def track(self, tracking_numbers):
+        raise NotImplementedError
+
+
+class FakeCarrier(BaseCarrier):
+    """
+    Transportadora local para desenvolvimento e testes: o progresso de cada
+    código é derivado do seu hash, sem rede (latência opcional).
+    """
+    name = 'fake'
+    STAGES = [
+        ('posted', 'shipped', 'Objeto postado'),
+        ('transit', 'in_transit', 'Objeto em trânsito'),
+        ('out', 'out_for_delivery', 'Objeto saiu para entrega'),
+        ('delivered', 'delivered', 'Objeto entregue ao destinatário'),
+    ]
+
+    async def track(self, tracking_numbers):
+        latency = float(self.config.get('latency', 0))
+        if latency:
+            await asyncio.sleep(latency)
+
+        base = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        results = {}
+        for number in tracking_numbers:
+            seed = int(hashlib.blake2b(number.encode(), digest_size=4).hexdigest(), 16)
+            reached = seed % len(self.STAGES) + 1
+            start = base + timedelta(hours=seed % 1000)
+            results[number] = [
+                {
+                    'occurred_at': (start + timedelta(hours=12 * index)).isoformat(),
+                    'code': code,
+                    'status': status,
+                    'description': description,
+                    'location': 'Centro de Distribuição',
+                }
+                for index, (code, status, description) in enumerate(self.STAGES[:reached])
+            ]
+        return results
+
+
+class HttpJsonCarrier(BaseCarrier):
+    """
+    API genérica em JSON: POST {"tracking_numbers": [...]} em `tracking_url`,
+    resposta {"results": {codigo: [eventos]}}. Configurada em
+    ShippingMethod.configuration (tracking_url, tracking_token, tracking_timeout).
+    A chamada bloqueante roda numa thread para não travar o loop.
+    """
+    name = 'http'
+
+    def request(self, tracking_numbers):
+        body = json.dumps({'tracking_numbers': list(tracking_numbers)}).encode()
+        request = urllib.request.Request(self.config['tracking_url'], data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'Authorization': f"Bearer {self.config.get('tracking_token', '')}",
+        })
+        with urllib.request.urlopen(request, timeout=float(self.config.get('tracking_timeout', 15))) as response:
+            return json.loads(response.read().decode()).get('results', {})
+
+    async def track(self, tracking_numbers):
+        return await asyncio.to_thread(self.request, tracking_numbers)
+
+
+CARRIERS = {
+    FakeCarrier.name: FakeCarrier,
+    HttpJsonCarrier.name: HttpJsonCarrier,
+}
+
+
+def get_carrier(carrier, config=None):
+    """
+    Resolve o adaptador: `tracking_adapter` nas configurações do método tem
+    prioridade; senão usa o nome da transportadora. Retorna None se não houver.
+    """
+    config = config or {}
+    name = config.get('tracking_adapter') or slugify(carrier or '')
+    adapter = CARRIERS.get(name)
+    return adapter(config) if adapter else None
+
+
+def parse_event_time(event):
+    """Data do evento com fuso (sem fuso: o fuso padrão do site), ou None se inválida"""
+    try:
+        occurred_at = parse_datetime(event.get('occurred_at') or '')
+    except ValueError:
+        return None
+    if occurred_at is not None and timezone.is_naive(occurred_at):
+        occurred_at = timezone.make_aware(occurred_at)
+    return occurred_at
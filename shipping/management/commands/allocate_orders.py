@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from models.batching import keyset_chunks
+from shipping.services.allocation_service import AllocationError, FulfillmentAllocator
+
+
+class Command(BaseCommand):
+    help = 'Aloca depósitos para pedidos confirmados sem envio e cria os Shipments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--order', type=str, help='Número de um pedido específico')
+        parser.add_argument('--mode', choices=['auto', 'greedy', 'exact'], default='auto')
+        parser.add_argument('--no-reserve', action='store_true', help='Não reservar o estoque')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas exibe a alocação')
+
+    def handle(self, *args, **options):
+        from orders.models import Order
+
+        queryset = Order.objects.filter(status__in=['confirmed', 'processing'], shipments__isnull=True)
+        if options['order']:
+            queryset = Order.objects.filter(order_number=options['order'])
+
+        stats = dict.fromkeys(['orders', 'shipments', 'incomplete', 'failed'], 0)
+        elapsed = 0.0
+        for orders in keyset_chunks(queryset.distinct(), 500):
+            for order in orders:
+                allocator = FulfillmentAllocator(order, mode=options['mode'])
+                started = time.perf_counter()
+                try:
+                    if options['dry_run']:
+                        plan, shipments = allocator.allocate(), []
+                    else:
+                        plan, shipments = allocator.run(reserve=not options['no_reserve'])
+                except AllocationError as e:
+                    stats['failed'] += 1
+                    self.stderr.write(f'{order.order_number}: {e}')
+                    continue
+                finally:
+                    elapsed += time.perf_counter() - started
+
+                stats['orders'] += 1
+                stats['shipments'] += len(plan.shipments)
+                stats['incomplete'] += 0 if plan.is_complete else 1
+                if options['dry_run'] or options['verbosity'] > 1:
+                    self.stdout.write(f'{order.order_number}: {plan!r}')
+
+        average = (elapsed / stats['orders'] * 1000) if stats['orders'] else 0
+        summary = ', '.join(f'{key}={value}' for key, value in stats.items())
+        self.stdout.write(self.style.SUCCESS(f'{summary}, média={average:.1f}ms/pedido'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from shipping.services.tracking_service import TrackingPoller
+
+
+class Command(BaseCommand):
+    help = 'Consulta as transportadoras e atualiza o rastreamento dos envios em trânsito'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carrier', type=str, help='Apenas uma transportadora/adaptador')
+        parser.add_argument('--chunk-size', type=int, default=TrackingPoller.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--concurrency', type=int, default=10, help='Requisições simultâneas')
+        parser.add_argument('--dry-run', action='store_true', help='Consulta sem gravar')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stats = TrackingPoller(
+            chunk_size=options['chunk_size'],
+            concurrency=options['concurrency'],
+            carrier=options['carrier'],
+            dry_run=options['dry_run'],
+        ).run()
+
+        summary = ', '.join(f'{key}={value}' for key, value in stats.items())
+        self.stdout.write(self.style.SUCCESS(f'{summary} em {time.perf_counter() - started:.1f}s'))
@@ -0,0 +1,341 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from itertools import combinations, product
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from shipping.calculators import ShippingCostCalculator
+
+logger = logging.getLogger(__name__)
+
+
+class AllocationError(Exception):
+    """Estoque mudou durante a reserva (outra alocação concorrente)"""
+
+
+class AllocationPlan:
+    """Resultado de uma alocação: envios por depósito e o que ficou sem estoque"""
+
+    def __init__(self, shipments, unallocated, mode):
+        self.shipments = shipments      # [{'warehouse_id', 'lines': {line_id: qty}, 'weight', 'cost', 'method_id'}]
+        self.unallocated = unallocated  # {line_id: qty}
+        self.mode = mode
+        self.keys = {}                  # {line_id: (product_id, variant_id)}
+
+    @property
+    def total_cost(self):
+        return sum((shipment['cost'] for shipment in self.shipments), Decimal('0.00'))
+
+    @property
+    def is_complete(self):
+        return not self.unallocated
+
+    def __repr__(self):
+        return f'<AllocationPlan {self.mode} envios={len(self.shipments)} custo={self.total_cost} pendente={self.unallocated}>'
+
+
+# region Algoritmos
+def shipment_weight(assigned, lines_by_id):
+    return sum((lines_by_id[line_id]['weight'] * quantity for line_id, quantity in assigned.items()), Decimal('0'))
+
+
+def build_shipments(assignment, lines_by_id, cost_fn):
+    shipments = []
+    for warehouse_id, assigned in assignment.items():
+        if not assigned:
+            continue
+        weight = shipment_weight(assigned, lines_by_id)
+        method_id, cost = cost_fn(warehouse_id, weight)
+        shipments.append({
+            'warehouse_id': warehouse_id,
+            'lines': dict(assigned),
+            'weight': weight,
+            'cost': cost,
+            'method_id': method_id,
+        })
+    return shipments
+
+
+def take_from(items, lines):
+    """
+    Quanto de cada linha [(id, key, quantidade)] um depósito cobre. Linhas
+    repetidas do mesmo produto/variante consomem o mesmo saldo.
+    """
+    left = dict(items)
+    take = {}
+    for line_id, key, quantity in lines:
+        take[line_id] = min(left.get(key, 0), quantity)
+        if take[line_id]:
+            left[key] -= take[line_id]
+    return take
+
+
+def allocate_greedy(lines, stock, cost_fn):
+    """
+    Modo rápido (O(depósitos x linhas) por iteração).
+
+    Se algum depósito atende o pedido inteiro, usa o mais barato deles; senão
+    faz uma cobertura gulosa: escolhe o depósito que cobre mais unidades
+    restantes (empate pelo menor custo) até cobrir tudo ou acabar o estoque.
+    """
+    lines_by_id = {line['id']: line for line in lines}
+    total_weight = sum((line['weight'] * line['quantity'] for line in lines), Decimal('0'))
+
+    # Linhas do mesmo produto/variante somadas: o depósito precisa do total
+    needed = defaultdict(int)
+    for line in lines:
+        needed[line['key']] += line['quantity']
+    full = [
+        warehouse_id for warehouse_id, available in stock.items()
+        if all(available.get(key, 0) >= quantity for key, quantity in needed.items())
+    ]
+    if full:
+        best = min(full, key=lambda warehouse_id: cost_fn(warehouse_id, total_weight)[1])
+        assignment = {best: {line['id']: line['quantity'] for line in lines}}
+        return AllocationPlan(build_shipments(assignment, lines_by_id, cost_fn), {}, 'greedy')
+
+    remaining = {line['id']: line['quantity'] for line in lines}
+    available = {warehouse_id: dict(items) for warehouse_id, items in stock.items()}
+    assignment = defaultdict(dict)
+
+    while any(remaining.values()):
+        best, best_units, best_cost = None, 0, None
+        pending = [(line_id, lines_by_id[line_id]['key'], quantity) for line_id, quantity in remaining.items() if quantity]
+        for warehouse_id, items in available.items():
+            take = take_from(items, pending)
+            units = sum(take.values())
+            if not units:
+                continue
+            cost = cost_fn(warehouse_id, shipment_weight(take, lines_by_id))[1] / units
+            if units > best_units or (units == best_units and cost < best_cost):
+                best, best_units, best_cost = warehouse_id, units, cost
+        if best is None:
+            break
+
+        for line_id, quantity in remaining.items():
+            key = lines_by_id[line_id]['key']
+            take = min(available[best].get(key, 0), quantity)
+            if take:
+                assignment[best][line_id] = assignment[best].get(line_id, 0) + take
+                available[best][key] -= take
+                remaining[line_id] -= take
+        del available[best]
+
+    unallocated = {line_id: quantity for line_id, quantity in remaining.items() if quantity}
+    return AllocationPlan(build_shipments(assignment, lines_by_id, cost_fn), unallocated, 'greedy')
+
+
+def allocate_exact(lines, stock, cost_fn):
+    """
+    Modo exato para pedidos pequenos: percorre conjuntos de depósitos em
+    ordem crescente de tamanho e, no menor tamanho viável, todas as
+    atribuições de linhas inteiras, escolhendo a de menor custo. Retorna None
+    quando nenhuma atribuição sem dividir linhas é possível.
+    """
+    lines_by_id = {line['id']: line for line in lines}
+    candidates = [
+        warehouse_id for warehouse_id, available in stock.items()
+        if any(available.get(line['key'], 0) >= line['quantity'] for line in lines)
+    ]
+
+    for size in range(1, len(candidates) + 1):
+        best = None
+        for subset in combinations(candidates, size):
+            options = [
+                [warehouse_id for warehouse_id in subset if stock[warehouse_id].get(line['key'], 0) >= line['quantity']]
+                for line in lines
+            ]
+            for choice in product(*options):
+                if len(set(choice)) != size:
+                    continue
+                used = defaultdict(lambda: defaultdict(int))
+                feasible = True
+                for line, warehouse_id in zip(lines, choice):
+                    used[warehouse_id][line['key']] += line['quantity']
+                    if used[warehouse_id][line['key']] > stock[warehouse_id].get(line['key'], 0):
+                        feasible = False
+                        break
+                if not feasible:
+                    continue
+
+                assignment = defaultdict(dict)
+                for line, warehouse_id in zip(lines, choice):
+                    assignment[warehouse_id][line['id']] = line['quantity']
+                shipments = build_shipments(assignment, lines_by_id, cost_fn)
+                cost = sum(shipment['cost'] for shipment in shipments)
+                if best is None or cost < best[0]:
+                    best = (cost, shipments)
+        if best is not None:
+            return AllocationPlan(best[1], {}, 'exact')
+    return None
+# endregion
+
+
+class FulfillmentAllocator:
+    """
+    Decide quais depósitos atendem cada linha de um pedido.
+
+    Minimiza primeiro o número de envios e depois o custo de frete. O modo
+    `auto` usa o exato para pedidos pequenos e o guloso nos demais.
+    """
+    EXACT_MAX_LINES = 5
+    EXACT_MAX_WAREHOUSES = 5
+    CLOSED_ITEM_STATUSES = ['cancelled', 'returned', 'refunded']
+
+    def __init__(self, order, mode='auto'):
+        self.order = order
+        self.mode = mode
+        address = order.shipping_address or {}
+        self.calculator = ShippingCostCalculator(address.get('postal_code', ''), address.get('state', ''))
+        self._origins = None
+
+    def load_lines(self):
+        """Linhas do pedido ainda não enviadas (uma consulta)"""
+        from orders.models import OrderItem
+
+        rows = OrderItem.objects.filter(order=self.order).exclude(
+            status__in=self.CLOSED_ITEM_STATUSES
+        ).annotate(
+            shipped=Coalesce(Sum('shipmentitem__quantity'), 0)
+        ).values('id', 'product_id', 'variant_id', 'quantity', 'shipped', 'product__weight', 'variant__weight').order_by('id')
+
+        return [
+            {
+                'id': row['id'],
+                'key': (row['product_id'], row['variant_id']),
+                'quantity': row['quantity'] - row['shipped'],
+                'weight': row['variant__weight'] or row['product__weight'] or Decimal('0'),
+            }
+            for row in rows if row['quantity'] > row['shipped']
+        ]
+
+    def load_stock(self, lines):
+        """Estoque disponível por depósito ativo para os SKUs do pedido (uma consulta)"""
+        from inventory.models import InventoryItem
+
+        keys = {line['key'] for line in lines}
+        stock = defaultdict(dict)
+        origins = {}
+        for row in InventoryItem.objects.filter(
+            product_id__in={key[0] for key in keys},
+            warehouse__is_active=True,
+            quantity_available__gt=0,
+        ).values('warehouse_id', 'warehouse__postal_code', 'product_id', 'variant_id', 'quantity_available'):
+            key = (row['product_id'], row['variant_id'])
+            if key in keys:
+                stock[row['warehouse_id']][key] = row['quantity_available']
+                origins[row['warehouse_id']] = row['warehouse__postal_code']
+        self._origins = origins
+        return dict(stock)
+
+    def cost(self, warehouse_id, weight):
+        return self.calculator.cost(self._origins.get(warehouse_id, ''), weight)
+
+    def allocate(self):
+        lines = self.load_lines()
+        if not lines:
+            return AllocationPlan([], {}, self.mode)
+
+        stock = self.load_stock(lines)
+        use_exact = self.mode == 'exact' or (
+            self.mode == 'auto'
+            and len(lines) <= self.EXACT_MAX_LINES
+            and len(stock) <= self.EXACT_MAX_WAREHOUSES
+        )
+        plan = allocate_exact(lines, stock, self.cost) if use_exact else None
+        if plan is None:
+            plan = allocate_greedy(lines, stock, self.cost)
+        plan.keys = {line['id']: line['key'] for line in lines}
+        return plan
+
+    @transaction.atomic
+    def commit(self, plan, reserve=True, user=None):
+        """
+        Cria Shipment/ShipmentItem em lote e, opcionalmente, reserva o estoque.
+        As linhas de estoque envolvidas são travadas numa única consulta; se
+        alguma não tiver mais saldo, levanta AllocationError (rollback).
+        """
+        from shipping.models import Shipment, ShipmentItem
+
+        if not plan.shipments:
+            return []
+
+        if reserve:
+            self.reserve(plan, user)
+
+        shipments = Shipment.objects.bulk_create([
+            Shipment(
+                order=self.order,
+                warehouse_id=shipment['warehouse_id'],
+                shipping_method_id=shipment['method_id'],
+                shipping_address=self.order.shipping_address,
+                weight=shipment['weight'] or None,
+                shipping_cost=shipment['cost'],
+            )
+            for shipment in plan.shipments
+        ])
+        ShipmentItem.objects.bulk_create([
+            ShipmentItem(shipment=obj, order_item_id=line_id, quantity=quantity)
+            for obj, shipment in zip(shipments, plan.shipments)
+            for line_id, quantity in shipment['lines'].items()
+        ])
+
+        logger.info('Pedido %s alocado: %r', self.order.order_number, plan)
+        return shipments
+
+    def reserve(self, plan, user=None):
+        from inventory.models import InventoryItem, InventoryMovement
+
+        items = {
+            (row['warehouse_id'], row['product_id'], row['variant_id']): row
+            for row in InventoryItem.objects.select_for_update().filter(
+                warehouse_id__in={shipment['warehouse_id'] for shipment in plan.shipments},
+                product_id__in={key[0] for key in plan.keys.values()},
+            ).values('id', 'warehouse_id', 'product_id', 'variant_id', 'quantity_available', 'quantity_reserved')
+        }
+
+        now = timezone.now()
+        touched, movements = {}, []
+        for shipment in plan.shipments:
+            for line_id, quantity in shipment['lines'].items():
+                item = items.get((shipment['warehouse_id'], *plan.keys[line_id]))
+                if item is None or item['quantity_available'] < quantity:
+                    raise AllocationError(f'Estoque insuficiente no depósito {shipment["warehouse_id"]} para o item {line_id}')
+                movements.append(InventoryMovement(
+                    inventory_item_id=item['id'],
+                    movement_type='reserved',
+                    reference_type='order',
+                    reference_id=self.order.pk,
+                    quantity_before=item['quantity_available'],
+                    quantity_change=-quantity,
+                    quantity_after=item['quantity_available'] - quantity,
+                    user=user,
+                ))
+                item['quantity_available'] -= quantity
+                item['quantity_reserved'] += quantity
+                touched[item['id']] = item
+
+        InventoryItem.objects.bulk_update([
+            InventoryItem(
+                id=item['id'],
+                quantity_available=item['quantity_available'],
+                quantity_reserved=item['quantity_reserved'],
+                updated_at=now,
+            )
+            for item in touched.values()
+        ], ['quantity_available', 'quantity_reserved', 'updated_at'])
+        InventoryMovement.objects.bulk_create(movements)
+
+    def run(self, reserve=True, user=None, retries=1):
+        """Aloca e grava; refaz a alocação se o estoque mudar no meio do caminho"""
+        for attempt in range(retries + 1):
+            plan = self.allocate()
+            try:
+                return plan, self.commit(plan, reserve=reserve, user=user)
+            except AllocationError:
+                if attempt == retries:
+                    raise
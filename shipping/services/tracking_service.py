@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from django.db.models import Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from models.batching import keyset_chunks
+from shipping.carriers import get_carrier, normalize_event, parse_event_time
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingPoller:
+    """
+    Atualiza o rastreamento dos envios em trânsito.
+
+    Os envios ativos são lidos em blocos keyset; em cada bloco os códigos são
+    agrupados por método/transportadora e consultados em lotes, com várias
+    requisições simultâneas (asyncio, limitado por semáforo). Só eventos novos
+    são anexados a `tracking_events`; status e datas mudam via bulk_update e os
+    pedidos são atualizados com um UPDATE por transição.
+    """
+    DEFAULT_CHUNK_SIZE = 1000
+    ACTIVE_STATUSES = ['ready_to_ship', 'shipped', 'in_transit', 'out_for_delivery', 'failed_delivery']
+    # Ordem de progresso: um evento atrasado não faz o envio "voltar"
+    STATUS_RANK = {
+        'pending': 0, 'ready_to_ship': 1, 'shipped': 2, 'in_transit': 3,
+        'out_for_delivery': 4, 'failed_delivery': 4, 'delivered': 5, 'returned': 5,
+    }
+    UPDATE_FIELDS = ['tracking_events', 'status', 'shipped_at', 'delivered_at', 'updated_at']
+
+    def __init__(self, chunk_size=None, concurrency=10, carrier=None, dry_run=False):
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.concurrency = concurrency
+        self.carrier = carrier
+        self.dry_run = dry_run
+        self.stats = dict.fromkeys(['shipments', 'requests', 'errors', 'new_events', 'updated', 'shipped', 'delivered', 'orders_shipped', 'orders_delivered'], 0)
+
+    def get_queryset(self):
+        from shipping.models import Shipment
+
+        queryset = Shipment.objects.filter(status__in=self.ACTIVE_STATUSES).exclude(tracking_number='')
+        if self.carrier:
+            queryset = queryset.filter(
+                Q(shipping_method__carrier__iexact=self.carrier)
+                | Q(shipping_method__configuration__tracking_adapter=self.carrier)
+            )
+        return queryset.values(
+            'id', 'order_id', 'tracking_number', 'status', 'shipped_at', 'delivered_at', 'tracking_events',
+            'shipping_method_id', 'shipping_method__carrier', 'shipping_method__configuration',
+        )
+
+    # region Consulta
+    async def fetch(self, jobs):
+        """Executa os lotes [(adaptador, códigos)] com no máximo `concurrency` simultâneos"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(adapter, numbers):
+            async with semaphore:
+                try:
+                    return await adapter.track(numbers)
+                except Exception as e:
+                    logger.warning('Falha ao consultar %s (%d códigos): %s', adapter.name, len(numbers), e)
+                    self.stats['errors'] += 1
+                    return {}
+
+        results = {}
+        for partial in await asyncio.gather(*(run(adapter, numbers) for adapter, numbers in jobs)):
+            results.update(partial)
+        self.stats['requests'] += len(jobs)
+        return results
+
+    def build_jobs(self, rows):
+        adapters, numbers = {}, defaultdict(list)
+        for row in rows:
+            method_id = row['shipping_method_id']
+            if method_id not in adapters:
+                adapters[method_id] = get_carrier(row['shipping_method__carrier'], row['shipping_method__configuration'])
+            if adapters[method_id] is not None:
+                numbers[method_id].append(row['tracking_number'])
+
+        jobs = []
+        for method_id, codes in numbers.items():
+            adapter = adapters[method_id]
+            for start in range(0, len(codes), adapter.batch_size):
+                jobs.append((adapter, codes[start:start + adapter.batch_size]))
+        return jobs
+    # endregion
+
+    # region Aplicação
+    def merge(self, row, events):
+        """Anexa os eventos novos; retorna o objeto a gravar ou None se nada mudou"""
+        from shipping.models import Shipment
+
+        existing = row['tracking_events'] or []
+        known = {event.get('id') for event in existing}
+        new = []
+        for event in map(normalize_event, events):
+            # Sem data válida não há como situar o evento na linha do tempo
+            if event['id'] not in known and parse_event_time(event) is not None:
+                known.add(event['id'])
+                new.append(event)
+        if not new:
+            return None
+
+        # Ordem pelo instante (fusos diferentes na mesma remessa), não pelo texto
+        timed = [(parse_event_time(event), event) for event in existing + new]
+        timed = sorted((pair for pair in timed if pair[0] is not None), key=lambda pair: pair[0])
+        timeline = [event for _, event in timed]
+        status, shipped_at, delivered_at = row['status'], row['shipped_at'], row['delivered_at']
+        for occurred_at, event in timed:
+            target = event.get('status')
+            if target in self.STATUS_RANK and self.STATUS_RANK[target] >= self.STATUS_RANK.get(status, 0):
+                status = target
+            if target in ('shipped', 'in_transit') and not shipped_at:
+                shipped_at = occurred_at
+            if target == 'delivered' and not delivered_at:
+                delivered_at = occurred_at
+
+        self.stats['new_events'] += len(new)
+        return Shipment(
+            id=row['id'],
+            tracking_events=timeline,
+            status=status,
+            shipped_at=shipped_at,
+            delivered_at=delivered_at,
+            updated_at=timezone.now(),
+        )
+
+    def propagate(self, shipped_orders, delivered_orders):
+        """
+        Pedidos acompanham os envios: um UPDATE por transição e por bloco.
+        As datas vêm dos eventos (gravadas nos envios pelo bulk_update):
+        enviado no primeiro envio despachado, entregue no último entregue.
+        """
+        from orders.models import Order
+        from shipping.models import Shipment
+
+        now = timezone.now()
+        shipments = Shipment.objects.filter(order=OuterRef('pk')).values('order')
+        if shipped_orders:
+            first_shipped = shipments.annotate(at=Min('shipped_at')).values('at')
+            self.stats['orders_shipped'] += Order.objects.filter(
+                id__in=shipped_orders, status__in=['confirmed', 'processing'],
+            ).update(status='shipped', shipped_at=Coalesce(Subquery(first_shipped), now), updated_at=now)
+        if delivered_orders:
+            # Entregue só quando todos os envios do pedido foram entregues
+            last_delivered = shipments.annotate(at=Max('delivered_at')).values('at')
+            self.stats['orders_delivered'] += Order.objects.filter(
+                id__in=delivered_orders, status__in=['confirmed', 'processing', 'shipped'],
+            ).exclude(
+                shipments__status__in=[status for status in self.STATUS_RANK if status != 'delivered'],
+            ).update(status='delivered', delivered_at=Coalesce(Subquery(last_delivered), now), updated_at=now)
+
+    def apply(self, rows, results):
+        from shipping.models import Shipment
+
+        changed, shipped_orders, delivered_orders = [], set(), set()
+        for row in rows:
+            obj = self.merge(row, results.get(row['tracking_number']) or [])
+            if obj is None:
+                continue
+            changed.append(obj)
+            if obj.shipped_at and not row['shipped_at']:
+                self.stats['shipped'] += 1
+                shipped_orders.add(row['order_id'])
+            if obj.status == 'delivered' and row['status'] != 'delivered':
+                self.stats['delivered'] += 1
+                delivered_orders.add(row['order_id'])
+
+        self.stats['updated'] += len(changed)
+        if self.dry_run or not changed:
+            return
+        Shipment.objects.bulk_update(changed, self.UPDATE_FIELDS, batch_size=self.chunk_size)
+        self.propagate(shipped_orders, delivered_orders)
+    # endregion
+
+    def run(self):
+        for rows in keyset_chunks(self.get_queryset(), self.chunk_size):
+            self.stats['shipments'] += len(rows)
+            jobs = self.build_jobs(rows)
+            if jobs:
+                self.apply(rows, asyncio.run(self.fetch(jobs)))
+
+        logger.info('Rastreamento atualizado: %s', self.stats)
+        return self.stats
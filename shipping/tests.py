@@ -1,3 +1,118 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models import InventoryItem, Warehouse
+from orders.models import Order, OrderItem
+from products.models import Product
+from users.models import User
+
+from .calculators import ShippingCostCalculator
+from .models import Shipment, ShippingMethod
+from .services.allocation_service import FulfillmentAllocator
+from .services.tracking_service import TrackingPoller
+
+ADDRESS = {'postal_code': '01310-100', 'city': 'São Paulo', 'state': 'SP'}
+
+
+def at(day, hour=12):
+    return datetime(2026, 3, day, hour, tzinfo=dt_timezone.utc)
+
+
+def event(status, occurred_at):
+    return {'status': status, 'occurred_at': occurred_at.isoformat(), 'code': status}
+
+
+class TrackingPropagationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        cls.order = Order.objects.create(
+            user=user, status='confirmed', billing_address=ADDRESS, shipping_address=ADDRESS,
+            subtotal=Decimal('100.00'), total_amount=Decimal('100.00'),
+        )
+        cls.shipments = [
+            Shipment.objects.create(order=cls.order, tracking_number=f'BR{i}', status='ready_to_ship', shipping_address=ADDRESS)
+            for i in range(2)
+        ]
+
+    def poll(self, results):
+        poller = TrackingPoller()
+        poller.apply(list(poller.get_queryset()), results)
+        self.order.refresh_from_db()
+        return poller.stats
+
+    def test_order_dates_come_from_the_tracking_events(self):
+        self.poll({'BR0': [event('shipped', at(2))], 'BR1': [event('shipped', at(3))]})
+        self.assertEqual((self.order.status, self.order.shipped_at), ('shipped', at(2)))
+
+        self.poll({'BR0': [event('delivered', at(5))]})
+        self.assertEqual(self.order.status, 'shipped')
+
+        stats = self.poll({'BR1': [event('delivered', at(6))]})
+        self.assertEqual(stats['orders_delivered'], 1)
+        self.assertEqual((self.order.status, self.order.shipped_at, self.order.delivered_at), ('delivered', at(2), at(6)))
+
+
+    def test_events_are_ordered_by_instant_and_invalid_times_are_skipped(self):
+        self.poll({'BR0': [
+            {'status': 'shipped', 'occurred_at': '2026-03-02T10:00:00-03:00', 'code': 'PO'},
+            {'status': 'in_transit', 'occurred_at': '2026-03-02T12:30:00+00:00', 'code': 'RO'},
+            {'status': 'delivered', 'occurred_at': 'ontem', 'code': 'BDE'},
+        ]})
+        shipment = Shipment.objects.get(pk=self.shipments[0].pk)
+        self.assertEqual(shipment.shipped_at, datetime(2026, 3, 2, 12, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual([event['code'] for event in shipment.tracking_events], ['RO', 'PO'])
+        self.assertEqual(shipment.status, 'in_transit')
+
+        self.poll({'BR0': [{'status': 'delivered', 'occurred_at': '2026-03-05T09:00:00', 'code': 'BDE'}]})
+        shipment.refresh_from_db()
+        self.assertEqual(shipment.delivered_at, timezone.make_aware(datetime(2026, 3, 5, 9)))
+
+
+class FulfillmentAllocatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ShippingMethod.objects.create(name='PAC', code='pac', base_price=Decimal('10.00'))
+        cls.product = Product.objects.create(name='Produto', slug='produto', sku='SKU-1', price=Decimal('10.00'))
+        cls.near = Warehouse.objects.create(name='Perto', code='SP', postal_code='01000-000')
+        cls.far = Warehouse.objects.create(name='Longe', code='PR', postal_code='80000-000')
+        cls.order = Order.objects.create(
+            status='confirmed', billing_address=ADDRESS, shipping_address=ADDRESS,
+            subtotal=Decimal('60.00'), total_amount=Decimal('60.00'),
+        )
+        # Duas linhas do mesmo produto: nenhuma delas sozinha passa do estoque do depósito próximo
+        for _ in range(2):
+            OrderItem.objects.create(
+                order=cls.order, product=cls.product, product_name='Produto', product_sku='SKU-1',
+                quantity=3, unit_price=Decimal('10.00'), total_price=Decimal('30.00'),
+            )
+
+    def setUp(self):
+        ShippingCostCalculator.clear_cache()
+        self.stock = {
+            warehouse.pk: InventoryItem.objects.create(warehouse=warehouse, product=self.product, quantity_available=quantity)
+            for warehouse, quantity in ((self.near, 4), (self.far, 6))
+        }
+
+    def test_duplicate_lines_are_summed_before_choosing_a_full_warehouse(self):
+        plan, shipments = FulfillmentAllocator(self.order, mode='greedy').run(retries=0)
+
+        self.assertTrue(plan.is_complete)
+        self.assertEqual([shipment.warehouse_id for shipment in shipments], [self.far.pk])
+        item = InventoryItem.objects.get(pk=self.stock[self.far.pk].pk)
+        self.assertEqual((item.quantity_available, item.quantity_reserved), (0, 6))
+
+    def test_split_allocation_reserves_each_warehouse(self):
+        InventoryItem.objects.filter(pk=self.stock[self.far.pk].pk).update(quantity_available=3)
+
+        plan, shipments = FulfillmentAllocator(self.order, mode='greedy').run(retries=0)
 
-# Create your tests here.
+        self.assertTrue(plan.is_complete)
+        self.assertEqual(len(shipments), 2)
+        self.assertEqual(
+            sorted(InventoryItem.objects.values_list('quantity_available', 'quantity_reserved')),
+            [(0, 4), (1, 2)],
+        )
@@ -23,7 +23,9 @@ function Global() {
         },
         initMessages: async () => {
             try {
-                const response = await fetch('/modals/', { credentials: 'include' });
+                // Arquivo estático com hash (pré-carregado no <head>) ou o endpoint /modals/
+                const manifestUrl = document.querySelector('link[data-modals-manifest]')?.getAttribute('href') || '/modals/';
+                const response = await fetch(manifestUrl);
 
                 if (!response.ok) {
                     console.error(
@@ -62,7 +62,7 @@ window.require = (scripts, callback, partial=false) => {
 document.addEventListener('DOMContentLoaded', async function() {
     // Inicializar módulos
     var ctor = {};
-    await require('global, utils, message, notify, bindings, themes, translation, enchancer', async (res) => {
+    const boot = async (res) => {
         // Global
         window.global = new Global();
         global.applyHashProperties();
@@ -91,7 +91,11 @@ document.addEventListener('DOMContentLoaded', async function() {
         notify.global();
         global.initHtml();
         utils.loading(false);
-    });
+    };
+
+    // No bundle de produção os scripts base já estão carregados
+    if (window.ASSET_BUNDLE) await boot();
+    else await require('global, utils, message, notify, bindings, themes, translation, enchancer', boot);
 
     // Extending custom methods
     JSON['tryParse'] = (str) => {
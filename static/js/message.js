@@ -48,8 +48,9 @@ window.modal = (function () {
         const modalSet = modalSettings(view);
         if(!modalSet) throw Error('Could not found the modal configuration. Modal:' + view);
         return new Promise((resolve, reject) => {
-            require(modalSet.scripts, async () => {
-                const html = await loadHtml('/static/' + modalSet.views);
+            // URLs com hash do manifesto (cache longo); caminhos simples como fallback
+            require(modalSet.scripts_url || modalSet.scripts, async () => {
+                const html = await loadHtml(modalSet.views_url || '/static/' + modalSet.views);
 
                 if (modalStack.length) await modalStack[modalStack.length - 1].modalEl.modal('hide');
 
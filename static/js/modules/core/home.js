@@ -99,6 +99,9 @@ define(`/static/js/modules/core/home.js`, ['/static/js/mixins/components.js', `/
             },
 
             loadFeaturedProducts: async () => {
+                // Cards já renderizados no servidor (fragmentos em cache)
+                if (document.getElementById('featuredGrid')?.hasAttribute('data-server-rendered')) return;
+
                 try {
                     const response = await fetch(`${global.config.apiUrl}products/featured/`);
                     const products = await response.json();
@@ -290,8 +293,8 @@ define(`/static/js/modules/core/home.js`, ['/static/js/mixins/components.js', `/
                 var button, productId;
                 
                 if (params.$element.is(`button`) && params.$element.hasClass('product-wishlist')) {
-                    button = params.$element;
-                    productId = button.data().productId;
+                    button = params.$element.get(0);
+                    productId = params.$element.data('productId');
                 };
 
                 if (!button || !productId) return;
@@ -299,7 +302,7 @@ define(`/static/js/modules/core/home.js`, ['/static/js/mixins/components.js', `/
                 utils.loading();
                 
                 try {
-                    const response = await fetch(`${global.config.apiUrl}marketing/lista-desejos/toggle/`, {
+                    const response = await fetch('/marketing/lista-desejos/toggle/', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json',
@@ -319,6 +322,7 @@ define(`/static/js/modules/core/home.js`, ['/static/js/mixins/components.js', `/
                         }
                         
                         // Update button state
+                        button.classList.toggle('active', data.added);
                         const icon = button.querySelector('i');
                         if (data.added) {
                             icon.style.color = '#e74c3c';
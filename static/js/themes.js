@@ -2,6 +2,9 @@
 function Themes() {
     return {
         initTheme: () => {
+            // Tema compilado no servidor: variáveis e variações já vêm no CSS
+            if (document.documentElement.hasAttribute('data-theme-compiled')) return;
+
             const colors = themes.getCSSVariables(
                 '--off-white', '--white', '--black',
                 '--primary-color', '--secondary-color',
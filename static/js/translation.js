@@ -6,8 +6,9 @@ function Translations() {
             const savedLang = localStorage.getItem('lang') || 'pt-BR';
             document.getElementById('data-lang').value = savedLang;
 
-            const response = await fetch(`/static/i18n/${savedLang}.json`);
-            translations = await response.json();
+            // Bundle de produção já traz o dicionário do idioma do site
+            translations = window.I18N_PRELOADED?.[savedLang]
+                || await (await fetch(`/static/i18n/${savedLang}.json`)).json();
             currentLang = savedLang;
             translate.applyTranslations();
             global.currentLang = savedLang;
@@ -15,24 +16,30 @@ function Translations() {
         },
 
         applyTranslations() {
-            document.querySelectorAll('[data-i18n]').forEach(translate._getTranslation);
+            // Os templates já chegam traduzidos do servidor ({% t %}); aqui só
+            // o que sobrou com data-i18n e os fragmentos injetados depois
+            translate.translateFragment(document);
+
+            // Observa apenas os contêineres de conteúdo dinâmico (data-i18n-dynamic),
+            // não o documento inteiro: render de listas grandes não dispara callbacks
             const translatorObserver = new MutationObserver(mutations => {
                 for (const mutation of mutations) {
                     for (const node of mutation.addedNodes) {
-                        if (node.nodeType === 1) {
-                            if (node.hasAttribute('data-i18n')) translate._getTranslation(node);
-                            node.querySelectorAll?.('[data-i18n]').forEach(translate._getTranslation);
-                        };
+                        if (node.nodeType === 1) translate.translateFragment(node);
                     };
                 };
             });
 
-            translatorObserver.observe(document.body, {
-                childList: true,
-                subtree: true
+            document.querySelectorAll('[data-i18n-dynamic]').forEach(container => {
+                translatorObserver.observe(container, { childList: true, subtree: true });
             });
         },
 
+        translateFragment(root) {
+            if (root.hasAttribute?.('data-i18n')) translate._getTranslation(root);
+            root.querySelectorAll?.('[data-i18n]').forEach(translate._getTranslation);
+        },
+
         _getTranslation(el) {
             const key = el.getAttribute('data-i18n');
             const text = translate._translate(key);
@@ -37,7 +37,7 @@ class Supplier(BaseModel):
         ]
     
     def __str__(self):
-        return self.trade_name or self.company_name
+        return self.company_name
 
 class PurchaseOrder(BaseModel):
     """Pedidos de compra"""
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ThemeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'theme'
+
+    def ready(self):
+        import theme.signals
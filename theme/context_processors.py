@@ -2,25 +2,16 @@ from django.db import models
 
 def theme_context(request):
     """
-    Adiciona o tema ativo ao contexto de todos os templates
+    Adiciona o tema ativo ao contexto de todos os templates: um resumo em cache
+    (URL do CSS compilado, fontes e logos), sem consultas por requisição
     """
-    active_theme = None
     try:
-        from users.models import UserPreferences
-        from theme.models import Theme
-        
-        if request.user.is_authenticated:
-            active_theme = UserPreferences.objects.filter(type="T").first()
-        
-        if not active_theme or active_theme == '':
-            active_theme = Theme.objects.filter(is_active=True).first()
-        
-        if not active_theme or active_theme == '':
-            active_theme = Theme.objects.filter(is_default=True).first()
-            
-    except:
+        from theme.services.theme_service import ThemeService
+
+        active_theme = ThemeService.for_user(getattr(request, 'user', None))
+    except Exception:
         active_theme = None
-    
+
     return {
         'active_theme': active_theme
     }
@@ -35,7 +26,7 @@ def lang_context(request):
         from users.models import UserPreferences
         
         if request.user.is_authenticated:
-            active_lang = UserPreferences.objects.filter(type="L").first()
+            active_lang = UserPreferences.objects.filter(user=request.user, type="L").first()
         
         if not active_lang or active_lang == '':
             active_lang = Languages.objects.filter(is_active=True).first()
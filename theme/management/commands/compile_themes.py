@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from theme.models import Theme
+from theme.services.theme_service import ThemeService
+
+
+class Command(BaseCommand):
+    help = 'Compila o CSS de todos os temas (ex.: após trocar o storage de mídia)'
+
+    def handle(self, *args, **options):
+        themes = Theme.objects.all()
+        for theme in themes:
+            name = ThemeService.compile(theme)
+            self.stdout.write(f'{theme.name}: {name}')
+        ThemeService.reload()
+        self.stdout.write(self.style.SUCCESS(f'{len(themes)} temas compilados'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from theme.services.theme_service import ThemeService
+
+
+class Command(BaseCommand):
+    help = 'Apaga o CSS de versões antigas dos temas, depois do prazo de carência'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, help=f'Carência após a substituição (padrão: {ThemeService.STALE_GRACE // 3600}h)')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas lista o que seria apagado')
+
+    def handle(self, *args, **options):
+        grace = options['grace_hours'] * 3600 if options['grace_hours'] is not None else None
+        stale = ThemeService.purge_stale(grace=grace, dry_run=options['dry_run'])
+        for name in stale:
+            self.stdout.write(name)
+        verb = 'a apagar' if options['dry_run'] else 'apagados'
+        self.stdout.write(self.style.SUCCESS(f'{len(stale)} arquivos {verb}'))
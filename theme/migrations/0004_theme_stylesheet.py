@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-19 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('theme', '0003_alter_theme_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='theme',
+            name='stylesheet',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='CSS compilado'),
+        ),
+    ]
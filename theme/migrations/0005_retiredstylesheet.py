@@ -0,0 +1,25 @@
+# Generated by Django 4.2.21 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('theme', '0004_theme_stylesheet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetiredStylesheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Arquivo')),
+                ('retired_at', models.DateTimeField(db_index=True, verbose_name='Substituído em')),
+            ],
+            options={
+                'verbose_name': 'CSS Substituído',
+                'verbose_name_plural': 'CSS Substituídos',
+            },
+        ),
+    ]
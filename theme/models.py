@@ -40,6 +40,9 @@ class Theme(BaseModel):
     # CSS personalizado
     custom_css = models.TextField(blank=True, null=True)
     custom_js = models.TextField(blank=True, null=True)
+    # CSS compilado (variáveis, variações de cor e custom_css) no storage, com
+    # hash do conteúdo no nome; gerado ao salvar (theme.services.theme_service)
+    stylesheet = models.CharField(max_length=255, blank=True, editable=False, verbose_name='CSS compilado')
     
     # Configurações de layout
     show_featured_products = models.BooleanField(default=True)
@@ -73,3 +76,16 @@ class Theme(BaseModel):
     def __str__(self):
         return f"{self.name} | Site: {self.site.site_name} | Default: {self.is_default} | Active: {self.is_active}"
 
+
+
+class RetiredStylesheet(models.Model):
+    """CSS compilado que deixou de ser o atual de um tema; apagado após a carência (purge_theme_css)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Arquivo')
+    retired_at = models.DateTimeField(db_index=True, verbose_name='Substituído em')
+
+    class Meta:
+        verbose_name = 'CSS Substituído'
+        verbose_name_plural = 'CSS Substituídos'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,281 @@
+import hashlib
+import logging
+import math
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from core.cache import tiered_cache
+
+logger = logging.getLogger(__name__)
+
+# Campo do tema -> nome da variável CSS (o mesmo que o themes.js lia do :root)
+COLOR_FIELDS = [
+    ('off_white', 'off-white'),
+    ('white', 'white'),
+    ('black', 'black'),
+    ('primary_color', 'primary'),
+    ('secondary_color', 'secondary'),
+    ('fb_info_color', 'fb-info'),
+    ('fb_danger_color', 'fb-danger'),
+    ('fb_warning_color', 'fb-warning'),
+    ('fb_success_color', 'fb-success'),
+    ('neutral_color', 'neutral'),
+    ('shadow_color', 'shadow'),
+]
+
+# Variações de luminosidade geradas para cada cor (sufixo, função de L)
+VARIANTS = [
+    ('lighter', lambda lightness: lightness + 20),
+    ('lightest', lambda lightness: lightness + 40),
+    ('darker', lambda lightness: lightness - 5),
+    ('darkest', lambda lightness: lightness - 10),
+    ('border', lambda lightness: 85),
+]
+
+
+class ThemeService:
+    """
+    Temas compilados: cada Theme vira um CSS estático com as variáveis, as
+    variações de cor (antes geradas no navegador pelo themes.js) e o
+    `custom_css`, gravado no storage com o hash do conteúdo no nome
+    (`themes/css/theme-<id>.<hash>.css`, cache longo no navegador).
+
+    A compilação acontece ao salvar o tema (theme.signals); as páginas só
+    recebem um resumo em cache (URL do CSS, fontes, logos) — o tema do usuário
+    é uma consulta ao cache por id, sem acessar o banco.
+
+    A versão anterior do CSS não é apagada na compilação nem quando o tema é
+    apagado: páginas em cache (aqui, no navegador ou na CDN) ainda apontam
+    para ela. A substituição fica registrada em RetiredStylesheet e
+    `purge_stale` (comando purge_theme_css) apaga as versões substituídas há
+    mais de STALE_GRACE segundos.
+    """
+    NAMESPACE = 'theme'
+    CACHE_TIMEOUT = 60 * 60 * 24
+    OUTPUT_DIR = 'themes/css'
+    STALE_GRACE = getattr(settings, 'THEME_CSS_GRACE', 60 * 60 * 24 * 7)
+    FILE_PATTERN = re.compile(r'^theme-(\d+)\.')
+
+    # region Compilação
+    @staticmethod
+    def js_round(value):
+        """Arredondamento do Math.round (metade para cima), igual ao do themes.js"""
+        return math.floor(value + 0.5)
+
+    @classmethod
+    def hex_to_hsl(cls, hex_color):
+        hex_color = hex_color.lstrip('#')
+        if len(hex_color) == 3:
+            hex_color = ''.join(char * 2 for char in hex_color)
+        r, g, b = (int(hex_color[index:index + 2], 16) / 255 for index in (0, 2, 4))
+
+        high, low = max(r, g, b), min(r, g, b)
+        h = s = 0
+        lightness = (high + low) / 2
+        if high != low:
+            delta = high - low
+            s = delta / (2 - high - low) if lightness > 0.5 else delta / (high + low)
+            if high == r:
+                h = (g - b) / delta + (6 if g < b else 0)
+            elif high == g:
+                h = (b - r) / delta + 2
+            else:
+                h = (r - g) / delta + 4
+            h /= 6
+        return cls.js_round(h * 360), cls.js_round(s * 100), cls.js_round(lightness * 100)
+
+    @classmethod
+    def color_variables(cls, name, hex_color):
+        """Variáveis de uma cor: base, H/S/L, variações, texto e meia transparência"""
+        try:
+            h, s, lightness = cls.hex_to_hsl(hex_color)
+        except (ValueError, TypeError):
+            logger.warning('Tema: cor inválida para %s (%s)', name, hex_color)
+            return []
+
+        def hsl_variables(variant, value):
+            return [
+                (f'{variant}-H', f'{h}'),
+                (f'{variant}-S', f'{s}%'),
+                (f'{variant}-L', f'{value}%'),
+                (variant, f'hsl({h} {s}% {value}%)'),
+            ]
+
+        variables = hsl_variables(name, lightness)
+        for suffix, variant_lightness in VARIANTS:
+            variables += hsl_variables(f'{name}-{suffix}', max(0, min(100, variant_lightness(lightness))))
+        variables.append((f'{name}-text', '#1b1b1b' if lightness > 60 else '#fafafa'))
+        variables.append((f'{name}-half-alpha', f'hsla({h}, {s}%, {lightness}%, 0.5)'))
+        return variables
+
+    @classmethod
+    def render_css(cls, theme):
+        variables = []
+        for field, name in COLOR_FIELDS:
+            value = getattr(theme, field)
+            # Cor original como cadastrada (o CSS do site usa, p. ex., --primary-color)
+            if field.replace('_', '-') != name:
+                variables.append((field.replace('_', '-'), value))
+            variables += cls.color_variables(name, value)
+        variables += [
+            ('heading-font', f'"{theme.heading_font}"'),
+            ('body-font', f'"{theme.body_font}"'),
+        ]
+
+        lines = [f'/* Tema: {theme.name} */', ':root {']
+        lines += [f'    --{name}: {value};' for name, value in variables]
+        lines += [
+            '}',
+            'body { font-family: var(--body-font), sans-serif; }',
+            'h1, h2, h3, h4, h5, h6 { font-family: var(--heading-font), sans-serif; }',
+        ]
+        if theme.custom_css:
+            lines.append(theme.custom_css)
+        return '\n'.join(lines) + '\n'
+
+    @classmethod
+    def compile(cls, theme):
+        """Grava o CSS do tema (se o conteúdo mudou) e retorna o nome no storage"""
+        from theme.models import RetiredStylesheet, Theme
+
+        content = cls.render_css(theme).encode()
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        name = f'{cls.OUTPUT_DIR}/theme-{theme.pk}.{digest}.css'
+        if not default_storage.exists(name):
+            saved = default_storage.save(name, ContentFile(content))
+            if saved != name:
+                logger.warning('Tema %s: storage gravou %s em vez de %s', theme.pk, saved, name)
+                name = saved
+
+        if theme.stylesheet != name:
+            # update(): sem disparar o post_save (que compilaria de novo)
+            Theme.objects.with_deleted().filter(pk=theme.pk).update(stylesheet=name)
+            cls.retire(theme.stylesheet)
+            # Voltar a um conteúdo anterior reaproveita o arquivo: ele sai da fila
+            RetiredStylesheet.objects.filter(name=name).delete()
+            theme.stylesheet = name
+        return name
+
+    @staticmethod
+    def retire(name, now=None):
+        """Registra que o CSS deixou de ser usado agora (início da carência)"""
+        from theme.models import RetiredStylesheet
+
+        if name:
+            RetiredStylesheet.objects.update_or_create(name=name, defaults={'retired_at': now or timezone.now()})
+
+    @classmethod
+    def purge_stale(cls, grace=None, now=None, dry_run=False):
+        """
+        Apaga os CSS substituídos há mais de `grace` segundos e retorna os
+        nomes, do mais antigo ao mais novo. A data vem do registro gravado na
+        troca (RetiredStylesheet), não do arquivo: um CSS reaproveitado não
+        é regravado. Arquivos sem registro e fora de uso (ex.: de antes dele)
+        começam a carência nesta execução.
+        """
+        from theme.models import RetiredStylesheet, Theme
+
+        now = now or timezone.now()
+        cutoff = now - timedelta(seconds=cls.STALE_GRACE if grace is None else grace)
+        try:
+            filenames = default_storage.listdir(cls.OUTPUT_DIR)[1]
+        except FileNotFoundError:
+            filenames = []
+
+        in_use = set(Theme._base_manager.exclude(stylesheet='').values_list('stylesheet', flat=True))
+        retired = dict(RetiredStylesheet.objects.values_list('name', 'retired_at'))
+        unrecorded = {
+            f'{cls.OUTPUT_DIR}/{filename}' for filename in filenames if cls.FILE_PATTERN.match(filename)
+        } - in_use - set(retired)
+        stale = [
+            name for name, retired_at in sorted(retired.items(), key=lambda item: (item[1], item[0]))
+            if retired_at < cutoff and name not in in_use
+        ]
+
+        if not dry_run:
+            RetiredStylesheet.objects.bulk_create(
+                [RetiredStylesheet(name=name, retired_at=now) for name in unrecorded], ignore_conflicts=True,
+            )
+            for name in stale:
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+            RetiredStylesheet.objects.filter(name__in=stale).delete()
+        return stale
+    # endregion
+
+    # region Leitura
+    @classmethod
+    def snapshot(cls, theme):
+        """O que os templates usam do tema (sem o model: vai para o cache)"""
+        if not theme.stylesheet or not default_storage.exists(theme.stylesheet):
+            cls.compile(theme)
+        return {
+            'id': theme.pk,
+            'name': theme.name,
+            'stylesheet_url': default_storage.url(theme.stylesheet),
+            'heading_font': theme.heading_font,
+            'body_font': theme.body_font,
+            'logo_url': theme.logo.url if theme.logo else '',
+            'favicon_url': theme.favicon.url if theme.favicon else '',
+        }
+
+    @staticmethod
+    def site_theme_id():
+        """Id (texto) do tema ativo do site, ou o padrão; vazio se não houver"""
+        from theme.models import Theme
+
+        theme_id = (
+            Theme.objects.filter(is_active=True).values_list('pk', flat=True).first()
+            or Theme.objects.filter(is_default=True).values_list('pk', flat=True).first()
+        )
+        return str(theme_id or '')
+
+    @staticmethod
+    def user_theme_id(user):
+        """Id (texto) do tema escolhido pelo usuário (UserPreferences tipo T: id ou nome)"""
+        from theme.models import Theme
+        from users.models import UserPreferences
+
+        value = UserPreferences.objects.filter(user=user, type='T').values_list('value', flat=True).first()
+        if not value:
+            return ''
+        value = value.strip()
+        themes = Theme.objects.filter(pk=value) if value.isdigit() else Theme.objects.filter(name=value)
+        return str(themes.values_list('pk', flat=True).first() or '')
+
+    @classmethod
+    def theme_snapshot(cls, theme_id):
+        from theme.models import Theme
+
+        theme = Theme.objects.filter(pk=theme_id).first()
+        return cls.snapshot(theme) if theme else None
+
+    @classmethod
+    def for_user(cls, user):
+        """Resumo do tema da página: o do usuário, senão o do site (tudo em cache)"""
+        theme_id = ''
+        if user is not None and user.is_authenticated:
+            theme_id = tiered_cache.get_or_set(
+                cls.NAMESPACE, f'user:{user.pk}', lambda: cls.user_theme_id(user), cls.CACHE_TIMEOUT,
+            )
+        if not theme_id:
+            theme_id = tiered_cache.get_or_set(cls.NAMESPACE, 'site', cls.site_theme_id, cls.CACHE_TIMEOUT)
+        if not theme_id:
+            return None
+        return tiered_cache.get_or_set(
+            cls.NAMESPACE, f'compiled:{theme_id}', lambda: cls.theme_snapshot(theme_id), cls.CACHE_TIMEOUT,
+        )
+
+    @classmethod
+    def reload(cls, user_id=None):
+        """Descarta o tema em cache de um usuário, ou de todos"""
+        if user_id is None:
+            tiered_cache.invalidate(cls.NAMESPACE)
+        else:
+            tiered_cache.delete(cls.NAMESPACE, f'user:{user_id}')
+    # endregion
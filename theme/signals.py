@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Theme
+from .services.theme_service import ThemeService
+
+@receiver(post_save, sender=Theme)
+def theme_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ThemeService.compile(instance)
+    # Ativar um tema desativa os outros por update(): descarta o cache de todos
+    ThemeService.reload()
+
+@receiver(post_delete, sender=Theme)
+def theme_deleted(sender, instance, **kwargs):
+    # O arquivo fica até o fim da carência (purge_theme_css)
+    ThemeService.retire(instance.stylesheet)
+    ThemeService.reload()
+
+@receiver(post_save, sender='users.UserPreferences')
+@receiver(post_delete, sender='users.UserPreferences')
+def theme_preference_changed(sender, instance, **kwargs):
+    if instance.type == 'T':
+        ThemeService.reload(instance.user_id)
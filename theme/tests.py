@@ -1,3 +1,99 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from core.models import SiteSettings
+from core.services.translation_service import TranslationService
+from users.models import User, UserPreferences
+
+from .context_processors import lang_context
+
+from .models import RetiredStylesheet, Theme
+from .services.theme_service import ThemeService
+
+
+class StylesheetRetentionTests(TestCase):
+    GRACE = 5 * 24 * 3600
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        site = SiteSettings.objects.create(contact_email='contato@example.com')
+        self.theme = Theme.objects.create(site=site, name='Claro')
+        self.initial = self.theme.stylesheet
+
+    def backdate(self, name, days_ago):
+        RetiredStylesheet.objects.filter(name=name).update(retired_at=timezone.now() - timedelta(days=days_ago))
+
+    def recolor(self, color, retire_days_ago=None):
+        previous = self.theme.stylesheet
+        self.theme.primary_color = color
+        self.theme.save()
+        if retire_days_ago is not None:
+            self.backdate(previous, retire_days_ago)
+        return self.theme.stylesheet
+
+    def test_previous_stylesheet_survives_the_grace_period(self):
+        first = self.recolor('#111111', retire_days_ago=30)
+        second = self.recolor('#222222', retire_days_ago=10)
+        third = self.recolor('#333333', retire_days_ago=1)
+
+        self.assertTrue(all(default_storage.exists(name) for name in (self.initial, first, second, third)))
+        self.assertEqual(ThemeService.purge_stale(grace=self.GRACE, dry_run=True), [self.initial, first])
+
+        self.assertEqual(ThemeService.purge_stale(grace=self.GRACE), [self.initial, first])
+        self.assertFalse(default_storage.exists(first))
+        self.assertTrue(default_storage.exists(second))
+        self.assertTrue(default_storage.exists(third))
+        self.assertEqual(set(RetiredStylesheet.objects.values_list('name', flat=True)), {second})
+
+    def test_reverting_to_an_old_stylesheet_starts_a_new_grace_period(self):
+        first = self.recolor('#111111', retire_days_ago=60)
+        second = self.recolor('#222222', retire_days_ago=40)
+        self.recolor('#111111')  # volta ao conteúdo do primeiro (arquivo existente, sem regravar)
+
+        self.assertEqual(self.theme.stylesheet, first)
+        # O segundo acabou de ser substituído, mesmo que o arquivo seguinte seja antigo
+        self.assertEqual(ThemeService.purge_stale(grace=self.GRACE), [self.initial])
+        self.assertTrue(default_storage.exists(first))
+        self.assertTrue(default_storage.exists(second))
+
+    def test_deleted_theme_keeps_its_stylesheet_for_the_grace_period(self):
+        name = self.theme.stylesheet
+        self.theme.delete(hard=True)
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(ThemeService.purge_stale(grace=self.GRACE), [])
+        self.backdate(name, 10)
+        self.assertEqual(ThemeService.purge_stale(grace=self.GRACE), [name])
+        self.assertFalse(default_storage.exists(name))
+
+    def test_unrecorded_files_start_their_grace_on_the_first_purge(self):
+        orphan = default_storage.save(f'{ThemeService.OUTPUT_DIR}/theme-999.abcdef.css', ContentFile(b'body {}'))
+
+        self.assertEqual(ThemeService.purge_stale(grace=self.GRACE), [])
+        self.assertTrue(RetiredStylesheet.objects.filter(name=orphan).exists())
+        self.assertEqual(ThemeService.purge_stale(grace=0), [orphan])
+
+
+class LangContextTests(TestCase):
+    def test_each_user_gets_their_own_language(self):
+        factory = RequestFactory()
+        languages = {}
+        for username, lang in (('ana', 'en-US'), ('bruno', 'es-ES'), ('carla', None)):
+            user = User.objects.create_user(username=username, email=f'{username}@example.com', password='x')
+            if lang:
+                UserPreferences.objects.create(user=user, type='L', value=lang)
+            request = factory.get('/')
+            request.user = user
+            languages[username] = TranslationService.context_language(lang_context(request))
+
+        self.assertEqual(languages['ana'], 'en-US')
+        self.assertEqual(languages['bruno'], 'es-ES')
+        self.assertEqual(languages['carla'], TranslationService.default_language())